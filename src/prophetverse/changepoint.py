@@ -1,3 +1,4 @@
+import numpy as np
 import jax.numpy as jnp
 
 def get_changepoint_matrix(t : jnp.ndarray, changepoint_t : jnp.array) -> jnp.ndarray:
@@ -44,3 +45,36 @@ def get_changepoint_timeindexes(
     
     changepoint_t = jnp.arange(0, max_t, changepoint_interval)
     return changepoint_t
+
+
+def resize_changepoint_coefficients(
+    changepoint_coefficients: jnp.ndarray,
+    n_changepoint_per_series: list,
+    new_n_changepoint_per_series: list,
+) -> jnp.ndarray:
+    """
+    Resize changepoint coefficients to a new number of changepoints per series.
+
+    The coefficients of each series are stored in consecutive blocks along the last axis. Each block
+    is trimmed, or padded with zeros (no change of rate), at the end.
+
+    Args:
+        changepoint_coefficients (jnp.ndarray): array of shape (..., sum(n_changepoint_per_series)).
+        n_changepoint_per_series (list): current number of changepoints of each series.
+        new_n_changepoint_per_series (list): new number of changepoints of each series.
+
+    Returns:
+        jnp.ndarray: array of shape (..., sum(new_n_changepoint_per_series)).
+    """
+    if len(n_changepoint_per_series) != len(new_n_changepoint_per_series):
+        raise ValueError("The number of series must not change.")
+
+    blocks = jnp.split(
+        changepoint_coefficients, np.cumsum(n_changepoint_per_series)[:-1], axis=-1
+    )
+    resized_blocks = []
+    for block, new_n_changepoints in zip(blocks, new_n_changepoint_per_series):
+        block = block[..., :new_n_changepoints]
+        padding = [(0, 0)] * (block.ndim - 1) + [(0, new_n_changepoints - block.shape[-1])]
+        resized_blocks.append(jnp.pad(block, padding))
+    return jnp.concatenate(resized_blocks, axis=-1)
@@ -1,9 +1,34 @@
-from typing import Callable
+import functools
+import os
+import pickle
+import time
+from typing import Any, Callable, NamedTuple
 import numpyro
+from numpyro import handlers
 from numpyro.infer.initialization import init_to_mean
 from numpyro.infer import SVI, TraceEnum_ELBO, init_to_value, Trace_ELBO, MCMC, NUTS, Predictive
 from numpyro.infer.autoguide import AutoDelta
+from numpyro.infer.svi import SVIRunResult
+from numpyro.infer.util import constrain_fn, potential_energy
+from numpyro.diagnostics import split_gelman_rubin
+from numpyro import distributions as dist
+from numpyro.distributions import constraints
+from numpyro.distributions.transforms import biject_to
+import numpy as np
 import jax
+import jax.numpy as jnp
+from jax import lax
+from jax.flatten_util import ravel_pytree
+
+from prophetverse.utils.compilation_cache import enable_compilation_cache
+from prophetverse.utils.memory import cast_floats, nbytes
+from prophetverse.utils.optimize import minimize_lbfgs
+from prophetverse.utils.telemetry import (
+    CompilationTimer,
+    InferenceTelemetry,
+    downsample,
+    per_second,
+)
 
 
 class InferenceEngine:
@@ -13,18 +38,65 @@ class InferenceEngine:
         model (Callable): The model to be used for inference.
         rng_key (Optional[jax.random.PRNGKey]): The random number generator key. 
             If not provided, a default key with value 0 will be used.
+        predict_batch_size (Optional[int]): If set, predictive samples are generated in batches
+            of this number of samples, which bounds the memory used at predict time.
+        predict_memory_limit (Optional[int]): If set and `predict_batch_size` is not, the batch size
+            is chosen so that the predictive sites of one batch take at most this number of bytes.
+        compilation_cache_dir (Optional[str]): If set, JAX's persistent compilation cache is enabled
+            in this directory when `infer` is called, so that later processes fitting or predicting
+            with the same model structure and data shapes load the compiled functions instead of
+            compiling them again. The arrays of the model arguments, including those nested in
+            pytrees such as the `jax.tree_util.Partial` holding the data-dependent trend priors of
+            the forecasters, are inputs of the compiled functions, so they can change between runs.
+            Other arguments, such as Python numbers and effects, are compiled as constants, and
+            a new value misses the cache. Note that this updates JAX's configuration for the
+            whole process, not only for this engine: the cache directory is replaced, the minimum
+            compile time of cached executables is set to 0, and the cache stays enabled after
+            `infer` returns.
+        max_predict_samples (Optional[int]): If set, at most this number of posterior samples,
+            evenly spaced, are used at predict time, and point estimates give at most this number
+            of predictive samples.
+        storage_dtype (Optional[str]): If set, for instance "float32" or "bfloat16", the posterior
+            and predictive samples are stored with this floating point dtype, which reduces the
+            memory of a fitted engine at the cost of precision. Computations are not affected.
 
     Attributes:
         model (Callable): The model used for inference.
         rng_key (jax.random.PRNGKey): The random number generator key.
+        point_estimate (bool): Whether the engine yields a single parameter value, in which
+            case point forecasts can be obtained with `predict_point` instead of sampling.
+        telemetry_ (InferenceTelemetry): Timings and diagnostics of the last `infer` call.
 
     """
 
-    def __init__(self, model: Callable, rng_key=None):
+    point_estimate = False
+
+    def __init__(
+        self,
+        model: Callable,
+        rng_key=None,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+    ):
         self.model = model
         if rng_key is None:
             rng_key = jax.random.PRNGKey(0)
         self.rng_key = rng_key
+        self.predict_batch_size = predict_batch_size
+        self.predict_memory_limit = predict_memory_limit
+        self.compilation_cache_dir = compilation_cache_dir
+        self.max_predict_samples = max_predict_samples
+        self.storage_dtype = storage_dtype
+        self._compiled_cache = {}
+
+    def __getstate__(self):
+        # Compiled functions are not picklable, and are rebuilt on demand
+        state = self.__dict__.copy()
+        state["_compiled_cache"] = {}
+        return state
 
     def infer(self, **kwargs): 
         """Performs inference using the specified model.
@@ -38,10 +110,14 @@ class InferenceEngine:
         """
         ...
 
-    def predict(self, **kwargs): 
+    def predict(self, return_sites=None, mean=False, **kwargs): 
         """Generates predictions using the specified model.
 
         Args:
+            return_sites (Optional[Sequence[str]]): Names of the sites to return, for instance
+                `("obs",)`. Defaults to None, for all sample and deterministic sites.
+            mean (bool): If True, only the mean over the samples is returned, with a leading
+                axis of size 1, without holding all the samples in memory. Defaults to False.
             **kwargs: Additional keyword arguments to be passed to the model.
 
         Returns:
@@ -50,6 +126,266 @@ class InferenceEngine:
         """
         ...
 
+    def get_latent_samples(self):
+        """Get the posterior samples of the latent sites, without the deterministic sites.
+
+        Returns:
+            dict: The posterior samples needed to generate predictions.
+
+        """
+        return self.posterior_samples_
+
+    def get_warm_start_kwargs(self):
+        """Get the keyword arguments that initialize a new engine from this fitted one.
+
+        Returns:
+            dict: Keyword arguments accepted by the engine constructor.
+
+        """
+        ...
+
+    def get_nbytes(self, seen=None):
+        """Get the number of bytes held by the arrays of the engine.
+
+        This covers the posterior and predictive samples, the fitted parameters and the
+        other fitted arrays, but not the compiled functions.
+
+        Args:
+            seen (Optional[set]): Ids of the arrays already counted, see `prophetverse.utils.memory.nbytes`.
+
+        Returns:
+            int: The number of bytes.
+
+        """
+        values = {
+            name: value
+            for name, value in vars(self).items()
+            if name not in ("model", "_compiled_cache")
+        }
+        return nbytes(values, seen)
+
+    def _prepare_compilation(self):
+        """
+        Clear the compiled functions of a previous `infer` call, and enable the persistent
+        compilation cache if `compilation_cache_dir` is set (see `enable_compilation_cache`).
+        """
+        self._compiled_cache = {}
+        if self.compilation_cache_dir is not None:
+            enable_compilation_cache(self.compilation_cache_dir)
+
+    def _store(self, samples):
+        """Cast samples to `storage_dtype`, if set."""
+        return cast_floats(samples, self.storage_dtype)
+
+    def _get_num_predict_samples(self, num_samples):
+        """Get the number of samples generated at predict time, capped by `max_predict_samples`."""
+        if self.max_predict_samples is None:
+            return num_samples
+        return min(num_samples, self.max_predict_samples)
+
+    def _select_predict_samples(self, posterior_samples):
+        """Keep at most `max_predict_samples` evenly spaced posterior samples."""
+        num_samples = jax.tree_util.tree_leaves(posterior_samples)[0].shape[0]
+        num_predict_samples = self._get_num_predict_samples(num_samples)
+        if num_predict_samples == num_samples:
+            return posterior_samples
+        indices = np.linspace(0, num_samples - 1, num_predict_samples).round().astype(int)
+        return jax.tree_util.tree_map(lambda x: x[indices], posterior_samples)
+
+    def _call_compiled(self, fn, args, static_args=(), **kwargs):
+        """
+        Call `fn(*args, *static_args, **kwargs)` through a jitted function cached on the engine.
+
+        `args` and the array keyword arguments are inputs of the compiled function. `static_args`
+        and the remaining keyword arguments are closed over. The cache key is made of `fn`, the
+        static arguments and the shapes and dtypes of the inputs, so repeated calls with inputs of
+        the same shape reuse the compiled function instead of tracing the model again.
+
+        Args:
+            fn (Callable): The function to compile.
+            args (tuple): Positional array arguments (pytrees of arrays).
+            static_args (tuple): Hashable positional arguments passed after `args`.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            The output of `fn`.
+        """
+        dynamic_kwargs, static_kwargs = _split_static_kwargs(kwargs)
+        key = (
+            fn,
+            static_args,
+            _static_key(static_kwargs),
+            _shapes_key((args, dynamic_kwargs)),
+        )
+        if key not in self._compiled_cache:
+
+            def compiled_fn(args, dynamic_kwargs):
+                return fn(*args, *static_args, **_merge_kwargs(static_kwargs, dynamic_kwargs))
+
+            # Static arguments are kept alive with the compiled function, since
+            # the key may hold their ids
+            self._compiled_cache[key] = (jax.jit(compiled_fn), static_kwargs)
+
+        compiled_fn, _ = self._compiled_cache[key]
+        return compiled_fn(args, dynamic_kwargs)
+
+    def _predict_from_posterior_samples(
+        self, *, posterior_samples=None, return_sites=None, mean=False, **kwargs
+    ):
+        """
+        Generate predictive samples, one for each posterior sample.
+
+        Args:
+            posterior_samples (Optional[dict]): The posterior samples, `posterior_samples_` if None.
+            return_sites (Optional[Sequence[str]]): Names of the sites to return. Defaults to None,
+                for the posterior sites and "obs".
+            mean (bool): Whether only the mean over the samples is returned, see `_predict_in_batches`.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples, or their mean.
+        """
+        if posterior_samples is None:
+            posterior_samples = self.posterior_samples_
+        if return_sites is None:
+            sites = tuple(sorted(set(posterior_samples.keys()).union(["obs"])))
+        else:
+            sites = tuple(return_sites)
+        all_posterior_samples = self._select_predict_samples(posterior_samples)
+
+        def get_batch_call(rng_key, start, stop):
+            posterior_samples = jax.tree_util.tree_map(
+                lambda x: x[start:stop], all_posterior_samples
+            )
+            return self._posterior_predictive, (rng_key, posterior_samples), (sites,)
+
+        num_samples = jax.tree_util.tree_leaves(all_posterior_samples)[0].shape[0]
+        return self._predict_in_batches(get_batch_call, num_samples, mean=mean, **kwargs)
+
+    def get_predict_function(self, return_sites=None):
+        """
+        Get a pure function generating predictive samples from the fitted parameters.
+
+        The fitted parameters are closed over, so that the function can be traced as a whole,
+        for instance to export it with `jax.export`.
+
+        Args:
+            return_sites (Optional[Sequence[str]]): Names of the sites to return. Defaults to None,
+                for the posterior sites and "obs".
+
+        Returns:
+            Callable: Function `(rng_key, **kwargs) -> dict` returning the predictive sites, one
+            sample for each sample in `posterior_samples_`, or for at most `max_predict_samples`.
+        """
+        if return_sites is None:
+            sites = tuple(sorted(set(self.posterior_samples_.keys()).union(["obs"])))
+        else:
+            sites = tuple(return_sites)
+        posterior_samples = self._select_predict_samples(self.posterior_samples_)
+        return functools.partial(
+            self._posterior_predictive,
+            posterior_samples=posterior_samples,
+            return_sites=sites,
+        )
+
+    def _posterior_predictive(self, rng_key, posterior_samples, return_sites, **kwargs):
+        predictive = Predictive(
+            self.model, posterior_samples, return_sites=list(return_sites)
+        )
+        return predictive(rng_key, **kwargs)
+
+    def _predict_in_batches(self, get_batch_call, num_samples, mean=False, **kwargs):
+        """
+        Generate predictive samples, in batches if a batch size or memory limit is set.
+
+        Each batch is moved to host memory, into arrays allocated once for all the samples,
+        before the next one is generated, so that the device only holds the sites of one batch
+        at a time and the host does not hold a copy of the batches. With `mean`, the sum over
+        the samples is accumulated batch by batch instead, so that the samples are never all
+        held in memory. The sites are cast to `storage_dtype`, if set.
+
+        Args:
+            get_batch_call (Callable): Function `(rng_key, start, stop) -> (fn, args, static_args)`
+                such that `fn(*args, *static_args, **kwargs)` returns the predictive sites for
+                samples `start` to `stop`. It is called through `_call_compiled`.
+            num_samples (int): Total number of samples.
+            mean (bool): Whether only the mean over the samples is returned, with a leading
+                axis of size 1. Defaults to False.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples, or their mean.
+        """
+
+        def predict_batch(rng_key, start, stop):
+            samples = self._call_compiled(*get_batch_call(rng_key, start, stop), **kwargs)
+            if mean:
+                return {
+                    site: jnp.sum(
+                        value, axis=0, keepdims=True, dtype=jnp.result_type(value, float)
+                    )
+                    for site, value in samples.items()
+                }
+            return samples
+
+        batch_size = self._get_predict_batch_size(get_batch_call, num_samples, **kwargs)
+        if batch_size >= num_samples:
+            out = predict_batch(self.rng_key, 0, num_samples)
+            if mean:
+                out = {site: value / num_samples for site, value in out.items()}
+            return self._store(out)
+
+        starts = range(0, num_samples, batch_size)
+        rng_keys = jax.random.split(self.rng_key, len(starts))
+        out = None
+        for rng_key, start in zip(rng_keys, starts):
+            stop = min(start + batch_size, num_samples)
+            batch = jax.device_get(predict_batch(rng_key, start, stop))
+            if mean:
+                out = batch if out is None else {site: out[site] + batch[site] for site in out}
+                continue
+            batch = self._store(batch)
+            if out is None:
+                out = {
+                    site: np.empty((num_samples,) + value.shape[1:], dtype=value.dtype)
+                    for site, value in batch.items()
+                }
+            for site, value in batch.items():
+                out[site][start:stop] = value
+
+        if mean:
+            out = self._store({site: value / num_samples for site, value in out.items()})
+        return out
+
+    def _get_predict_batch_size(self, get_batch_call, num_samples, **kwargs):
+        """
+        Get the number of samples generated per batch at predict time.
+
+        When only a memory limit is set, the size of the predictive sites of a single sample
+        is obtained by abstract evaluation (no computation or compilation is done).
+
+        Args:
+            get_batch_call (Callable): Function returning the predictive call of a batch, see
+                `_predict_in_batches`.
+            num_samples (int): Total number of samples.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            int: The batch size.
+        """
+        if self.predict_batch_size is not None:
+            return self.predict_batch_size
+        if self.predict_memory_limit is None:
+            return num_samples
+
+        fn, args, static_args = get_batch_call(self.rng_key, 0, 1)
+        shapes = jax.eval_shape(lambda args: fn(*args, *static_args, **kwargs), args)
+        bytes_per_sample = sum(
+            np.prod(shape.shape) * shape.dtype.itemsize
+            for shape in jax.tree_util.tree_leaves(shapes)
+        )
+        return max(1, int(self.predict_memory_limit // max(bytes_per_sample, 1)))
+
 
 class MAPInferenceEngine(InferenceEngine):
     """
@@ -63,20 +399,99 @@ class MAPInferenceEngine(InferenceEngine):
         optimizer (numpyro.optim._NumPyroOptim, optional): The optimizer to use for SVI. Defaults to None.
         num_steps (int, optional): The number of optimization steps to perform. Defaults to 10000.
         rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        convergence_tol (float, optional): If set, optimization stops once the relative improvement
+            of the mean loss between two consecutive chunks of `check_every` steps falls below this value.
+            Defaults to None.
+        patience (int, optional): If set, optimization stops once the best loss has not improved for
+            this number of steps. Defaults to None.
+        check_every (int, optional): Number of steps run inside each compiled chunk between two
+            convergence checks. Only used if `convergence_tol` or `patience` is set. Defaults to 1000.
+        predict_batch_size (int, optional): Number of predictive samples generated per batch. Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        compilation_cache_dir (str, optional): See `InferenceEngine`. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+        init_values (dict, optional): Initial values of the latent sites, for instance the parameters
+            of a previous fit. Sites missing from it, or whose shape changed, start from their prior
+            mean. Defaults to None.
+        num_starts (int, optional): Number of optimizations run in parallel from different initial
+            values. The first one starts from `init_values` (or the prior mean), the others from values
+            drawn around it, and the parameters with the lowest final loss are kept. Defaults to 1.
+        start_scale (float, optional): Scale of the perturbation of the additional starts. Each one
+            starts, in unconstrained space, at `mean + start_scale * (prior_draw - mean)`, so 1.0 draws
+            them from the prior and smaller values keep them closer to the mean. Defaults to 1.0.
+        checkpoint_path (str, optional): If set, the SVI state (optimizer state, step, RNG key) and the
+            loss history are saved to this file after every chunk of `check_every` steps. Defaults to None.
+        resume (bool, optional): If True and the file at `checkpoint_path` exists, `infer` continues
+            the optimization from it instead of starting over. Defaults to False.
+        full_loss_kwargs (dict, optional): If set, the model keyword arguments passed to `infer` are
+            updated with these ones to evaluate the full loss after every chunk of `check_every`
+            steps, for instance `{"subsample_size": None}` when the optimized loss is computed on
+            minibatches. The stopping criteria then use the full loss. Defaults to None.
+        time_budget (float, optional): If set, optimization stops at the end of the first chunk of
+            `check_every` steps that ends after this many seconds, compilation included, and the
+            parameters at the end of the chunk with the lowest loss are kept. `num_steps` remains
+            the maximum number of steps. Defaults to None.
+
+    Attributes:
+        stopped_at_step_ (int): The number of optimization steps actually performed.
+        converged_ (bool): Whether one of the stopping criteria was met before `num_steps`.
+        budget_exhausted_ (bool): Whether optimization was stopped by `time_budget`.
+        full_losses_ (np.ndarray): The full loss after every chunk, only set if `full_loss_kwargs` is set.
+        start_losses_ (jnp.ndarray): The final loss of each start, only set if `num_starts > 1`.
+        best_start_ (int): The index of the start whose parameters were kept, only set if `num_starts > 1`.
     """
 
+    point_estimate = True
+
     def __init__(
         self,
         model: Callable,
         optimizer: numpyro.optim._NumPyroOptim = None,
         num_steps=10000,
         rng_key=None,
+        convergence_tol=None,
+        patience=None,
+        check_every=1000,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        num_starts=1,
+        start_scale=1.0,
+        init_values=None,
+        checkpoint_path=None,
+        resume=False,
+        full_loss_kwargs=None,
+        time_budget=None,
     ):
         if optimizer is None:
             optimizer = numpyro.optim.Adam(step_size=0.001)
+        if num_starts < 1:
+            raise ValueError(f"num_starts must be a positive integer, got {num_starts}")
         self.optimizer = optimizer
         self.num_steps = num_steps
-        super().__init__(model, rng_key)
+        self.convergence_tol = convergence_tol
+        self.patience = patience
+        self.check_every = check_every
+        self.num_starts = num_starts
+        self.start_scale = start_scale
+        self.init_values = init_values
+        self.checkpoint_path = checkpoint_path
+        self.resume = resume
+        self.full_loss_kwargs = full_loss_kwargs
+        self.time_budget = time_budget
+        super().__init__(
+            model,
+            rng_key,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+        )
 
     def infer(self, **kwargs):
         """
@@ -88,112 +503,2169 @@ class MAPInferenceEngine(InferenceEngine):
         Returns:
             self: The updated MAPInferenceEngine object.
         """
-        self.guide_ = AutoDelta(self.model, init_loc_fn=init_to_mean())
-        self.svi_ = SVI(self.model, self.guide_, self.optimizer, loss=Trace_ELBO())
-        self.run_results_ = self.svi_.run(
-            rng_key=self.rng_key, num_steps=self.num_steps, **kwargs
+        self._prepare_compilation()
+        self.guide_ = self._get_guide()
+        self.svi_ = SVI(self.model, self.guide_, self.optimizer, loss=self._get_loss())
+        with CompilationTimer() as timer:
+            if (
+                self.convergence_tol is None
+                and self.patience is None
+                and self.num_starts == 1
+                and self.checkpoint_path is None
+                and self.full_loss_kwargs is None
+                and self.time_budget is None
+                and self.compilation_cache_dir is None
+                and not _is_distributed(kwargs)
+            ):
+                self.run_results_ = self.svi_.run(
+                    rng_key=self.rng_key, num_steps=self.num_steps, **kwargs
+                )
+                self.stopped_at_step_ = self.num_steps
+                self.converged_ = False
+                self.budget_exhausted_ = False
+                dynamic_kwargs, static_kwargs = _split_static_kwargs(kwargs)
+                grad_norm_fn = _get_grad_norm_fn(self.svi_, static_kwargs)
+                grad_norms = [
+                    grad_norm_fn(self.svi_.init(self.rng_key, **kwargs), dynamic_kwargs),
+                    grad_norm_fn(self.run_results_.state, dynamic_kwargs),
+                ]
+            else:
+                self.run_results_, grad_norms = self._run_in_chunks(**kwargs)
+            jax.block_until_ready(self.run_results_)
+
+        self.telemetry_ = InferenceTelemetry(
+            compile_time=timer.compile_time,
+            run_time=timer.run_time,
+            num_steps=self.stopped_at_step_,
+            steps_per_second=per_second(self.stopped_at_step_, timer.run_time),
+            losses=downsample(self.run_results_.losses),
+            grad_norm=_summarize_grad_norms(grad_norms),
+            cache_hits=timer.cache_hits,
+            cache_misses=timer.cache_misses,
+            converged=self.converged_,
+            budget_exhausted=self.budget_exhausted_,
         )
-        self.posterior_samples_ = self.guide_.sample_posterior(self.rng_key, params=self.run_results_.params, **kwargs)
+        self.posterior_samples_ = self._store(self._sample_posterior(**kwargs))
         return self
 
-    def predict(self, **kwargs):
+    def _sample_posterior(self, **kwargs):
+        """
+        Sample the posterior from the optimized guide.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, jnp.ndarray]: The posterior samples.
+        """
+        return self.guide_.sample_posterior(
+            self.rng_key, params=self.run_results_.params, **kwargs
+        )
+
+    def _get_guide(self):
+        """
+        Get the guide whose parameters are optimized.
+
+        Returns:
+            AutoGuide: An AutoDelta guide, initialized to `init_values` or the prior mean.
+        """
+        return AutoDelta(
+            self.model, init_loc_fn=_init_to_value_or_mean(values=self.init_values)
+        )
+
+    def _get_loss(self):
+        """
+        Get the loss minimized by SVI.
+
+        Returns:
+            Trace_ELBO: The ELBO, which for an AutoDelta guide is the negative log-joint.
+        """
+        return Trace_ELBO()
+
+    def _run_in_chunks(self, **kwargs):
+        """
+        Run SVI in compiled chunks of `check_every` steps, checking the stopping criteria between chunks.
+
+        With several starts, the SVI update is vectorized over the starts, and the stopping criteria
+        are evaluated on the best start. Without stopping criteria, time budget, checkpoints and full
+        loss evaluations, all steps run in a single chunk. If `checkpoint_path` is set, the state of the loop is saved after every chunk,
+        and restored from there at the beginning if `resume` is set.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Tuple[SVIRunResult, List[jnp.ndarray]]: The parameters, the final SVI state and the losses
+            of the performed steps, and the gradient norms at the start and after every chunk.
+        """
+        start_time = time.perf_counter()
+        dynamic_kwargs, static_kwargs = _split_static_kwargs(kwargs)
+        svi_state = self.svi_.init(self.rng_key, **kwargs)
+        vectorized = self.num_starts > 1
+        if vectorized:
+            svi_state = self._init_starts(svi_state, **kwargs)
+        check_every = self.check_every
+        if (
+            self.convergence_tol is None
+            and self.patience is None
+            and self.checkpoint_path is None
+            and self.full_loss_kwargs is None
+            and self.time_budget is None
+        ):
+            check_every = self.num_steps
+        full_loss_fn = None
+        if self.full_loss_kwargs is not None:
+            full_dynamic_kwargs, full_static_kwargs = _split_static_kwargs(
+                {**kwargs, **self.full_loss_kwargs}
+            )
+            full_loss_fn = _get_loss_fn(self.svi_, full_static_kwargs, vectorized=vectorized)
+
+        chunk_fns = {}
+        losses = []
+        full_losses = []
+        step = 0
+        previous_loss = None
+        best_loss, best_step = np.inf, 0
+        # State at the end of the chunk with the lowest loss, kept when the time budget is set
+        best_state, best_state_losses = None, None
+        self.converged_ = False
+        self.budget_exhausted_ = False
+        if self.resume and self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            checkpoint = _load_checkpoint(self.checkpoint_path, svi_state)
+            svi_state = checkpoint["svi_state"]
+            losses = [checkpoint["losses"]]
+            full_losses = list(checkpoint.get("full_losses", []))
+            step = checkpoint["step"]
+            previous_loss = checkpoint["previous_loss"]
+            best_loss, best_step = checkpoint["best_loss"], checkpoint["best_step"]
+            self.converged_ = checkpoint["converged"]
+
+        grad_norm_fn = _get_grad_norm_fn(self.svi_, static_kwargs, vectorized=vectorized)
+        grad_norms = [grad_norm_fn(svi_state, dynamic_kwargs)]
+        while step < self.num_steps and not self.converged_ and not self.budget_exhausted_:
+            num_steps = min(check_every, self.num_steps - step)
+            if num_steps not in chunk_fns:
+                chunk_fns[num_steps] = _get_svi_chunk_fn(
+                    self.svi_, static_kwargs, num_steps, vectorized=vectorized
+                )
+            svi_state, chunk_losses = chunk_fns[num_steps](svi_state, dynamic_kwargs)
+            losses.append(chunk_losses)
+            grad_norms.append(grad_norm_fn(svi_state, dynamic_kwargs))
+            step += num_steps
+
+            if full_loss_fn is not None:
+                full_losses.append(np.asarray(full_loss_fn(svi_state, full_dynamic_kwargs)))
+                chunk_loss = float(np.nanmin(full_losses[-1]))
+            else:
+                chunk_loss = float(jnp.nanmin(jnp.mean(chunk_losses, axis=0)))
+            if chunk_loss < best_loss:
+                best_loss, best_step = chunk_loss, step
+            if self.convergence_tol is not None and previous_loss is not None:
+                relative_improvement = (previous_loss - chunk_loss) / max(abs(previous_loss), 1e-12)
+                if relative_improvement < self.convergence_tol:
+                    self.converged_ = True
+            if self.patience is not None and step - best_step >= self.patience:
+                self.converged_ = True
+            previous_loss = chunk_loss
+
+            if self.time_budget is not None:
+                state_losses = full_losses[-1] if full_loss_fn is not None else chunk_losses[-1]
+                if best_state is None or np.nanmin(state_losses) < np.nanmin(best_state_losses):
+                    best_state, best_state_losses = svi_state, state_losses
+                if time.perf_counter() - start_time >= self.time_budget:
+                    self.budget_exhausted_ = True
+
+            if self.checkpoint_path is not None:
+                losses = [jnp.concatenate(losses)]
+                _save_checkpoint(
+                    self.checkpoint_path,
+                    {
+                        "svi_state": svi_state,
+                        "losses": losses[0],
+                        "full_losses": full_losses,
+                        "step": step,
+                        "previous_loss": previous_loss,
+                        "best_loss": best_loss,
+                        "best_step": best_step,
+                        "converged": self.converged_,
+                    },
+                )
+
+        self.stopped_at_step_ = step
+        losses = jnp.concatenate(losses)
+        if full_loss_fn is not None:
+            self.full_losses_ = np.array(full_losses)
+        final_losses = losses[-1]
+        if best_state is not None:
+            svi_state, final_losses = best_state, jnp.asarray(best_state_losses)
+        if vectorized:
+            self.start_losses_ = final_losses
+            self.best_start_ = int(jnp.nanargmin(self.start_losses_))
+            svi_state = jax.tree_util.tree_map(lambda x: x[self.best_start_], svi_state)
+            losses = losses[:, self.best_start_]
+            grad_norms = [grad_norm[self.best_start_] for grad_norm in grad_norms]
+            if full_loss_fn is not None:
+                self.full_losses_ = self.full_losses_[:, self.best_start_]
+        return (
+            SVIRunResult(self.svi_.get_params(svi_state), svi_state, losses),
+            grad_norms,
+        )
+
+    def _init_starts(self, svi_state, **kwargs):
+        """
+        Stack the SVI states of the `num_starts` starts along a leading axis.
+
+        The first start keeps the initial state. The others move the unconstrained guide parameters
+        toward draws from the prior, by a factor `start_scale`.
+
+        Args:
+            svi_state (SVIState): The initial SVI state.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            SVIState: The stacked SVI states.
+        """
+        latent_sites = {
+            name: site
+            for name, site in self.guide_.prototype_trace.items()
+            if site["type"] == "sample" and not site["is_observed"]
+        }
+        rng_key_prior, rng_key_states = jax.random.split(svi_state.rng_key)
+        prior_samples = Predictive(
+            self.model,
+            num_samples=self.num_starts - 1,
+            return_sites=list(latent_sites),
+        )(rng_key_prior, **kwargs)
+
+        params = self.svi_.optim.get_params(svi_state.optim_state)
+        states = [svi_state]
+        for i in range(self.num_starts - 1):
+            start_params = dict(params)
+            for name, site in latent_sites.items():
+                param_name = "{}_{}_loc".format(name, self.guide_.prefix)
+                prior_value = biject_to(site["fn"].support).inv(prior_samples[name][i])
+                start_params[param_name] = params[param_name] + self.start_scale * (
+                    prior_value - params[param_name]
+                )
+            states.append(
+                svi_state._replace(optim_state=self.svi_.optim.init(start_params))
+            )
+
+        rng_keys = jax.random.split(rng_key_states, self.num_starts)
+        states = [
+            state._replace(rng_key=rng_key) for state, rng_key in zip(states, rng_keys)
+        ]
+        return jax.tree_util.tree_map(lambda *x: jnp.stack(x), *states)
+
+    def get_warm_start_kwargs(self):
+        """
+        Get the keyword arguments that initialize a new engine from this fitted one.
+
+        Returns:
+            dict: The MAP values of the latent sites, as `init_values`.
+        """
+        return {"init_values": self.guide_.median(self.run_results_.params)}
+
+    def predict(self, return_sites=None, mean=False, **kwargs):
         """
         Generate predictions using the trained model.
 
         Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for all sample and deterministic sites.
+            mean (bool, optional): If True, only the mean over the samples is returned, with a
+                leading axis of size 1. It is accumulated batch by batch, so that the samples are
+                never all held in memory, and `samples_` is left unchanged. Defaults to False.
             **kwargs: Additional keyword arguments to be passed to the model.
 
         Returns:
             self.samples_: The predicted samples generated by the model.
         """
+        if return_sites is not None:
+            return_sites = tuple(return_sites)
+
+        def get_batch_call(rng_key, start, stop):
+            return (
+                self._predictive,
+                (rng_key, self.run_results_.params),
+                (stop - start, return_sites),
+            )
+
+        samples = self._predict_in_batches(
+            get_batch_call, self._get_num_predict_samples(1000), mean=mean, **kwargs
+        )
+        if not mean:
+            self.samples_ = samples
+        return samples
+
+    def _predictive(self, rng_key, params, num_samples, return_sites=None, **kwargs):
         predictive = numpyro.infer.Predictive(
             self.model,
-            params=self.run_results_.params,
+            params=params,
             guide=self.guide_,
-            #posterior_samples=self.posterior_samples_,
-            num_samples=1000,
+            num_samples=num_samples,
+            return_sites=None if return_sites is None else list(return_sites),
         )
-        self.samples_ = predictive(
-            rng_key=self.rng_key,
-            **kwargs
+        return predictive(rng_key=rng_key, **kwargs)
+
+    def predict_point(self, return_sites=None, **kwargs):
+        """
+        Evaluate the model once at the MAP parameters.
+
+        The observation noise is not sampled: the "obs" site holds the mean of the
+        observation distribution. Deterministic sites are returned as well. All sites
+        have a leading axis of size 1, so that the output has the same layout as `predict`.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for "obs" and the deterministic sites.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, jnp.ndarray]: The mean of the observation site and the deterministic sites.
+        """
+        return self._call_compiled(
+            self._point_predictive,
+            (self.rng_key, self.run_results_.params),
+            (None if return_sites is None else tuple(return_sites),),
+            **kwargs,
         )
-        return self.samples_
 
+    def get_predict_function(self, return_sites=None):
+        """
+        Get a pure function evaluating the model at the fitted parameters.
 
-class MCMCInferenceEngine(InferenceEngine):
+        Point estimates are evaluated as in `predict_point`, other fits (see `VIInferenceEngine`)
+        are sampled from their posterior samples.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for all sites.
+
+        Returns:
+            Callable: Function `(rng_key, **kwargs) -> dict` returning the predictive sites.
+        """
+        if not self.point_estimate:
+            return super().get_predict_function(return_sites)
+        return functools.partial(
+            self._point_predictive,
+            params=self.run_results_.params,
+            return_sites=return_sites,
+        )
+
+    def _point_predictive(self, rng_key, params, return_sites=None, **kwargs):
+        return _evaluate_model_at(
+            self.model, rng_key, self.guide_.median(params), return_sites, **kwargs
+        )
+
+
+class LBFGSInferenceEngine(MAPInferenceEngine):
     """
-    MCMCInferenceEngine is a class that performs MCMC (Markov Chain Monte Carlo) inference
-    for a given model.
+    Maximum a Posteriori (MAP) Inference Engine using L-BFGS.
+
+    The unconstrained parameters of an AutoDelta guide are optimized with a jitted quasi-Newton
+    (L-BFGS) method, see `prophetverse.utils.optimize.minimize_lbfgs`, instead of first-order SVI updates. Since the MAP objective is smooth and
+    low-dimensional, it usually converges in a few hundred iterations. The fitted engine has the
+    same attributes as `MAPInferenceEngine`, so prediction works the same way.
 
     Args:
-        model (Callable): The model function to perform inference on.
-        num_samples (int): The number of MCMC samples to draw.
-        num_warmup (int): The number of warmup samples to discard.
-        num_chains (int): The number of MCMC chains to run in parallel.
-        dense_mass (bool): Whether to use dense mass matrix for NUTS sampler.
-        rng_key (Optional): The random number generator key.
+        model (Callable): The probabilistic model to perform inference on.
+        num_steps (int, optional): The maximum number of L-BFGS iterations. Defaults to 1000.
+        tol (float, optional): The optimization stops when the infinity norm of the gradient falls
+            below this value. Defaults to 1e-5.
+        history_size (int, optional): The number of past updates used to approximate the inverse
+            Hessian. Defaults to 10.
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        predict_batch_size (int, optional): Number of predictive samples generated per batch. Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        compilation_cache_dir (str, optional): See `InferenceEngine`. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+        init_values (dict, optional): Initial values of the latent sites. Sites missing from it, or
+            whose shape changed, start from their prior mean. Defaults to None.
 
     Attributes:
-        num_samples (int): The number of MCMC samples to draw.
-        num_warmup (int): The number of warmup samples to discard.
-        num_chains (int): The number of MCMC chains to run in parallel.
-        dense_mass (bool): Whether to use dense mass matrix for NUTS sampler.
-        mcmc_ (MCMC): The MCMC object used for inference.
-        posterior_samples_ (Dict[str, np.ndarray]): The posterior samples obtained from MCMC.
-        samples_predictive_ (Dict[str, np.ndarray]): The predictive samples obtained from MCMC.
-        samples_ (Dict[str, np.ndarray]): The MCMC samples obtained from MCMC.
-
+        stopped_at_step_ (int): The number of L-BFGS iterations performed.
+        converged_ (bool): Whether the gradient tolerance was reached.
     """
 
     def __init__(
         self,
         model: Callable,
-        num_samples=1000,
-        num_warmup=200,
-        num_chains=1,
-        dense_mass=False,
+        num_steps=1000,
+        tol=1e-5,
+        history_size=10,
         rng_key=None,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        init_values=None,
     ):
-        self.num_samples = num_samples
-        self.num_warmup = num_warmup
-        self.num_chains = num_chains
-        self.dense_mass = dense_mass
-        super().__init__(model, rng_key)
+        self.tol = tol
+        self.history_size = history_size
+        super().__init__(
+            model,
+            num_steps=num_steps,
+            rng_key=rng_key,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+            init_values=init_values,
+        )
 
     def infer(self, **kwargs):
         """
-        Run MCMC inference.
+        Perform MAP inference with L-BFGS.
 
         Args:
-            **kwargs: Additional keyword arguments to be passed to the MCMC run method.
+            **kwargs: Additional keyword arguments to be passed to the model.
 
         Returns:
-            self: The MCMCInferenceEngine object.
-
+            self: The updated LBFGSInferenceEngine object.
         """
-        self.mcmc_ = MCMC(
-            NUTS(self.model, dense_mass=self.dense_mass, init_strategy=init_to_mean()),
-            num_samples=self.num_samples,
-            num_warmup=self.num_warmup,
+        self._prepare_compilation()
+        self.guide_ = self._get_guide()
+        # SVI is only used to initialize, constrain and evaluate the guide parameters
+        self.svi_ = SVI(self.model, self.guide_, self.optimizer, loss=Trace_ELBO())
+        svi_state = self.svi_.init(self.rng_key, **kwargs)
+
+        flat_params, unravel_fn = ravel_pytree(
+            self.svi_.optim.get_params(svi_state.optim_state)
+        )
+        dynamic_kwargs, static_kwargs = _split_static_kwargs(kwargs)
+
+        def loss_fn(flat_params, dynamic_kwargs):
+            params = self.svi_.constrain_fn(unravel_fn(flat_params))
+            return self.svi_.loss.loss(
+                self.rng_key,
+                params,
+                self.model,
+                self.guide_,
+                **_merge_kwargs(static_kwargs, dynamic_kwargs),
+            )
+
+        @jax.jit
+        def minimize(flat_params, dynamic_kwargs):
+            initial_grad = jax.grad(loss_fn)(flat_params, dynamic_kwargs)
+            result = minimize_lbfgs(
+                lambda x: loss_fn(x, dynamic_kwargs),
+                flat_params,
+                maxiter=self.num_steps,
+                tol=self.tol,
+                history_size=self.history_size,
+            )
+            return result, jnp.linalg.norm(initial_grad)
+
+        with CompilationTimer() as timer:
+            result, initial_grad_norm = minimize(flat_params, dynamic_kwargs)
+            jax.block_until_ready(result)
+
+        unconstrained_params = unravel_fn(result.x)
+        svi_state = svi_state._replace(
+            optim_state=self.svi_.optim.init(unconstrained_params)
+        )
+        self.stopped_at_step_ = int(result.num_iter)
+        self.converged_ = bool(result.converged)
+        self.run_results_ = SVIRunResult(
+            self.svi_.constrain_fn(unconstrained_params),
+            svi_state,
+            result.losses[: self.stopped_at_step_],
+        )
+        self.telemetry_ = InferenceTelemetry(
+            compile_time=timer.compile_time,
+            run_time=timer.run_time,
+            num_steps=self.stopped_at_step_,
+            steps_per_second=per_second(self.stopped_at_step_, timer.run_time),
+            losses=downsample(self.run_results_.losses),
+            grad_norm=_summarize_grad_norms(
+                [initial_grad_norm, jnp.linalg.norm(result.grad)]
+            ),
+            cache_hits=timer.cache_hits,
+            cache_misses=timer.cache_misses,
+            converged=self.converged_,
+        )
+        self.posterior_samples_ = self._store(
+            self.guide_.sample_posterior(
+                self.rng_key, params=self.run_results_.params, **kwargs
+            )
         )
-        self.mcmc_.run(self.rng_key, **kwargs)
-        self.posterior_samples_ = self.mcmc_.get_samples()
         return self
 
-    def predict(self, **kwargs):
+
+class VIInferenceEngine(MAPInferenceEngine):
+    """
+    Variational Inference Engine.
+
+    The posterior is approximated by a Gaussian guide in the unconstrained space, whose parameters are
+    fit by maximizing the ELBO with SVI. The optimization options (stopping criteria, checkpoints,
+    warm start) are the same as in `MAPInferenceEngine`.
+
+    Args:
+        model (Callable): The probabilistic model to perform inference on.
+        guide_name (str, optional): The guide to fit, one of "AutoNormal" (mean-field),
+            "AutoLowRankMultivariateNormal", "AutoMultivariateNormal" (full covariance) or
+            "AutoLaplaceApproximation". Defaults to "AutoNormal".
+        guide_rank (int, optional): Rank of the covariance of "AutoLowRankMultivariateNormal". Defaults
+            to None, i.e. the square root of the number of latent parameters.
+        num_particles (int, optional): Number of particles used to estimate the ELBO and its gradient.
+            Defaults to 1.
+        optimizer (numpyro.optim._NumPyroOptim, optional): The optimizer to use for SVI. Defaults to None.
+        num_steps (int, optional): The number of optimization steps to perform. Defaults to 10000.
+        num_samples (int, optional): The number of posterior samples drawn from the fitted guide.
+            Defaults to 1000.
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        convergence_tol (float, optional): See `MAPInferenceEngine`. Defaults to None.
+        patience (int, optional): See `MAPInferenceEngine`. Defaults to None.
+        check_every (int, optional): See `MAPInferenceEngine`. Defaults to 1000.
+        predict_batch_size (int, optional): Number of posterior samples used per predictive batch.
+            Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        compilation_cache_dir (str, optional): See `InferenceEngine`. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+        init_values (dict, optional): Initial values of the guide locations. Defaults to None.
+        checkpoint_path (str, optional): See `MAPInferenceEngine`. Defaults to None.
+        resume (bool, optional): See `MAPInferenceEngine`. Defaults to False.
+        full_loss_kwargs (dict, optional): See `MAPInferenceEngine`. Defaults to None.
+        time_budget (float, optional): See `MAPInferenceEngine`. Defaults to None.
+
+    Attributes:
+        posterior_samples_ (Dict[str, jnp.ndarray]): The samples drawn from the fitted guide.
+    """
+
+    point_estimate = False
+
+    guide_names = (
+        "AutoNormal",
+        "AutoLowRankMultivariateNormal",
+        "AutoMultivariateNormal",
+        "AutoLaplaceApproximation",
+    )
+
+    def __init__(
+        self,
+        model: Callable,
+        guide_name="AutoNormal",
+        guide_rank=None,
+        num_particles=1,
+        optimizer: numpyro.optim._NumPyroOptim = None,
+        num_steps=10000,
+        num_samples=1000,
+        rng_key=None,
+        convergence_tol=None,
+        patience=None,
+        check_every=1000,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        init_values=None,
+        checkpoint_path=None,
+        resume=False,
+        full_loss_kwargs=None,
+        time_budget=None,
+    ):
+        if guide_name not in self.guide_names:
+            raise ValueError(
+                f"guide_name must be one of {self.guide_names}, got {guide_name}"
+            )
+        self.guide_name = guide_name
+        self.guide_rank = guide_rank
+        self.num_particles = num_particles
+        self.num_samples = num_samples
+        super().__init__(
+            model,
+            optimizer=optimizer,
+            num_steps=num_steps,
+            rng_key=rng_key,
+            convergence_tol=convergence_tol,
+            patience=patience,
+            check_every=check_every,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+            init_values=init_values,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            full_loss_kwargs=full_loss_kwargs,
+            time_budget=time_budget,
+        )
+
+    def _sample_posterior(self, **kwargs):
         """
-        Generate predictive samples.
+        Draw `num_samples` posterior samples from the fitted guide.
+
+        For the Laplace approximation, this is where the Hessian is computed. The time spent here is
+        added to the telemetry of the optimization.
 
         Args:
-            **kwargs: Additional keyword arguments to be passed to the Predictive method.
+            **kwargs: Unused, the model arguments are captured by the guide during optimization.
 
         Returns:
-            Dict[str, np.ndarray]: The predictive samples.
+            Dict[str, jnp.ndarray]: The posterior samples, with a leading axis of size `num_samples`.
+        """
+        with CompilationTimer() as timer:
+            posterior_samples = self.guide_.sample_posterior(
+                self.rng_key, self.run_results_.params, sample_shape=(self.num_samples,)
+            )
+            jax.block_until_ready(posterior_samples)
+
+        self.telemetry_ = self.telemetry_._replace(
+            compile_time=self.telemetry_.compile_time + timer.compile_time,
+            run_time=self.telemetry_.run_time + timer.run_time,
+            num_samples=self.num_samples,
+            samples_per_second=per_second(self.num_samples, timer.run_time),
+            cache_hits=_add_counts(self.telemetry_.cache_hits, timer.cache_hits),
+            cache_misses=_add_counts(self.telemetry_.cache_misses, timer.cache_misses),
+        )
+        return posterior_samples
 
+    def _get_guide(self):
         """
-        sites = set(self.posterior_samples_.keys()).union(["obs"])
-        predictive = Predictive(self.model, self.posterior_samples_, return_sites=sites)
+        Get the guide whose parameters are optimized.
 
-        self.samples_predictive_ = predictive(self.rng_key, **kwargs)
+        Returns:
+            AutoGuide: An instance of `guide_name`, centered on `init_values` or the prior mean.
+        """
+        guide_kwargs = {}
+        if self.guide_name == "AutoLowRankMultivariateNormal":
+            guide_kwargs["rank"] = self.guide_rank
+        return getattr(numpyro.infer.autoguide, self.guide_name)(
+            self.model,
+            init_loc_fn=_init_to_value_or_mean(values=self.init_values),
+            **guide_kwargs,
+        )
+
+    def _get_loss(self):
+        """
+        Get the ELBO estimator.
+
+        Returns:
+            Trace_ELBO: The ELBO, estimated with `num_particles` particles.
+        """
+        return Trace_ELBO(num_particles=self.num_particles)
+
+    def predict(self, return_sites=None, mean=False, **kwargs):
+        """
+        Generate predictive samples, one for each posterior sample.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for the posterior sites and "obs".
+            mean (bool, optional): See `MAPInferenceEngine.predict`. Defaults to False.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples.
+        """
+        samples = self._predict_from_posterior_samples(
+            return_sites=return_sites, mean=mean, **kwargs
+        )
+        if not mean:
+            self.samples_ = samples
+        return samples
+
+
+class LaplaceInferenceEngine(VIInferenceEngine):
+    """
+    Laplace approximation Inference Engine.
+
+    The MAP is found with SVI, as in `MAPInferenceEngine`, using an AutoLaplaceApproximation
+    guide. The posterior is then approximated by a multivariate normal distribution in the
+    unconstrained space, centered at the MAP, whose precision matrix is the Hessian of the negative
+    log-joint at the MAP. Posterior samples are drawn from this approximation and transformed back
+    to the constrained space. Since the Hessian is dense, memory grows quadratically with the number
+    of latent parameters.
+
+    Args:
+        model (Callable): The probabilistic model to perform inference on.
+        optimizer (numpyro.optim._NumPyroOptim, optional): The optimizer to use for SVI. Defaults to None.
+        num_steps (int, optional): The number of optimization steps to perform. Defaults to 10000.
+        num_samples (int, optional): The number of posterior samples to draw. Defaults to 1000.
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        convergence_tol (float, optional): See `MAPInferenceEngine`. Defaults to None.
+        patience (int, optional): See `MAPInferenceEngine`. Defaults to None.
+        check_every (int, optional): See `MAPInferenceEngine`. Defaults to 1000.
+        predict_batch_size (int, optional): Number of posterior samples used per predictive batch.
+            Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        compilation_cache_dir (str, optional): See `InferenceEngine`. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+        init_values (dict, optional): Initial values of the latent sites. Defaults to None.
+        checkpoint_path (str, optional): See `MAPInferenceEngine`. Defaults to None.
+        resume (bool, optional): See `MAPInferenceEngine`. Defaults to False.
+        time_budget (float, optional): See `MAPInferenceEngine`. The time spent computing the
+            Hessian afterwards is not part of the budget. Defaults to None.
+
+    Attributes:
+        posterior_samples_ (Dict[str, jnp.ndarray]): The samples drawn from the Laplace approximation.
+    """
+
+    def __init__(
+        self,
+        model: Callable,
+        optimizer: numpyro.optim._NumPyroOptim = None,
+        num_steps=10000,
+        num_samples=1000,
+        rng_key=None,
+        convergence_tol=None,
+        patience=None,
+        check_every=1000,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        init_values=None,
+        checkpoint_path=None,
+        resume=False,
+        time_budget=None,
+    ):
+        super().__init__(
+            model,
+            guide_name="AutoLaplaceApproximation",
+            optimizer=optimizer,
+            num_steps=num_steps,
+            num_samples=num_samples,
+            rng_key=rng_key,
+            convergence_tol=convergence_tol,
+            patience=patience,
+            check_every=check_every,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+            init_values=init_values,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            time_budget=time_budget,
+        )
+
+
+class MCMCInferenceEngine(InferenceEngine):
+    """
+    MCMCInferenceEngine is a class that performs MCMC (Markov Chain Monte Carlo) inference
+    for a given model.
+
+    Args:
+        model (Callable): The model function to perform inference on.
+        num_samples (int): The number of MCMC samples to draw.
+        num_warmup (int): The number of warmup samples to discard.
+        num_chains (int): The number of MCMC chains to run.
+        dense_mass (bool): Whether to use dense mass matrix for NUTS sampler.
+        rng_key (Optional): The random number generator key.
+        chain_method (str): How to run the chains. One of "sequential", "parallel" (one chain per
+            device, see `numpyro.set_host_device_count` to expose several CPU devices) or "vectorized".
+        predict_batch_size (Optional[int]): Number of posterior samples used per predictive batch.
+        predict_memory_limit (Optional[int]): Memory budget, in bytes, used to derive the predictive
+            batch size when `predict_batch_size` is not set.
+        compilation_cache_dir (Optional[str]): See `InferenceEngine`. Note that the data are
+            embedded in the compiled sampler, so the cache is only hit when they do not change.
+        max_predict_samples (Optional[int]): See `InferenceEngine`.
+        storage_dtype (Optional[str]): See `InferenceEngine`. The samples are cast when the
+            sampler maps them to the constrained space, so after fitting, both `posterior_samples_`
+            and the samples kept by `mcmc_` are stored in this dtype.
+        init_values (Optional[dict]): Initial values of the latent sites, for instance the posterior
+            mean of a previous fit. Sites missing from it, or whose shape changed, start from their
+            prior mean.
+        step_size (float): Initial step size of NUTS, adapted during warmup.
+        inverse_mass_matrix (Optional[dict]): Initial inverse mass matrix of NUTS, in the format of
+            `mcmc_.last_state.adapt_state.inverse_mass_matrix`, adapted during warmup.
+        init_steps (Optional[int]): If set, a MAP pre-fit of at most this many L-BFGS iterations is run
+            first, starting from `init_values`, and the chains start around its solution. This places
+            them near the typical set, so that a much shorter warmup suffices. Defaults to None.
+        init_scale (float): Standard deviation, in unconstrained space, of the perturbation applied to
+            the MAP solution to get the initial values of each chain. Only used if `init_steps` is set
+            and there are several chains. Defaults to 0.1.
+        init_mass_matrix (bool): Whether the initial inverse mass matrix is the inverse of the diagonal
+            of the Hessian of the potential energy at the MAP solution, i.e. the posterior variances of
+            a Laplace approximation. Only used if `init_steps` is set and `inverse_mass_matrix` is not.
+            Defaults to False.
+        thinning (int): Only every `thinning`-th sample of each chain is kept, so that each chain
+            contributes `num_samples // thinning` samples. Defaults to 1.
+        exclude_deterministic (bool): Whether the deterministic sites, such as the trend and the
+            effects, are left out of the posterior samples. Each of them holds an array of the size
+            of the data for every draw, so this can save most of the memory of the samples. They
+            are recomputed from the latent samples by `predict`. Defaults to False.
+        time_budget (Optional[float]): If set, samples are drawn after the warmup in blocks of
+            `block_size` iterations, until `num_samples` iterations are done or this many seconds,
+            compilation and warmup included, have elapsed, and the samples drawn so far are kept.
+            At least one block is drawn. Defaults to None.
+        block_size (int): Number of iterations of each chain per block, with `time_budget`. Rounded
+            down to a multiple of `thinning`. Defaults to 100.
+
+    Attributes:
+        num_samples (int): The number of MCMC samples to draw.
+        num_warmup (int): The number of warmup samples to discard.
+        num_chains (int): The number of MCMC chains to run.
+        dense_mass (bool): Whether to use dense mass matrix for NUTS sampler.
+        chain_method (str): How to run the chains.
+        mcmc_ (MCMC): The MCMC object used for inference.
+        posterior_samples_ (Dict[str, np.ndarray]): The posterior samples obtained from MCMC.
+        samples_predictive_ (Dict[str, np.ndarray]): The predictive samples obtained from MCMC.
+        samples_ (Dict[str, np.ndarray]): The MCMC samples obtained from MCMC.
+        init_engine_ (LBFGSInferenceEngine): The MAP pre-fit, only set if `init_steps` is set.
+        deterministic_sites_ (Tuple[str]): Names of the deterministic sites left out of the
+            posterior samples, empty unless `exclude_deterministic` is True.
+        num_draws_ (int): The number of iterations of each chain after the warmup, fewer than
+            `num_samples` if the time budget was exhausted.
+        budget_exhausted_ (bool): Whether sampling was stopped by `time_budget`.
+        max_r_hat_ (Optional[float]): The largest split R-hat of the latent sites, None if each chain
+            has fewer than 4 samples.
+        mcmc_ (MCMC): With `time_budget`, it only holds the samples of the last block.
+
+    """
+
+    def __init__(
+        self,
+        model: Callable,
+        num_samples=1000,
+        num_warmup=200,
+        num_chains=1,
+        dense_mass=False,
+        rng_key=None,
+        chain_method="sequential",
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        init_values=None,
+        step_size=1.0,
+        inverse_mass_matrix=None,
+        init_steps=None,
+        init_scale=0.1,
+        init_mass_matrix=False,
+        thinning=1,
+        exclude_deterministic=False,
+        time_budget=None,
+        block_size=100,
+    ):
+        if chain_method not in ["sequential", "parallel", "vectorized"]:
+            raise ValueError(
+                'chain_method must be one of "sequential", "parallel" or "vectorized".'
+            )
+        self.num_samples = num_samples
+        self.num_warmup = num_warmup
+        self.num_chains = num_chains
+        self.dense_mass = dense_mass
+        self.chain_method = chain_method
+        self.init_values = init_values
+        self.step_size = step_size
+        self.inverse_mass_matrix = inverse_mass_matrix
+        self.init_steps = init_steps
+        self.init_scale = init_scale
+        self.init_mass_matrix = init_mass_matrix
+        self.thinning = thinning
+        self.exclude_deterministic = exclude_deterministic
+        self.time_budget = time_budget
+        self.block_size = block_size
+        super().__init__(
+            model,
+            rng_key,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+        )
+
+    def infer(self, **kwargs):
+        """
+        Run MCMC inference.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the MCMC run method.
+
+        Returns:
+            self: The MCMCInferenceEngine object.
+
+        """
+        self._prepare_compilation()
+        start_time = time.perf_counter()
+        with CompilationTimer() as timer:
+            init_params = None
+            inverse_mass_matrix = self.inverse_mass_matrix
+            if self.init_steps is not None:
+                init_params, map_inverse_mass_matrix = self._pre_fit(**kwargs)
+                if self.init_mass_matrix and inverse_mass_matrix is None:
+                    inverse_mass_matrix = map_inverse_mass_matrix
+
+            postprocess_fn = None
+            if self.exclude_deterministic or self.storage_dtype is not None:
+                # Map the samples to the constrained space, as the default post-processing
+                # does, but without recording the deterministic sites if they are excluded
+                constrain = functools.partial(
+                    constrain_fn,
+                    self.model,
+                    (),
+                    kwargs,
+                    return_deterministic=not self.exclude_deterministic,
+                )
+
+                def postprocess_fn(values):
+                    return self._store(constrain(values))
+
+            self.mcmc_ = MCMC(
+                NUTS(
+                    self.model,
+                    dense_mass=self.dense_mass,
+                    init_strategy=_init_to_value_or_mean(values=self.init_values),
+                    step_size=self.step_size,
+                    inverse_mass_matrix=inverse_mass_matrix,
+                ),
+                num_samples=self._get_block_size(),
+                num_warmup=self.num_warmup,
+                num_chains=self.num_chains,
+                chain_method=self.chain_method,
+                thinning=self.thinning,
+                postprocess_fn=postprocess_fn,
+            )
+            samples, extra_fields = self._run_in_blocks(start_time, init_params, **kwargs)
+            self.posterior_samples_ = jax.tree_util.tree_map(
+                lambda x: x.reshape((-1,) + x.shape[2:]), samples
+            )
+            jax.block_until_ready(self.posterior_samples_)
+
+        self.deterministic_sites_ = ()
+        if self.exclude_deterministic:
+            self.deterministic_sites_ = self._get_deterministic_sites(**kwargs)
+
+        self.max_r_hat_ = _max_split_r_hat(
+            {name: samples[name] for name in self.mcmc_.last_state.z}
+        )
+        extra_fields = jax.device_get(extra_fields)
+        # A NUTS tree of depth d takes between 2^(d-1) and 2^d - 1 leapfrog steps
+        tree_depth = np.floor(np.log2(np.maximum(extra_fields["num_steps"], 1))) + 1
+        num_steps = (self.num_warmup + self.num_draws_) * self.num_chains
+        num_samples = self.num_draws_ * self.num_chains
+        self.telemetry_ = InferenceTelemetry(
+            compile_time=timer.compile_time,
+            run_time=timer.run_time,
+            num_steps=num_steps,
+            steps_per_second=per_second(num_steps, timer.run_time),
+            num_samples=num_samples,
+            samples_per_second=per_second(num_samples, timer.run_time),
+            tree_depth={"mean": float(tree_depth.mean()), "max": int(tree_depth.max())},
+            num_divergences=int(extra_fields["diverging"].sum()),
+            accept_prob=float(extra_fields["accept_prob"].mean()),
+            cache_hits=timer.cache_hits,
+            cache_misses=timer.cache_misses,
+            converged=None if self.max_r_hat_ is None else self.max_r_hat_ < 1.1,
+            budget_exhausted=self.budget_exhausted_ if self.time_budget is not None else None,
+        )
+        return self
+
+    def _get_block_size(self):
+        """
+        Get the number of iterations of each chain per call to the sampler.
+
+        Returns:
+            int: `num_samples`, or with `time_budget`, `block_size` rounded down to a multiple of
+            `thinning` and at most `num_samples`.
+        """
+        if self.time_budget is None:
+            return self.num_samples
+        block_size = max(self.block_size // self.thinning, 1) * self.thinning
+        return min(block_size, self.num_samples)
+
+    def _run_in_blocks(self, start_time, init_params=None, **kwargs):
+        """
+        Run the warmup, then draw samples block by block until `num_samples` iterations are done or
+        the time budget is spent. Without time budget, a single block of `num_samples` iterations
+        is drawn.
+
+        Each block continues the chains from the last state of the previous one, and reuses the
+        compiled sampler, since the model arguments do not change.
+
+        Args:
+            start_time (float): The `time.perf_counter()` value the time budget counts from.
+            init_params (dict, optional): Initial unconstrained values of the chains. Defaults to None.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Tuple[Dict[str, jnp.ndarray], Dict[str, jnp.ndarray]]: The samples and the extra fields,
+            with leading chain and sample axes.
+        """
+        extra_fields = ("diverging", "accept_prob", "num_steps")
+        if self.time_budget is None:
+            self.mcmc_.run(
+                self.rng_key, init_params=init_params, extra_fields=extra_fields, **kwargs
+            )
+            self.num_draws_ = self.num_samples
+            self.budget_exhausted_ = False
+            return (
+                self.mcmc_.get_samples(group_by_chain=True),
+                self.mcmc_.get_extra_fields(group_by_chain=True),
+            )
+
+        self.mcmc_.warmup(
+            self.rng_key, init_params=init_params, extra_fields=extra_fields, **kwargs
+        )
+        sample_blocks, field_blocks = [], []
+        self.num_draws_ = 0
+        self.budget_exhausted_ = False
+        while True:
+            self.mcmc_.run(
+                self.mcmc_.post_warmup_state.rng_key, extra_fields=extra_fields, **kwargs
+            )
+            sample_blocks.append(self.mcmc_.get_samples(group_by_chain=True))
+            field_blocks.append(self.mcmc_.get_extra_fields(group_by_chain=True))
+            self.num_draws_ += self.mcmc_.num_samples
+            self.mcmc_.post_warmup_state = self.mcmc_.last_state
+            if self.num_draws_ >= self.num_samples:
+                break
+            if time.perf_counter() - start_time >= self.time_budget:
+                self.budget_exhausted_ = True
+                break
+
+        self.num_draws_ = min(self.num_draws_, self.num_samples)
+        num_kept = self.num_draws_ // self.thinning
+
+        def concatenate(*blocks):
+            return jnp.concatenate(blocks, axis=1)[:, :num_kept]
+
+        return (
+            jax.tree_util.tree_map(concatenate, *sample_blocks),
+            jax.tree_util.tree_map(concatenate, *field_blocks),
+        )
+
+    def _get_deterministic_sites(self, **kwargs):
+        """
+        Get the names of the deterministic sites of the model, by running it once.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Tuple[str]: The names of the deterministic sites.
+        """
+        values = jax.tree_util.tree_map(lambda x: x[0], self.posterior_samples_)
+        model_trace = handlers.trace(
+            handlers.substitute(handlers.seed(self.model, self.rng_key), data=values)
+        ).get_trace(**kwargs)
+        return tuple(
+            name for name, site in model_trace.items() if site["type"] == "deterministic"
+        )
+
+    def _pre_fit(self, **kwargs):
+        """
+        Find the MAP with L-BFGS and derive the initial state of the chains from it.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Tuple[dict, Optional[dict]]: The unconstrained initial values of the latent sites, with a
+            leading axis of size `num_chains` if there are several chains, and the inverse mass matrix
+            derived from the Hessian of the potential energy, or None if `init_mass_matrix` is False.
+        """
+        self.init_engine_ = LBFGSInferenceEngine(
+            self.model,
+            num_steps=self.init_steps,
+            rng_key=self.rng_key,
+            init_values=self.init_values,
+        )
+        self.init_engine_.infer(**kwargs)
+        guide = self.init_engine_.guide_
+        map_values = guide.median(self.init_engine_.run_results_.params)
+        unconstrained_values = {
+            name: biject_to(guide.prototype_trace[name]["fn"].support).inv(value)
+            for name, value in map_values.items()
+        }
+
+        inverse_mass_matrix = None
+        if self.init_mass_matrix:
+            flat_values, unravel = ravel_pytree(unconstrained_values)
+            hessian = jax.hessian(
+                lambda x: potential_energy(self.model, (), kwargs, unravel(x))
+            )(flat_values)
+            inverse_mass_matrix = {
+                tuple(sorted(unconstrained_values)): _laplace_covariance(
+                    hessian, dense=self.dense_mass
+                )
+            }
+
+        if self.num_chains > 1:
+            keys = jax.random.split(
+                jax.random.fold_in(self.rng_key, 1), len(unconstrained_values)
+            )
+            unconstrained_values = {
+                name: value
+                + self.init_scale
+                * jax.random.normal(key, (self.num_chains,) + jnp.shape(value))
+                for key, (name, value) in zip(keys, unconstrained_values.items())
+            }
+        return unconstrained_values, inverse_mass_matrix
+
+    def get_warm_start_kwargs(self):
+        """
+        Get the keyword arguments that initialize a new engine from this fitted one.
+
+        The latent sites start at their posterior mean, and NUTS starts from the adapted step
+        size and inverse mass matrix, averaged over chains.
+
+        Returns:
+            dict: The `init_values`, `step_size` and `inverse_mass_matrix` arguments.
+        """
+        last_state = self.mcmc_.last_state
+        init_values = {
+            name: jnp.mean(self.posterior_samples_[name], axis=0)
+            for name in last_state.z
+        }
+        adapt_state = last_state.adapt_state
+        if self.num_chains > 1:
+            adapt_state = jax.tree_util.tree_map(
+                lambda x: jnp.mean(x, axis=0), adapt_state
+            )
+        return {
+            "init_values": init_values,
+            "step_size": float(adapt_state.step_size),
+            "inverse_mass_matrix": adapt_state.inverse_mass_matrix,
+        }
+
+    def get_nbytes(self, seen=None):
+        """
+        Get the number of bytes held by the arrays of the engine, see `InferenceEngine.get_nbytes`.
+
+        The samples and extra fields kept by the sampler, grouped by chain, are counted as well.
+        NumPyro builds the ungrouped ones from them on each call, so they are not counted.
+
+        Args:
+            seen (Optional[set]): Ids of the arrays already counted.
+
+        Returns:
+            int: The number of bytes.
+        """
+        if seen is None:
+            seen = set()
+        count = super().get_nbytes(seen)
+        if hasattr(self, "mcmc_"):
+            count += nbytes(
+                [
+                    self.mcmc_.get_samples(group_by_chain=True),
+                    self.mcmc_.get_extra_fields(group_by_chain=True),
+                ],
+                seen,
+            )
+        return count
+
+    def get_latent_samples(self):
+        """
+        Get the posterior samples of the latent sites, without the deterministic sites.
+
+        Returns:
+            dict: The posterior samples of the sites sampled by NUTS.
+        """
+        latent_sites = self.mcmc_.last_state.z
+        return {
+            name: value
+            for name, value in self.posterior_samples_.items()
+            if name in latent_sites
+        }
+
+    def predict(self, return_sites=None, mean=False, **kwargs):
+        """
+        Generate predictive samples.
+
+        Args:
+            return_sites (Optional[Sequence[str]]): Names of the sites to return. Defaults to None,
+                for the posterior sites, the deterministic sites and "obs". Deterministic sites
+                left out of the posterior samples (see `exclude_deterministic`) are recomputed
+                from the latent samples.
+            mean (bool, optional): If True, only the mean over the samples is returned, see
+                `MAPInferenceEngine.predict`, and `samples_predictive_` is left unchanged.
+                Defaults to False.
+            **kwargs: Additional keyword arguments to be passed to the Predictive method.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples.
+
+        """
+        if return_sites is None and self.deterministic_sites_:
+            return_sites = sorted(
+                set(self.posterior_samples_)
+                .union(self.deterministic_sites_)
+                .union(["obs"])
+            )
+        samples = self._predict_from_posterior_samples(
+            return_sites=return_sites, mean=mean, **kwargs
+        )
+        if mean:
+            return samples
+        self.samples_predictive_ = samples
         self.samples_ = self.mcmc_.get_samples()
         return self.samples_predictive_
+
+
+class ConjugateInferenceEngine(InferenceEngine):
+    """
+    Closed-form inference for models that are a Bayesian linear regression.
+
+    When the observations are Normal and their mean is an affine function of the latent sites,
+    as with a linear trend and additive `LinearEffect`s, the posterior of the latent sites given
+    the observation noise is Gaussian. Each prior is replaced by the Normal distribution with
+    the same mean and variance (the Laplace prior of the changepoint coefficients, for instance),
+    the design matrix is the Jacobian of the mean of the observations with respect to the latent
+    sites, and the posterior is solved with a Cholesky factorization. The noise scale is then set
+    to its MAP value given the expected squared residuals, and both updates are repeated
+    `num_iterations` times. A fit takes milliseconds instead of thousands of optimization steps.
+
+    `infer` raises a ValueError when the model is not of this form, for instance with a logistic
+    trend, multiplicative effects, or correlated observations.
+
+    Args:
+        model (Callable): The probabilistic model.
+        num_samples (int, optional): The number of samples drawn from the Gaussian posterior.
+            Defaults to 1000.
+        num_iterations (int, optional): The number of alternating updates of the coefficients and
+            of the noise scale. Defaults to 10.
+        noise_site (str, optional): Name of the site of the scale of the observation noise, which
+            must be the scale of the observation distribution. Defaults to "std_observation".
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        predict_batch_size (int, optional): Number of posterior samples used per predictive batch.
+            Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        compilation_cache_dir (str, optional): See `InferenceEngine`. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+
+    Attributes:
+        posterior_samples_ (Dict[str, jnp.ndarray]): The samples of the latent sites. The noise scale
+            is a point estimate, repeated for each sample.
+        noise_scale_ (jnp.ndarray): The estimated scale of the observation noise.
+    """
+
+    point_estimate = False
+
+    def __init__(
+        self,
+        model: Callable,
+        num_samples=1000,
+        num_iterations=10,
+        noise_site="std_observation",
+        rng_key=None,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+    ):
+        self.num_samples = num_samples
+        self.num_iterations = num_iterations
+        self.noise_site = noise_site
+        super().__init__(
+            model,
+            rng_key,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+        )
+
+    def infer(self, **kwargs):
+        """
+        Solve for the posterior of the latent sites.
+
+        Args:
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            self: The ConjugateInferenceEngine object.
+
+        Raises:
+            ValueError: If the model is not a linear regression with Normal observations.
+        """
+        self._prepare_compilation()
+        with CompilationTimer() as timer:
+            problem = _get_linear_gaussian_problem(
+                self.model, self.rng_key, self.noise_site, **kwargs
+            )
+            mean, cholesky, column_scale, noise_scale = _solve_linear_gaussian(
+                problem["design"],
+                problem["target"],
+                problem["prior_mean"],
+                problem["prior_variance"],
+                problem["groups"],
+                problem["noise_prior_scale"],
+                num_groups=problem["num_groups"],
+                num_iterations=self.num_iterations,
+            )
+            noise = jax.random.normal(
+                jax.random.fold_in(self.rng_key, 1), (mean.shape[0], self.num_samples)
+            )
+            flat_samples = mean + column_scale * jax.scipy.linalg.solve_triangular(
+                cholesky, noise, lower=True, trans="T"
+            ).T
+            posterior_samples = dict(jax.vmap(problem["unravel"])(flat_samples))
+            noise_scale = noise_scale.reshape(problem["noise_shape"])
+            posterior_samples[self.noise_site] = jnp.broadcast_to(
+                noise_scale, (self.num_samples,) + noise_scale.shape
+            )
+            jax.block_until_ready(posterior_samples)
+
+        self.noise_scale_ = noise_scale
+        self.posterior_samples_ = self._store(posterior_samples)
+        self.telemetry_ = InferenceTelemetry(
+            compile_time=timer.compile_time,
+            run_time=timer.run_time,
+            num_steps=self.num_iterations,
+            steps_per_second=per_second(self.num_iterations, timer.run_time),
+            num_samples=self.num_samples,
+            samples_per_second=per_second(self.num_samples, timer.run_time),
+            cache_hits=timer.cache_hits,
+            cache_misses=timer.cache_misses,
+        )
+        return self
+
+    def get_warm_start_kwargs(self):
+        """
+        Get the keyword arguments that initialize a new engine from this fitted one.
+
+        Returns:
+            dict: An empty dict, since the solution does not depend on a starting point.
+        """
+        return {}
+
+    def predict(self, return_sites=None, mean=False, **kwargs):
+        """
+        Generate predictive samples, one for each posterior sample.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for the posterior sites and "obs".
+            mean (bool, optional): See `MAPInferenceEngine.predict`. Defaults to False.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples.
+        """
+        samples = self._predict_from_posterior_samples(
+            return_sites=return_sites, mean=mean, **kwargs
+        )
+        if not mean:
+            self.samples_ = samples
+        return samples
+
+
+class PosteriorSamplesInferenceEngine(InferenceEngine):
+    """
+    Inference engine holding the posterior samples of a previous fit.
+
+    This engine does no inference: it is used to predict with a forecaster restored by
+    `BaseBayesianForecaster.load`, whose fitted engine is not saved.
+
+    Args:
+        model (Callable): The probabilistic model.
+        posterior_samples (dict): The posterior samples of the latent sites. For point estimates,
+            the sites have no leading sample axis, as with `MAPInferenceEngine`.
+        point_estimate (bool): Whether the samples are a single parameter value (a MAP fit).
+        num_samples (int): Number of predictive samples generated by `predict` for point estimates,
+            1000 as with `MAPInferenceEngine`.
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        predict_batch_size (int, optional): Number of predictive samples generated per batch. Defaults to None.
+        predict_memory_limit (int, optional): Memory budget, in bytes, used to derive the batch size
+            when `predict_batch_size` is not set. Defaults to None.
+        max_predict_samples (int, optional): See `InferenceEngine`. Defaults to None.
+        storage_dtype (str, optional): See `InferenceEngine`. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        model,
+        posterior_samples,
+        point_estimate=False,
+        num_samples=1000,
+        rng_key=None,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+    ):
+        self.point_estimate = point_estimate
+        self.num_samples = num_samples
+        super().__init__(
+            model,
+            rng_key,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
+        )
+        self.posterior_samples_ = self._store(posterior_samples)
+
+    def infer(self, **kwargs):
+        """
+        Do nothing, the posterior samples are given.
+
+        Returns:
+            PosteriorSamplesInferenceEngine: The engine itself.
+        """
+        return self
+
+    def predict(self, return_sites=None, mean=False, **kwargs):
+        """
+        Generate predictive samples, one for each posterior sample, or `num_samples` for point estimates.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for the posterior sites and "obs".
+            mean (bool, optional): See `MAPInferenceEngine.predict`. Defaults to False.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, np.ndarray]: The predictive samples.
+        """
+        posterior_samples = self.posterior_samples_
+        if self.point_estimate:
+            posterior_samples = jax.tree_util.tree_map(
+                lambda x: jnp.broadcast_to(x, (self.num_samples,) + jnp.shape(x)),
+                posterior_samples,
+            )
+        samples = self._predict_from_posterior_samples(
+            posterior_samples=posterior_samples, return_sites=return_sites, mean=mean, **kwargs
+        )
+        if not mean:
+            self.samples_ = samples
+        return samples
+
+    def predict_point(self, return_sites=None, **kwargs):
+        """
+        Evaluate the model once at the point estimate, see `MAPInferenceEngine.predict_point`.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for "obs" and the deterministic sites.
+            **kwargs: Additional keyword arguments to be passed to the model.
+
+        Returns:
+            Dict[str, jnp.ndarray]: The mean of the observation site and the deterministic sites.
+        """
+        return self._call_compiled(
+            self._point_predictive,
+            (self.rng_key, self.posterior_samples_),
+            (None if return_sites is None else tuple(return_sites),),
+            **kwargs,
+        )
+
+    def get_predict_function(self, return_sites=None):
+        """
+        Get a pure function generating predictions, see `InferenceEngine.get_predict_function`.
+
+        Args:
+            return_sites (Sequence[str], optional): Names of the sites to return. Defaults to None,
+                for all sites.
+
+        Returns:
+            Callable: Function `(rng_key, **kwargs) -> dict` returning the predictive sites.
+        """
+        if not self.point_estimate:
+            return super().get_predict_function(return_sites)
+        return functools.partial(
+            self._point_predictive,
+            values=self.posterior_samples_,
+            return_sites=return_sites,
+        )
+
+    def get_warm_start_kwargs(self):
+        """
+        Get the keyword arguments that initialize a new engine from this one.
+
+        Returns:
+            dict: The `init_values` argument, set to the posterior mean.
+        """
+        init_values = self.posterior_samples_
+        if not self.point_estimate:
+            init_values = {
+                name: jnp.mean(value, axis=0) for name, value in init_values.items()
+            }
+        return {"init_values": init_values}
+
+    def _point_predictive(self, rng_key, values, return_sites=None, **kwargs):
+        return _evaluate_model_at(self.model, rng_key, values, return_sites, **kwargs)
+
+
+def _evaluate_model_at(model, rng_key, values, return_sites=None, **kwargs):
+    """
+    Evaluate the model once with its latent sites set to `values`.
+
+    The observation noise is not sampled: the "obs" site holds the mean of the observation
+    distribution. All sites get a leading axis of size 1.
+
+    Args:
+        model (Callable): The model.
+        rng_key (jax.random.PRNGKey): The random number generator key.
+        values (dict): Values of the latent sites, in the constrained space.
+        return_sites (Optional[Sequence[str]]): Names of the sites to return, "obs" and the
+            deterministic sites if None.
+        **kwargs: Additional keyword arguments to be passed to the model.
+
+    Returns:
+        Dict[str, jnp.ndarray]: The mean of the observation site and the deterministic sites.
+    """
+    model = handlers.substitute(handlers.seed(model, rng_key), data=values)
+    trace = handlers.trace(model).get_trace(**kwargs)
+
+    out = {
+        name: site["value"]
+        for name, site in trace.items()
+        if site["type"] == "deterministic"
+    }
+    out["obs"] = trace["obs"]["fn"].mean
+    if return_sites is not None:
+        out = {name: out[name] for name in return_sites}
+    return {name: jnp.expand_dims(value, 0) for name, value in out.items()}
+
+
+def least_squares_init_values(model, rng_key=None, ridge=1.0, num_iterations=5, **kwargs):
+    """
+    Get initial values of the latent sites from a least-squares fit of the observations.
+
+    The real-valued latent sites, such as the offset, the changepoint coefficients and the
+    coefficients of linear effects, are fitted to the observed "obs" site by Gauss-Newton steps on
+    the squared residuals plus `ridge` times the squared distance to their prior mean. Constrained
+    sites, such as the noise scale or the capacity, are kept at their prior mean. When the mean of
+    the observations is linear in the fitted sites, the first step solves the ridge regression
+    exactly.
+
+    Args:
+        model (Callable): The model, with an observed "obs" site with a Normal distribution.
+        rng_key (jax.random.PRNGKey, optional): The random number generator key. Defaults to None.
+        ridge (float, optional): The ridge penalty. Defaults to 1.0.
+        num_iterations (int, optional): The maximum number of Gauss-Newton steps. Defaults to 5.
+        **kwargs: Additional keyword arguments to be passed to the model, with the observations.
+
+    Returns:
+        dict: The initial values of the fitted sites, for the `init_values` argument of the
+        inference engines. Empty if the model has no Normal observations, or if the fit does not
+        reduce the squared residuals of the prior mean.
+    """
+    if rng_key is None:
+        rng_key = jax.random.PRNGKey(0)
+    model_trace = handlers.trace(
+        handlers.substitute(handlers.seed(model, rng_key), substitute_fn=init_to_mean)
+    ).get_trace(**kwargs)
+    if "obs" not in model_trace or not model_trace["obs"]["is_observed"]:
+        return {}
+    if not isinstance(_base_distribution(model_trace["obs"]["fn"]), dist.Normal):
+        return {}
+
+    prior_means, fixed_values = {}, {}
+    for name, site in model_trace.items():
+        if site["type"] != "sample" or site["is_observed"]:
+            continue
+        support = site["fn"].support
+        while isinstance(support, constraints.independent):
+            support = support.base_constraint
+        if support is constraints.real:
+            prior_means[name] = site["value"]
+        else:
+            fixed_values[name] = site["value"]
+    if not prior_means:
+        return {}
+    prior_mean, unravel = ravel_pytree(prior_means)
+    obs_shape = jnp.shape(model_trace["obs"]["value"])
+    obs = jnp.ravel(model_trace["obs"]["value"])
+
+    def residuals_fn(flat_values):
+        values = {**fixed_values, **unravel(flat_values)}
+        trace = handlers.trace(
+            handlers.substitute(handlers.seed(model, rng_key), data=values)
+        ).get_trace(**kwargs)
+        loc = _base_distribution(trace["obs"]["fn"]).loc
+        return obs - jnp.ravel(jnp.broadcast_to(loc, obs_shape))
+
+    def objective(flat_values):
+        return jnp.sum(residuals_fn(flat_values) ** 2) + ridge * jnp.sum(
+            (flat_values - prior_mean) ** 2
+        )
+
+    @jax.jit
+    def gauss_newton_step(flat_values):
+        residuals = residuals_fn(flat_values)
+        # The residuals decrease with the mean, hence the sign of the Jacobian
+        design = -jax.jacfwd(residuals_fn)(flat_values)
+        normal_matrix = design.T @ design + ridge * jnp.eye(flat_values.shape[0])
+        # Scale the normal matrix to a unit diagonal, since the columns of changepoint designs
+        # have very different magnitudes
+        column_scale = 1 / jnp.sqrt(jnp.diag(normal_matrix))
+        cholesky = jnp.linalg.cholesky(
+            column_scale[:, None] * normal_matrix * column_scale[None, :]
+        )
+        gradient = design.T @ residuals - ridge * (flat_values - prior_mean)
+        step = column_scale * jax.scipy.linalg.cho_solve(
+            (cholesky, True), column_scale * gradient
+        )
+        new_values = flat_values + step
+        return new_values, objective(new_values)
+
+    flat_values = prior_mean
+    loss = objective(prior_mean)
+    initial_loss = loss
+    for _ in range(num_iterations):
+        new_values, new_loss = gauss_newton_step(flat_values)
+        if not jnp.isfinite(new_loss) or new_loss >= loss:
+            break
+        converged = loss - new_loss <= 1e-6 * loss
+        flat_values, loss = new_values, new_loss
+        if converged:
+            break
+
+    if not loss < initial_loss:
+        return {}
+    return dict(unravel(flat_values))
+
+
+def _get_linear_gaussian_problem(model, rng_key, noise_site, **kwargs):
+    """
+    Get the linear regression equivalent to a model with Normal observations.
+
+    Args:
+        model (Callable): The model, with an observed "obs" site.
+        rng_key (jax.random.PRNGKey): The random number generator key.
+        noise_site (str): Name of the site of the scale of the observation noise.
+        **kwargs: Additional keyword arguments to be passed to the model.
+
+    Returns:
+        dict: The design matrix ("design", with shape (n_obs, n_params)) and the observations
+        minus the intercept ("target"), the means and variances of the Gaussian priors, the noise
+        scale component of each observation ("groups"), the scale of the HalfNormal prior of the
+        noise (None for other priors), the number and shape of the noise scales, and the function
+        mapping flat parameters to the latent sites ("unravel").
+
+    Raises:
+        ValueError: If the model is not a linear regression with Normal observations.
+    """
+    model_trace = handlers.trace(handlers.seed(model, rng_key)).get_trace(**kwargs)
+    if "obs" not in model_trace or not model_trace["obs"]["is_observed"]:
+        raise ValueError("Closed-form inference requires the observations.")
+    if noise_site not in model_trace:
+        raise ValueError(f"The model has no {noise_site} site.")
+
+    obs_distribution = _base_distribution(model_trace["obs"]["fn"])
+    if not isinstance(obs_distribution, dist.Normal):
+        raise ValueError(
+            "Closed-form inference requires Normal observations, got "
+            f"{type(obs_distribution).__name__}."
+        )
+
+    prior_means, prior_variances = {}, {}
+    for name, site in model_trace.items():
+        if site["type"] != "sample" or site["is_observed"] or name == noise_site:
+            continue
+        support = site["fn"].support
+        while isinstance(support, constraints.independent):
+            support = support.base_constraint
+        if support is not constraints.real:
+            raise ValueError(
+                f"Closed-form inference requires real-valued latent sites, but {name} is "
+                "constrained."
+            )
+        # Priors with integer parameters, such as Normal(0, 1), have integer moments
+        shape, dtype = jnp.shape(site["value"]), jnp.result_type(site["value"])
+        prior_means[name] = jnp.broadcast_to(site["fn"].mean, shape).astype(dtype)
+        prior_variances[name] = jnp.broadcast_to(site["fn"].variance, shape).astype(dtype)
+    prior_mean, unravel = ravel_pytree(prior_means)
+    prior_variance, _ = ravel_pytree(prior_variances)
+
+    obs = jnp.ravel(model_trace["obs"]["value"])
+    obs_shape = jnp.shape(model_trace["obs"]["value"])
+    noise_value = model_trace[noise_site]["value"]
+    noise_shape = jnp.shape(noise_value)
+
+    def obs_distribution_at(flat_values, noise):
+        values = dict(unravel(flat_values))
+        values[noise_site] = noise
+        trace = handlers.trace(
+            handlers.substitute(handlers.seed(model, rng_key), data=values)
+        ).get_trace(**kwargs)
+        return _base_distribution(trace["obs"]["fn"])
+
+    def mean_fn(flat_values):
+        loc = obs_distribution_at(flat_values, noise_value).loc
+        return jnp.ravel(jnp.broadcast_to(loc, obs_shape))
+
+    design = jax.jacfwd(mean_fn)(prior_mean)
+    intercept = mean_fn(jnp.zeros_like(prior_mean))
+    probe = prior_mean + jnp.sqrt(prior_variance) * jax.random.normal(
+        rng_key, prior_mean.shape
+    )
+    if not jnp.allclose(
+        mean_fn(probe), intercept + design @ probe, rtol=1e-3, atol=1e-3
+    ):
+        raise ValueError(
+            "Closed-form inference requires the mean of the observations to be linear in "
+            "the latent sites, as with a linear trend and additive linear effects."
+        )
+
+    # Label each observation with the component of the noise scale it depends on
+    n_groups = int(np.prod(noise_shape))
+    labels = jnp.arange(1.0, n_groups + 1).reshape(noise_shape)
+    scale = jnp.ravel(
+        jnp.broadcast_to(obs_distribution_at(prior_mean, labels).scale, obs_shape)
+    )
+    groups = jnp.round(scale).astype(int) - 1
+    if not jnp.allclose(scale, groups + 1) or groups.min() < 0 or groups.max() >= n_groups:
+        raise ValueError(
+            f"Closed-form inference requires {noise_site} to be the scale of the observations."
+        )
+
+    noise_prior = model_trace[noise_site]["fn"]
+    noise_prior_scale = None
+    if isinstance(noise_prior, dist.HalfNormal):
+        noise_prior_scale = jnp.ravel(jnp.broadcast_to(noise_prior.scale, noise_shape))
+
+    return {
+        "design": design,
+        "target": obs - intercept,
+        "prior_mean": prior_mean,
+        "prior_variance": prior_variance,
+        "groups": groups,
+        "noise_prior_scale": noise_prior_scale,
+        "num_groups": n_groups,
+        "noise_shape": noise_shape,
+        "unravel": unravel,
+    }
+
+
+@functools.partial(jax.jit, static_argnames=("num_groups", "num_iterations"))
+def _solve_linear_gaussian(
+    design,
+    target,
+    prior_mean,
+    prior_variance,
+    groups,
+    noise_prior_scale,
+    num_groups,
+    num_iterations,
+):
+    """
+    Solve a Bayesian linear regression with independent Gaussian priors and grouped noise scales.
+
+    The coefficients and the noise scales are updated in turn: the Gaussian posterior of the
+    coefficients given the noise scales, then the MAP of each noise scale given the expected
+    squared residuals under this posterior (maximum likelihood if `noise_prior_scale` is None).
+    The precision matrix is scaled to a unit diagonal before its Cholesky factorization, since
+    the columns of changepoint designs have very different magnitudes.
+
+    Args:
+        design (jnp.ndarray): The design matrix, with shape (n_obs, n_params).
+        target (jnp.ndarray): The observations minus the intercept, with shape (n_obs,).
+        prior_mean (jnp.ndarray): The prior means, with shape (n_params,).
+        prior_variance (jnp.ndarray): The prior variances, with shape (n_params,).
+        groups (jnp.ndarray): The noise scale index of each observation, with shape (n_obs,).
+        noise_prior_scale (Optional[jnp.ndarray]): Scales of the HalfNormal priors of the noise
+            scales, with shape (num_groups,).
+        num_groups (int): The number of noise scales.
+        num_iterations (int): The number of updates of the noise scales.
+
+    Returns:
+        Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]: The posterior mean, the lower
+        Cholesky factor `L` of the scaled posterior precision, the column scales `d`, such that the
+        posterior covariance is `diag(d) (L L^T)^-1 diag(d)`, and the noise scales.
+    """
+    counts = jax.ops.segment_sum(jnp.ones_like(target), groups, num_segments=num_groups)
+
+    def solve(noise_scale):
+        weights = 1 / noise_scale[groups] ** 2
+        precision = design.T @ (weights[:, None] * design) + jnp.diag(1 / prior_variance)
+        column_scale = 1 / jnp.sqrt(jnp.diag(precision))
+        cholesky = jnp.linalg.cholesky(
+            column_scale[:, None] * precision * column_scale[None, :]
+        )
+        rhs = design.T @ (weights * target) + prior_mean / prior_variance
+        mean = column_scale * jax.scipy.linalg.cho_solve(
+            (cholesky, True), column_scale * rhs
+        )
+        return mean, cholesky, column_scale
+
+    def update_noise_scale(_, noise_scale):
+        mean, cholesky, column_scale = solve(noise_scale)
+        residuals = target - design @ mean
+        # Diagonal of design @ covariance @ design.T
+        projected = jax.scipy.linalg.solve_triangular(
+            cholesky, column_scale[:, None] * design.T, lower=True
+        )
+        expected_rss = jax.ops.segment_sum(
+            residuals**2 + jnp.sum(projected**2, axis=0), groups, num_segments=num_groups
+        )
+        if noise_prior_scale is None:
+            return jnp.sqrt(expected_rss / counts)
+        # Positive root of variance^2 / s^2 + n * variance - rss = 0, in a cancellation-free form
+        variance = 2 * expected_rss / (
+            counts + jnp.sqrt(counts**2 + 4 * expected_rss / noise_prior_scale**2)
+        )
+        return jnp.sqrt(variance)
+
+    initial_noise_scale = jnp.full((num_groups,), jnp.std(target))
+    noise_scale = lax.fori_loop(0, num_iterations, update_noise_scale, initial_noise_scale)
+    mean, cholesky, column_scale = solve(noise_scale)
+    return mean, cholesky, column_scale, noise_scale
+
+
+def _base_distribution(distribution):
+    """Unwrap the distributions expanded by plates or reinterpreted as events."""
+    while isinstance(distribution, (dist.ExpandedDistribution, dist.Independent)):
+        distribution = distribution.base_dist
+    return distribution
+
+
+def _max_split_r_hat(samples):
+    """
+    Get the largest split R-hat of MCMC samples.
+
+    Args:
+        samples (Dict[str, jnp.ndarray]): The samples of the latent sites, with leading chain and
+            sample axes.
+
+    Returns:
+        Optional[float]: The largest split R-hat over the sites and their elements, None if each
+        chain has fewer than 4 samples.
+    """
+    if not samples or next(iter(samples.values())).shape[1] < 4:
+        return None
+    r_hats = [
+        np.max(split_gelman_rubin(np.asarray(value, dtype=np.float64)))
+        for value in samples.values()
+    ]
+    return float(np.max(r_hats))
+
+
+def _add_counts(count, other_count):
+    """Add two counts, either of which may be None (not measured)."""
+    if count is None or other_count is None:
+        return count if other_count is None else other_count
+    return count + other_count
+
+
+def _laplace_covariance(hessian, dense=False):
+    """
+    Approximate the posterior covariance from the Hessian of the potential energy at the MAP.
+
+    If the Hessian is positive definite, the covariance is its inverse, as in the Laplace
+    approximation. Otherwise, each variance is the inverse of the corresponding curvature (the
+    conditional variance), and directions without positive curvature keep a unit variance.
+
+    Args:
+        hessian (jnp.ndarray): The Hessian, with shape (d, d).
+        dense (bool): Whether to return the full covariance matrix or only its diagonal.
+
+    Returns:
+        jnp.ndarray: The covariance, with shape (d, d) if `dense`, else (d,).
+    """
+    cholesky = jnp.linalg.cholesky(hessian)
+    if jnp.all(jnp.isfinite(cholesky)):
+        covariance = jax.scipy.linalg.cho_solve((cholesky, True), jnp.eye(hessian.shape[0]))
+        return covariance if dense else jnp.diag(covariance)
+
+    curvature = jnp.diag(hessian)
+    variances = jnp.where(curvature > 0, 1 / curvature, 1.0)
+    return jnp.diag(variances) if dense else variances
+
+
+def _is_distributed(tree):
+    """Return whether some array of a pytree is placed on several devices."""
+    return any(
+        isinstance(leaf, jax.Array) and len(leaf.sharding.device_set) > 1
+        for leaf in jax.tree_util.tree_leaves(tree)
+    )
+
+
+# Placeholder of the array leaves of a `_MixedArgument`
+_ARRAY_LEAF = object()
+
+
+class _MixedArgument(NamedTuple):
+    """
+    A model argument whose array leaves are passed apart from its static leaves.
+
+    Attributes:
+        treedef (PyTreeDef): The structure of the argument.
+        static_leaves (tuple): The leaves of the argument, with `_ARRAY_LEAF` in place of arrays.
+    """
+
+    treedef: Any
+    static_leaves: tuple
+
+    def merge(self, array_leaves):
+        """Rebuild the argument from its array leaves."""
+        array_leaves = iter(array_leaves)
+        leaves = [
+            next(array_leaves) if leaf is _ARRAY_LEAF else leaf for leaf in self.static_leaves
+        ]
+        return jax.tree_util.tree_unflatten(self.treedef, leaves)
+
+
+def _split_static_kwargs(kwargs):
+    """
+    Split model keyword arguments into array arguments and static (non-array) arguments.
+
+    Array arguments (including dicts of arrays) can be passed as inputs to a jitted function,
+    while static ones (functions, strings, effects, None) must be closed over. Arguments that are
+    pytrees mixing both, such as a `jax.tree_util.Partial` holding priors whose locations are
+    estimated from the data, are split: their arrays are passed as inputs, and the rest is
+    closed over as a `_MixedArgument`. Closed over arrays would be compiled as constants, so that
+    fitting another dataset would compile the model again, and miss the persistent compilation
+    cache.
+
+    Args:
+        kwargs (dict): Keyword arguments of the model.
+
+    Returns:
+        Tuple[dict, dict]: The array arguments and the static arguments, merged back into the
+        keyword arguments by `_merge_kwargs`.
+    """
+    dynamic_kwargs, static_kwargs = {}, {}
+    for key, value in kwargs.items():
+        leaves, treedef = jax.tree_util.tree_flatten(value)
+        is_array = [isinstance(leaf, (np.ndarray, jax.Array)) for leaf in leaves]
+        if leaves and all(is_array):
+            dynamic_kwargs[key] = value
+        elif any(is_array):
+            dynamic_kwargs[key] = [leaf for leaf, array in zip(leaves, is_array) if array]
+            static_kwargs[key] = _MixedArgument(
+                treedef,
+                tuple(_ARRAY_LEAF if array else leaf for leaf, array in zip(leaves, is_array)),
+            )
+        else:
+            static_kwargs[key] = value
+    return dynamic_kwargs, static_kwargs
+
+
+def _merge_kwargs(static_kwargs, dynamic_kwargs):
+    """
+    Merge the arguments split by `_split_static_kwargs` back into the model keyword arguments.
+
+    Args:
+        static_kwargs (dict): The static arguments.
+        dynamic_kwargs (dict): The array arguments, possibly traced.
+
+    Returns:
+        dict: The keyword arguments of the model.
+    """
+    kwargs = {**static_kwargs, **dynamic_kwargs}
+    for key, value in static_kwargs.items():
+        if isinstance(value, _MixedArgument):
+            kwargs[key] = value.merge(dynamic_kwargs[key])
+    return kwargs
+
+
+def _static_key(value):
+    """
+    Build a hashable key for a static (non-array) model argument.
+
+    Dicts, lists and tuples are keyed by their content, other unhashable objects by their id.
+    """
+    if isinstance(value, dict):
+        return tuple((key, _static_key(item)) for key, item in sorted(value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_static_key(item) for item in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return id(value)
+
+
+def _shapes_key(tree):
+    """
+    Build a hashable key from the structure, shapes and dtypes of a pytree of arrays.
+    """
+    leaves, treedef = jax.tree_util.tree_flatten(tree)
+    return treedef, tuple((jnp.shape(leaf), jnp.result_type(leaf)) for leaf in leaves)
+
+
+def _init_to_value_or_mean(site=None, values=None):
+    """
+    Initialize the latent sites to `values`, falling back to `init_to_mean`.
+
+    A value is only used if its shape matches the shape of the site, so that values from a
+    model with different dimensions can be passed safely.
+
+    Args:
+        site (dict, optional): The site to initialize.
+        values (dict, optional): The initial values, by site name.
+
+    Returns:
+        The initial value of the site.
+    """
+    if site is None:
+        return functools.partial(_init_to_value_or_mean, values=values)
+
+    value = (values or {}).get(site["name"])
+    if site["type"] == "sample" and not site["is_observed"] and value is not None:
+        shape = tuple(site["kwargs"].get("sample_shape", ())) + site["fn"].shape()
+        if jnp.shape(value) == shape:
+            return value
+    return init_to_mean(site)
+
+
+def _get_grad_norm_fn(svi, static_kwargs, vectorized=False):
+    """
+    Return a jitted function computing the norm of the gradient of the SVI loss.
+
+    The gradient is taken with respect to the unconstrained parameters, which are the
+    variables updated by the optimizer.
+
+    Args:
+        svi (SVI): The initialized SVI object.
+        static_kwargs (dict): Non-array model arguments, closed over by the compiled function.
+        vectorized (bool): Whether the SVI state is stacked along a leading axis.
+
+    Returns:
+        Callable: A function `(svi_state, dynamic_kwargs) -> grad_norm`.
+    """
+
+    def grad_norm(svi_state, dynamic_kwargs):
+        def loss_fn(params):
+            return svi.loss.loss(
+                svi_state.rng_key,
+                svi.constrain_fn(params),
+                svi.model,
+                svi.guide,
+                **_merge_kwargs(static_kwargs, dynamic_kwargs),
+            )
+
+        grads = jax.grad(loss_fn)(svi.optim.get_params(svi_state.optim_state))
+        return jnp.linalg.norm(ravel_pytree(grads)[0])
+
+    if vectorized:
+        grad_norm = jax.vmap(grad_norm, in_axes=(0, None))
+    return jax.jit(grad_norm)
+
+
+def _get_loss_fn(svi, static_kwargs, vectorized=False):
+    """
+    Return a jitted function evaluating the SVI loss at the current parameters.
+
+    Args:
+        svi (SVI): The initialized SVI object.
+        static_kwargs (dict): Non-array model arguments, closed over by the compiled function.
+        vectorized (bool): Whether the SVI state is stacked along a leading axis.
+
+    Returns:
+        Callable: A function `(svi_state, dynamic_kwargs) -> loss`.
+    """
+
+    def loss(svi_state, dynamic_kwargs):
+        return svi.loss.loss(
+            svi_state.rng_key,
+            svi.get_params(svi_state),
+            svi.model,
+            svi.guide,
+            **_merge_kwargs(static_kwargs, dynamic_kwargs),
+        )
+
+    if vectorized:
+        loss = jax.vmap(loss, in_axes=(0, None))
+    return jax.jit(loss)
+
+
+def _summarize_grad_norms(grad_norms):
+    """
+    Summarize gradient norms evaluated during an optimization.
+
+    Args:
+        grad_norms (List[jnp.ndarray]): The scalar gradient norms, in order of evaluation.
+
+    Returns:
+        dict: The initial, final, minimum and maximum gradient norms.
+    """
+    grad_norms = np.asarray(jax.device_get(grad_norms), dtype=float)
+    return {
+        "initial": float(grad_norms[0]),
+        "final": float(grad_norms[-1]),
+        "min": float(grad_norms.min()),
+        "max": float(grad_norms.max()),
+    }
+
+
+def _save_checkpoint(path, checkpoint):
+    """
+    Save a checkpoint of the SVI loop to `path`.
+
+    The arrays are moved to host memory, and the file is written to a temporary path first and
+    then renamed, so that an interruption during the write does not corrupt the previous checkpoint.
+
+    Args:
+        path (str): The checkpoint file.
+        checkpoint (dict): The state of the SVI loop.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(jax.device_get(checkpoint), f)
+    os.replace(tmp_path, path)
+
+
+def _load_checkpoint(path, svi_state):
+    """
+    Load a checkpoint of the SVI loop saved by `_save_checkpoint`.
+
+    Args:
+        path (str): The checkpoint file.
+        svi_state (SVIState): A freshly initialized SVI state, used to check that the checkpoint
+            was saved for the same model and guide.
+
+    Returns:
+        dict: The state of the SVI loop.
+
+    Raises:
+        ValueError: If the SVI state of the checkpoint does not match `svi_state`.
+    """
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+
+    def shapes(tree):
+        leaves, treedef = jax.tree_util.tree_flatten(tree)
+        return treedef, [jnp.shape(leaf) for leaf in leaves]
+
+    if shapes(checkpoint["svi_state"]) != shapes(svi_state):
+        raise ValueError(
+            f"The checkpoint at {path} does not match the model being fitted."
+        )
+    checkpoint["svi_state"] = jax.tree_util.tree_map(jnp.asarray, checkpoint["svi_state"])
+    return checkpoint
+
+
+def _get_svi_chunk_fn(svi, static_kwargs, num_steps, vectorized=False):
+    """
+    Return a jitted function running `num_steps` SVI updates with `lax.scan`.
+
+    Args:
+        svi (SVI): The SVI object.
+        static_kwargs (dict): Non-array model arguments, closed over by the compiled function.
+        num_steps (int): Number of updates performed by each call.
+        vectorized (bool): Whether the SVI state is stacked along a leading axis, in which case
+            the update is vectorized over it and the losses have shape (num_steps, num_states).
+
+    Returns:
+        Callable: A function `(svi_state, dynamic_kwargs) -> (svi_state, losses)`.
+    """
+
+    def update(state, dynamic_kwargs):
+        return svi.update(state, **_merge_kwargs(static_kwargs, dynamic_kwargs))
+
+    if vectorized:
+        update = jax.vmap(update, in_axes=(0, None))
+
+    def run_chunk(svi_state, dynamic_kwargs):
+        def body_fn(state, _):
+            return update(state, dynamic_kwargs)
+
+        return lax.scan(body_fn, svi_state, None, length=num_steps)
+
+    return jax.jit(run_chunk)
@@ -8,6 +8,7 @@ import jax.numpy as jnp
 import numpyro
 from numpyro import distributions as dist
 from prophetverse.effects import AbstractEffect
+from prophetverse.utils.reparam import scale_reparam
 
 
 def model(
@@ -20,6 +21,8 @@ def model(
     exogenous_effects: Dict[str, AbstractEffect] = {},
     noise_scale=0.05,
     correlation_matrix_concentration=1.0,
+    subsample_size=None,
+    reparam_scales=None,
 ):
     """
     Defines the Numpyro model.
@@ -28,8 +31,27 @@ def model(
         y (jnp.ndarray): Array of time series data.
         X (jnp.ndarray): Array of exogenous variables.
         t (jnp.ndarray): Array of time values.
+        subsample_size (int): If set, the likelihood is evaluated on a random minibatch of this
+            many timepoints, shared by all series, and rescaled to the full series.
+        reparam_scales (dict): If set, the sites it names are sampled in units scaled by its values,
+            see `prophetverse.utils.reparam.ScaleReparam`.
     """
-    params = init_trend_params()
+    # The observations have shape (time, series), where the series are either independent
+    # (batch dimension) or correlated (event dimension)
+    time_plate = numpyro.plate(
+        "time",
+        changepoint_matrix.shape[1],
+        dim=-2 if correlation_matrix_concentration is None else -1,
+        subsample_size=subsample_size,
+    )
+    if subsample_size is not None:
+        with time_plate as time_idx:
+            changepoint_matrix = changepoint_matrix[:, time_idx]
+            data = {key: value[:, time_idx] for key, value in data.items()}
+            if y is not None:
+                y = y[:, time_idx]
+
+    params = scale_reparam(init_trend_params, reparam_scales)()
 
     # Trend
     changepoint_coefficients = params["changepoint_coefficients"]
@@ -51,7 +73,7 @@ def model(
         for key, exog_effect in exogenous_effects.items():
 
             exog_data = data[key]
-            effect = exog_effect(trend=trend, data=exog_data)
+            effect = scale_reparam(exog_effect, reparam_scales)(trend=trend, data=exog_data)
             numpyro.deterministic(key, effect)
             mean += effect
 
@@ -64,7 +86,7 @@ def model(
         
     if correlation_matrix_concentration is None:
 
-        with numpyro.plate("time", mean.shape[-1], dim=-2):
+        with time_plate:
             numpyro.sample(
                 "obs",
                 dist.Normal(mean.squeeze(-1).T, std_observation),
@@ -84,7 +106,7 @@ def model(
 
         cov_mat = jnp.tile(jnp.expand_dims(cov_mat, axis=0), (mean.shape[1], 1, 1))
 
-        with numpyro.plate("time", mean.shape[-1], dim=-2):
+        with time_plate:
             numpyro.sample(
                 "obs",
                 dist.MultivariateNormal(mean.squeeze(-1).T, scale_tril=cov_mat),
@@ -8,6 +8,7 @@ import jax.numpy as jnp
 import numpyro
 from numpyro import distributions as dist
 from ..effects import AbstractEffect
+from ..utils.reparam import scale_reparam
 
 def model(
     t,
@@ -16,8 +17,9 @@ def model(
     init_trend_params,
     trend_mode,
     data={},
-    exogenous_effects: Dict[str, AbstractEffect]={}
-    
+    exogenous_effects: Dict[str, AbstractEffect]={},
+    subsample_size=None,
+    reparam_scales=None,
 ):
     """
     Defines the Numpyro model.
@@ -26,8 +28,22 @@ def model(
         y (jnp.ndarray): Array of time series data.
         X (jnp.ndarray): Array of exogenous variables.
         t (jnp.ndarray): Array of time values.
+        subsample_size (int): If set, the likelihood is evaluated on a random minibatch of this
+            many timepoints, and rescaled to the full series.
+        reparam_scales (dict): If set, the sites it names are sampled in units scaled by its values,
+            see `prophetverse.utils.reparam.ScaleReparam`.
     """
-    params = init_trend_params()
+    time_plate = numpyro.plate(
+        "data", changepoint_matrix.shape[0], dim=-2, subsample_size=subsample_size
+    )
+    if subsample_size is not None:
+        with time_plate as time_idx:
+            changepoint_matrix = changepoint_matrix[time_idx]
+            data = {key: value[time_idx] for key, value in data.items()}
+            if y is not None:
+                y = y[time_idx]
+
+    params = scale_reparam(init_trend_params, reparam_scales)()
 
     # Trend
     changepoint_coefficients = params["changepoint_coefficients"]
@@ -48,13 +64,13 @@ def model(
         for key, exog_effect in exogenous_effects.items():
 
             exog_data = data[key]
-            effect = exog_effect(trend=trend, data=exog_data)
+            effect = scale_reparam(exog_effect, reparam_scales)(trend=trend, data=exog_data)
             numpyro.deterministic(key, effect)
             mean += effect
 
     noise_scale = params["std_observation"] 
 
-    with numpyro.plate("data", len(mean), dim=-2) as time_plate:
+    with time_plate:
         numpyro.sample(
             "obs",
             dist.Normal(mean.reshape((-1, 1)), noise_scale),
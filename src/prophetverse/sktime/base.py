@@ -1,4 +1,7 @@
+import importlib
 import itertools
+import inspect
+import json
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
@@ -12,23 +15,116 @@ from numpyro.contrib.control_flow import scan
 from numpyro.infer import MCMC, NUTS, Predictive, init_to_mean
 from sktime.forecasting.base import BaseForecaster, ForecastingHorizon
 from collections import OrderedDict
-from prophetverse.engine import MAPInferenceEngine, MCMCInferenceEngine, InferenceEngine
+from prophetverse.engine import (
+    ConjugateInferenceEngine,
+    MAPInferenceEngine,
+    MCMCInferenceEngine,
+    LaplaceInferenceEngine,
+    least_squares_init_values,
+    LBFGSInferenceEngine,
+    PosteriorSamplesInferenceEngine,
+    VIInferenceEngine,
+    InferenceEngine,
+)
 from prophetverse.effects import LinearEffect
-from prophetverse.utils.frame_to_array import series_to_tensor
+from prophetverse.changepoint import resize_changepoint_coefficients
+from prophetverse.utils.export import ExportedPredict
+from prophetverse.utils.memory import nbytes
+from prophetverse.utils.reparam import get_column_scales, scale_sites, unscale_sites
+from prophetverse.utils.frame_to_array import (
+    convert_index_to_days_since_epoch,
+    series_to_tensor,
+)
+from prophetverse.utils.serialization import decode, encode
 from prophetverse.effects import AbstractEffect
 import re
 import logging
 
+def _same_scale_index(scale, other_scale):
+    """
+    Check whether two y scales, as set by `_set_y_scales`, apply to the same series.
+
+    Args:
+        scale (Union[float, pd.DataFrame]): A scale.
+        other_scale (Union[float, pd.DataFrame]): Another scale.
+
+    Returns:
+        bool: Whether both scales are scalars, or frames with the same index.
+    """
+    if isinstance(scale, pd.DataFrame) and isinstance(other_scale, pd.DataFrame):
+        return scale.index.equals(other_scale.index)
+    return not isinstance(scale, pd.DataFrame) and not isinstance(other_scale, pd.DataFrame)
+
+
+def _as_float(samples):
+    """
+    Convert samples to a NumPy array of at least single precision.
+
+    Samples stored in a reduced precision (see `storage_dtype`) are upcast, since pandas and
+    the NumPy reductions do not support bfloat16.
+
+    Args:
+        samples (array-like): The samples.
+
+    Returns:
+        np.ndarray: The samples, as float32 or float64.
+    """
+    samples = np.asarray(samples)
+    return samples.astype(jnp.promote_types(samples.dtype, jnp.float32), copy=False)
+
+
 class BaseBayesianForecaster(BaseForecaster):
     """
     Base class for Bayesian forecasters in hierarchical-prophet.
 
+    Point forecasts are the mean of the predictive distribution, accumulated batch by batch
+    without keeping the samples, so `predict` does not set the `forecast_samples_` attribute.
+    The samples are returned by `predict_samples`.
+
     Args:
         rng_seed (int): Random number generator seed.
-        method (str): Inference method to use. Currently, only "mcmc" is supported.
+        method (str): Inference method to use. Either "mcmc", "map", "lbfgs", "laplace", "vi" or
+            "conjugate".
         num_samples (int): Number of MCMC samples to draw.
         num_warmup (int): Number of warmup steps for MCMC.
         num_chains (int): Number of MCMC chains to run.
+        mcmc_chain_method (str): How MCMC chains are run: "sequential", "parallel" or "vectorized".
+        mcmc_init_steps (int): Maximum number of L-BFGS iterations of the MAP pre-fit from which the
+            chains start, no pre-fit if None.
+        mcmc_init_mass_matrix (bool): Whether the initial mass matrix of NUTS is derived from the
+            curvature at the MAP pre-fit.
+        mcmc_exclude_deterministic (bool): Whether deterministic sites are left out of the MCMC
+            samples, and recomputed at predict time.
+        mcmc_thinning (int): Only every `mcmc_thinning`-th MCMC sample of each chain is kept.
+        max_predict_samples (int): Maximum number of posterior samples used at predict time.
+        storage_dtype (str): Floating point dtype, such as "float32" or "bfloat16", in which the
+            posterior and predictive samples are stored, full precision if None.
+        predict_batch_size (int): Number of samples generated per batch at predict time.
+        predict_memory_limit (int): Memory budget in bytes used to derive the predict batch size.
+        compilation_cache_dir (str): Directory of JAX's persistent compilation cache, disabled if None.
+            Enabling it changes JAX's configuration for the whole process, see `InferenceEngine`.
+        optimizer_tol (float): Relative loss improvement below which MAP optimization stops early.
+        optimizer_patience (int): Number of steps without loss improvement after which MAP
+            optimization stops early.
+        optimizer_num_starts (int): Number of MAP optimizations run in parallel from different
+            initial values, the one with the lowest final loss being kept.
+        optimizer_checkpoint_path (str): File where the MAP optimization state is periodically saved.
+        optimizer_resume (bool): Whether MAP optimization resumes from `optimizer_checkpoint_path`.
+        optimizer_batch_size (int): Number of timepoints on which the likelihood is evaluated at each
+            optimization step, for "map" and "vi". The full loss is evaluated every 1000 steps.
+        warm_start (bool): Whether `update` refits on all the data seen so far starting from the
+            parameters of the current fit (and, for MCMC, from its adapted step size and mass
+            matrix). `fit` always starts from scratch.
+        init_strategy (str): Initial values of the parameters when not warm starting, either
+            "prior_mean" or "least_squares" (see `least_squares_init_values`).
+        standardize_design (bool): Whether the changepoint and linear effect coefficients are
+            inferred in units scaled by the magnitude of their design columns (see `ScaleReparam`).
+        time_budget (float): Seconds after which "map", "vi", "laplace" and "mcmc" inference stop,
+            keeping the best parameters or the samples drawn so far, no limit if None.
+        posterior_draws (int): Number of samples drawn from the approximate posterior, for "laplace",
+            "vi" and "conjugate".
+        vi_guide (str): Variational family used by "vi", see `VIInferenceEngine`.
+        vi_num_particles (int): Number of particles of the ELBO estimator used by "vi".
         
         *args: Additional positional arguments.
         **kwargs: Additional keyword arguments.
@@ -49,6 +145,29 @@ class BaseBayesianForecaster(BaseForecaster):
         optimizer_steps,
         optimizer_name,
         optimizer_kwargs,
+        optimizer_tol=None,
+        optimizer_patience=None,
+        optimizer_num_starts=1,
+        optimizer_checkpoint_path=None,
+        optimizer_resume=False,
+        optimizer_batch_size=None,
+        warm_start=False,
+        init_strategy="prior_mean",
+        standardize_design=False,
+        time_budget=None,
+        posterior_draws=1000,
+        vi_guide="AutoNormal",
+        vi_num_particles=1,
+        mcmc_chain_method="sequential",
+        mcmc_init_steps=None,
+        mcmc_init_mass_matrix=False,
+        mcmc_exclude_deterministic=False,
+        mcmc_thinning=1,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
         *args,
         **kwargs,
     ):
@@ -57,10 +176,33 @@ class BaseBayesianForecaster(BaseForecaster):
         self.mcmc_samples = mcmc_samples
         self.mcmc_warmup = mcmc_warmup
         self.mcmc_chains = mcmc_chains
+        self.mcmc_chain_method = mcmc_chain_method
+        self.mcmc_init_steps = mcmc_init_steps
+        self.mcmc_init_mass_matrix = mcmc_init_mass_matrix
+        self.mcmc_exclude_deterministic = mcmc_exclude_deterministic
+        self.mcmc_thinning = mcmc_thinning
+        self.predict_batch_size = predict_batch_size
+        self.predict_memory_limit = predict_memory_limit
+        self.compilation_cache_dir = compilation_cache_dir
+        self.max_predict_samples = max_predict_samples
+        self.storage_dtype = storage_dtype
         self.inference_method = inference_method
         self.optimizer_steps = optimizer_steps
         self.optimizer_name = optimizer_name
         self.optimizer_kwargs = optimizer_kwargs
+        self.optimizer_tol = optimizer_tol
+        self.optimizer_patience = optimizer_patience
+        self.optimizer_num_starts = optimizer_num_starts
+        self.optimizer_checkpoint_path = optimizer_checkpoint_path
+        self.optimizer_resume = optimizer_resume
+        self.optimizer_batch_size = optimizer_batch_size
+        self.warm_start = warm_start
+        self.init_strategy = init_strategy
+        self.standardize_design = standardize_design
+        self.time_budget = time_budget
+        self.posterior_draws = posterior_draws
+        self.vi_guide = vi_guide
+        self.vi_num_particles = vi_num_particles
         self._sample_sites = set()
         super().__init__(*args, **kwargs)
         self.predictive_samples_ = None
@@ -115,6 +257,21 @@ class BaseBayesianForecaster(BaseForecaster):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    def _get_time_inputs(self, t):
+        """
+        Get the time-dependent inputs of the Numpyro model.
+
+        This method should be implemented by subclasses, with JAX operations only, so that it
+        can be traced by `export_predict`.
+
+        Args:
+            t (jnp.ndarray): Days since epoch of the timepoints, with shape (n_timepoints,).
+
+        Returns:
+            Dict[str, jnp.ndarray]: The "t" and "changepoint_matrix" inputs of the model.
+        """
+        raise NotImplementedError("Must be implemented by subclass")
+
     def model(self, *args, **kwargs):
         """
         Numpyro model.
@@ -130,7 +287,7 @@ class BaseBayesianForecaster(BaseForecaster):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
-    def _fit(self, y, X, fh):
+    def _fit(self, y, X, fh, warm_start_state=None):
         """
         Fit the Bayesian forecaster to the training data.
 
@@ -138,35 +295,418 @@ class BaseBayesianForecaster(BaseForecaster):
             y (pd.DataFrame): Target variable.
             X (pd.DataFrame): Exogenous variables.
             fh (ForecastingHorizon): Forecasting horizon.
+            warm_start_state (Optional[Dict[str, Any]]): State of a previous fit to start from,
+                as returned by `_get_warm_start_state`. Defaults to None.
 
         Returns:
             self: The fitted Bayesian forecaster.
         """
 
         self._set_y_scales(y)
+        if warm_start_state is not None and _same_scale_index(
+            warm_start_state["y_scale"], self._scale
+        ):
+            # The previous parameters are expressed in the scale of the previous fit
+            self._scale = warm_start_state["y_scale"]
         y  = self._scale_y(y)
 
         data = self._get_fit_data(y, X, fh)
 
         self.distributions_ = data.get("distributions", {})
+        warm_start_kwargs = self._get_warm_start_kwargs(warm_start_state)
+        if self.init_strategy not in ("prior_mean", "least_squares"):
+            raise ValueError(f"Unknown init_strategy {self.init_strategy}")
+        if (
+            self.init_strategy == "least_squares"
+            and self.inference_method != "conjugate"
+            and "init_values" not in warm_start_kwargs
+        ):
+            warm_start_kwargs["init_values"] = least_squares_init_values(
+                self.model, self.rng_key, **{**data, "subsample_size": None}
+            )
+
+        minibatch_kwargs = {}
+        if self.optimizer_batch_size is not None:
+            if self.inference_method not in ("map", "vi"):
+                raise ValueError(
+                    "optimizer_batch_size is only supported by the map and vi inference methods"
+                )
+            data["subsample_size"] = self.optimizer_batch_size
+            minibatch_kwargs["full_loss_kwargs"] = {"subsample_size": None}
+
+        if self.time_budget is not None and self.inference_method not in (
+            "map",
+            "vi",
+            "laplace",
+            "mcmc",
+        ):
+            raise ValueError(
+                "time_budget is only supported by the map, vi, laplace and mcmc inference methods"
+            )
 
         if self.inference_method == "mcmc":
-            self.inference_engine_ = MCMCInferenceEngine(self.model, num_samples=self.mcmc_samples, num_warmup=self.mcmc_warmup, num_chains=self.mcmc_chains, rng_key=self.rng_key)
+            self.inference_engine_ = MCMCInferenceEngine(
+                self.model,
+                num_samples=self.mcmc_samples,
+                num_warmup=self.mcmc_warmup,
+                num_chains=self.mcmc_chains,
+                chain_method=self.mcmc_chain_method,
+                init_steps=self.mcmc_init_steps,
+                init_mass_matrix=self.mcmc_init_mass_matrix,
+                exclude_deterministic=self.mcmc_exclude_deterministic,
+                thinning=self.mcmc_thinning,
+                rng_key=self.rng_key,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                time_budget=self.time_budget,
+                **warm_start_kwargs,
+            )
         elif self.inference_method == "map":
             self.inference_engine_ = MAPInferenceEngine(
                 self.model,
                 rng_key=self.rng_key,
                 optimizer=self.optimizer,
                 num_steps=self.optimizer_steps,
+                convergence_tol=self.optimizer_tol,
+                patience=self.optimizer_patience,
+                num_starts=self.optimizer_num_starts,
+                checkpoint_path=self.optimizer_checkpoint_path,
+                resume=self.optimizer_resume,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                time_budget=self.time_budget,
+                **minibatch_kwargs,
+                **warm_start_kwargs,
+            )
+        elif self.inference_method == "lbfgs":
+            lbfgs_kwargs = {}
+            if self.optimizer_tol is not None:
+                lbfgs_kwargs["tol"] = self.optimizer_tol
+            self.inference_engine_ = LBFGSInferenceEngine(
+                self.model,
+                rng_key=self.rng_key,
+                num_steps=self.optimizer_steps,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                **lbfgs_kwargs,
+                **warm_start_kwargs,
+            )
+        elif self.inference_method == "laplace":
+            self.inference_engine_ = LaplaceInferenceEngine(
+                self.model,
+                rng_key=self.rng_key,
+                optimizer=self.optimizer,
+                num_steps=self.optimizer_steps,
+                num_samples=self.posterior_draws,
+                convergence_tol=self.optimizer_tol,
+                patience=self.optimizer_patience,
+                checkpoint_path=self.optimizer_checkpoint_path,
+                resume=self.optimizer_resume,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                time_budget=self.time_budget,
+                **warm_start_kwargs,
+            )
+        elif self.inference_method == "vi":
+            self.inference_engine_ = VIInferenceEngine(
+                self.model,
+                guide_name=self.vi_guide,
+                num_particles=self.vi_num_particles,
+                rng_key=self.rng_key,
+                optimizer=self.optimizer,
+                num_steps=self.optimizer_steps,
+                num_samples=self.posterior_draws,
+                convergence_tol=self.optimizer_tol,
+                patience=self.optimizer_patience,
+                checkpoint_path=self.optimizer_checkpoint_path,
+                resume=self.optimizer_resume,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                time_budget=self.time_budget,
+                **minibatch_kwargs,
+                **warm_start_kwargs,
+            )
+        elif self.inference_method == "conjugate":
+            self.inference_engine_ = ConjugateInferenceEngine(
+                self.model,
+                num_samples=self.posterior_draws,
+                rng_key=self.rng_key,
+                predict_batch_size=self.predict_batch_size,
+                predict_memory_limit=self.predict_memory_limit,
+                compilation_cache_dir=self.compilation_cache_dir,
+                max_predict_samples=self.max_predict_samples,
+                storage_dtype=self.storage_dtype,
+                **warm_start_kwargs,
             )
         else:
             raise ValueError(f"Unknown method {self.inference_method}")
 
         self.inference_engine_.infer(**data)
-        self.posterior_samples_ = self.inference_engine_.posterior_samples_
+        # Sites sampled in scaled units are also returned in their own units
+        self.posterior_samples_ = unscale_sites(
+            self.inference_engine_.posterior_samples_,
+            self.fit_and_predict_data_.get("reparam_scales"),
+            keep_scaled=True,
+        )
+
+        return self
+
+    def get_nbytes(self):
+        """
+        Get the number of bytes held by the fitted forecaster.
+
+        This counts the arrays of the fitted inference engine (posterior and predictive samples,
+        fitted parameters), the last predictive samples, and the fit and predict data. Arrays
+        shared between them are counted once. Use `storage_dtype`, `max_predict_samples` and,
+        for MCMC, `mcmc_thinning` and `mcmc_exclude_deterministic` to reduce it.
+
+        Returns:
+            int: The number of bytes.
+        """
+        self.check_is_fitted()
+        seen = set()
+        count = 0
+        if hasattr(self, "inference_engine_"):
+            count += self.inference_engine_.get_nbytes(seen)
+        for name in (
+            "posterior_samples_",
+            "predictive_samples_",
+            "fit_and_predict_data_",
+        ):
+            count += nbytes(getattr(self, name, None), seen)
+        return count
+
+    def _update(self, y, X=None, update_params=True):
+        """
+        Update the forecaster with new data.
+
+        When `warm_start` is set and `update_params` is True, the forecaster is refitted on all
+        the data seen so far, starting from the parameters of the current fit. Otherwise, the
+        default sktime behaviour applies, which refits from scratch.
+
+        Args:
+            y (pd.DataFrame): New values of the target variable.
+            X (pd.DataFrame, optional): New values of the exogenous variables. Defaults to None.
+            update_params (bool, optional): Whether the parameters are updated. Defaults to True.
+
+        Returns:
+            self: The updated forecaster.
+        """
+        if not (self.warm_start and update_params):
+            return super()._update(y, X=X, update_params=update_params)
+        self._fit(self._y, self._X, self._fh, warm_start_state=self._get_warm_start_state())
+        return self
+
+    def save(self, path):
+        """
+        Save what prediction needs to a compact, pickle-free npz file.
+
+        The file holds the posterior samples of the latent sites, the fitted state (time
+        scaling, changepoint times, y scales, trend priors, hierarchy and indexes), and the
+        hyperparameters, including the effect configuration, as JSON. The values of the training
+        data, the fitted inference engine and the fitted transformers are not saved: `load`
+        refits the transformers on zeros with the training index, which is exact for calendar
+        features such as Fourier terms.
+
+        Args:
+            path (str): Path of the file.
+
+        Raises:
+            TypeError: If a hyperparameter cannot be saved, see `prophetverse.utils.serialization.encode`.
+        """
+        self.check_is_fitted()
+        if not hasattr(self, "inference_engine_"):
+            raise ValueError(
+                "Only forecasters fitted on the series they model can be saved; for a "
+                "forecaster broadcast over several series, save those in `forecasters_`."
+            )
+
+        arrays = {}
+        timepoints = self._y.index.get_level_values(-1)
+        metadata = {
+            "class": f"{type(self).__module__}.{type(self).__qualname__}",
+            "params": encode(self.get_params(deep=False), arrays),
+            "point_estimate": self.inference_engine_.point_estimate,
+            "posterior_samples": encode(
+                dict(self.inference_engine_.get_latent_samples()), arrays
+            ),
+            "state": encode(self._get_fitted_state(), arrays),
+            "sktime_state": encode(
+                {
+                    "cutoff": self._cutoff,
+                    "y_index": self._y.index[timepoints == timepoints.max()],
+                    "y_columns": self._y.columns,
+                },
+                arrays,
+            ),
+        }
+        np.savez(path, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a forecaster saved with `save`.
+
+        The forecaster is restored from the saved state, without fitting. Only the forecasters
+        of prophetverse, and the classes registered in `prophetverse.utils.serialization`, can
+        be loaded, so that no arbitrary code runs.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            BaseBayesianForecaster: The fitted forecaster.
+        """
+        with np.load(path) as arrays:
+            metadata = json.loads(str(arrays["metadata"]))
+            module, _, name = metadata["class"].rpartition(".")
+            if module.split(".")[0] != "prophetverse":
+                raise ValueError(f"Cannot load {metadata['class']}")
+            forecaster_cls = getattr(importlib.import_module(module), name, None)
+            if not inspect.isclass(forecaster_cls) or not issubclass(forecaster_cls, cls):
+                raise TypeError(f"{metadata['class']} is not a subclass of {cls.__name__}")
+
+            forecaster = forecaster_cls(**decode(metadata["params"], arrays))
+            forecaster._restore(
+                {
+                    "point_estimate": metadata["point_estimate"],
+                    "posterior_samples": decode(metadata["posterior_samples"], arrays),
+                    "state": decode(metadata["state"], arrays),
+                    "sktime_state": decode(metadata["sktime_state"], arrays),
+                }
+            )
+        return forecaster
+
+    def _restore(self, loaded_state):
+        """
+        Restore a forecaster from the state saved by `save`.
+
+        The sktime state is set from zeros at the last saved timepoint, which carry the index
+        and columns that prediction needs, and the saved cutoff.
+
+        Args:
+            loaded_state (dict): The decoded state, see `load`.
 
+        Returns:
+            self: The fitted forecaster.
+        """
+        sktime_state = loaded_state["sktime_state"]
+        y = pd.DataFrame(0.0, index=sktime_state["y_index"], columns=sktime_state["y_columns"])
+        _, y_inner = self._check_X_y(X=None, y=y)
+        self._update_y_X(y_inner, None)
+        self._set_cutoff(sktime_state["cutoff"])
+        self._is_vectorized = False
+
+        self.distributions_ = {}
+        self._set_fitted_state(loaded_state["state"])
+        posterior_samples = {
+            name: jnp.asarray(value)
+            for name, value in loaded_state["posterior_samples"].items()
+        }
+        self.inference_engine_ = PosteriorSamplesInferenceEngine(
+            self.model,
+            posterior_samples,
+            point_estimate=loaded_state["point_estimate"],
+            rng_key=self.rng_key,
+            predict_batch_size=self.predict_batch_size,
+            predict_memory_limit=self.predict_memory_limit,
+            max_predict_samples=self.max_predict_samples,
+            storage_dtype=self.storage_dtype,
+        )
+        self.posterior_samples_ = self.inference_engine_.posterior_samples_
+        self._is_fitted = True
         return self
 
+    def _get_fitted_state(self):
+        """
+        Get the fitted state needed for prediction, see `save`.
+
+        This method should be implemented by subclasses.
+
+        Returns:
+            Dict[str, Any]: The state, made of values supported by `prophetverse.utils.serialization.encode`.
+        """
+        raise NotImplementedError("Must be implemented by subclass")
+
+    def _set_fitted_state(self, state):
+        """
+        Set the fitted state returned by `_get_fitted_state`.
+
+        This method should be implemented by subclasses.
+
+        Args:
+            state (Dict[str, Any]): The state.
+        """
+        raise NotImplementedError("Must be implemented by subclass")
+
+    def _get_warm_start_state(self):
+        """
+        Get the state of the current fit that a warm-started refit starts from.
+
+        Returns:
+            Dict[str, Any]: The y scales, the number of changepoints per series, the scales of the
+            reparametrized sites and the initialization arguments of the fitted inference engine.
+        """
+        return {
+            "n_changepoint_per_series": self.n_changepoint_per_series,
+            "y_scale": self._scale,
+            "reparam_scales": self.fit_and_predict_data_.get("reparam_scales"),
+            "engine_kwargs": self.inference_engine_.get_warm_start_kwargs(),
+        }
+
+    def _get_warm_start_kwargs(self, state):
+        """
+        Get the inference engine arguments that initialize this fit from the previous one.
+
+        If the number of changepoints changed, the changepoint coefficients are padded with zeros
+        or trimmed series by series, and the MCMC inverse mass matrix, whose shape no longer
+        matches, is discarded. Values of sites sampled in scaled units (see `standardize_design`)
+        are converted to the scales of this fit.
+
+        Args:
+            state (Optional[Dict[str, Any]]): The state returned by `_get_warm_start_state`.
+
+        Returns:
+            Dict[str, Any]: Keyword arguments for the inference engine, empty if `state` is None.
+        """
+        if state is None:
+            return {}
+
+        engine_kwargs = dict(state["engine_kwargs"])
+        if "init_values" not in engine_kwargs:
+            return engine_kwargs
+
+        reparam_scales = self.fit_and_predict_data_.get("reparam_scales")
+        if set(reparam_scales or {}) != set(state["reparam_scales"] or {}):
+            engine_kwargs.pop("inverse_mass_matrix", None)
+        init_values = unscale_sites(engine_kwargs["init_values"], state["reparam_scales"])
+        n_changepoint_per_series = state["n_changepoint_per_series"]
+        if n_changepoint_per_series != self.n_changepoint_per_series:
+            if len(n_changepoint_per_series) == len(self.n_changepoint_per_series):
+                init_values["changepoint_coefficients"] = resize_changepoint_coefficients(
+                    init_values["changepoint_coefficients"],
+                    n_changepoint_per_series,
+                    self.n_changepoint_per_series,
+                )
+            engine_kwargs.pop("inverse_mass_matrix", None)
+        engine_kwargs["init_values"] = scale_sites(init_values, reparam_scales)
+        return engine_kwargs
+
     def _predict(self, fh, X):
         """
         Generate point forecasts for the given forecasting horizon.
@@ -178,14 +718,38 @@ class BaseBayesianForecaster(BaseForecaster):
         Returns:
             pd.DataFrame: Point forecasts for the forecasting horizon.
         """
-        predictive_samples = self.predict_samples(fh=fh, X=X)
-        self.forecast_samples_ = predictive_samples
-        y_pred = predictive_samples.mean(axis=1).to_frame(self._y.columns[0])
+        fh_as_index = self.fh_to_index(fh)
+        predict_data = self._get_predict_data(X=X, fh=fh)
+        if self.inference_engine_.point_estimate:
+            # A single parameter value: evaluate the model once instead of sampling
+            point_predictions = self.inference_engine_.predict_point(
+                return_sites=("obs",), **predict_data
+            )
+        else:
+            point_predictions = self.inference_engine_.predict(
+                return_sites=("obs",), mean=True, **predict_data
+            )
+        predictions = self._predictive_samples_to_frame(
+            point_predictions["obs"], fh_as_index
+        )
+
+        y_pred = predictions.mean(axis=1).to_frame(self._y.columns[0])
 
         return y_pred
 
-    def predict_all_sites(self, fh, X=None):
+    def predict_all_sites(self, fh, X=None, return_sites=None):
+        """
+        Predict the mean of the sites of the model, such as "obs", "trend_" and the effects.
+
+        Args:
+            fh (ForecastingHorizon): Forecasting horizon.
+            X (pd.DataFrame, optional): Exogenous variables. Defaults to None.
+            return_sites (Sequence[str], optional): Names of the sites to predict. Defaults to
+                None, for all sites.
 
+        Returns:
+            pd.DataFrame: Mean predictions of the sites, one column per site.
+        """
         if not isinstance(fh, ForecastingHorizon):
             fh = self._check_fh(fh)
 
@@ -193,10 +757,17 @@ class BaseBayesianForecaster(BaseForecaster):
 
         predict_data = self._get_predict_data(X=X,fh= fh)
 
-        predictive_samples_ = self.inference_engine_.predict(**predict_data)
+        if self.inference_engine_.point_estimate:
+            predictive_samples_ = self.inference_engine_.predict_point(
+                return_sites=return_sites, **predict_data
+            )
+        else:
+            predictive_samples_ = self.inference_engine_.predict(
+                return_sites=return_sites, mean=True, **predict_data
+            )
         out = pd.DataFrame(
             data={
-                site: data.mean(axis=0).flatten()
+                site: _as_float(data).mean(axis=0).flatten()
                 for site, data in predictive_samples_.items()
             },
             index=self.periodindex_to_multiindex(fh_as_index),
@@ -211,6 +782,8 @@ class BaseBayesianForecaster(BaseForecaster):
         """
         Generate samples from the posterior predictive distribution.
 
+        Only the "obs" site is sampled, see `predict_all_sites` for the other sites.
+
         Args:
             X (pd.DataFrame): Exogenous variables.
             fh (ForecastingHorizon): Forecasting horizon.
@@ -222,10 +795,100 @@ class BaseBayesianForecaster(BaseForecaster):
 
         predict_data = self._get_predict_data(X=X, fh=fh)
 
-        self.predictive_samples_ = self.inference_engine_.predict(**predict_data)
+        self.predictive_samples_ = self.inference_engine_.predict(
+            return_sites=("obs",), **predict_data
+        )
+
+        return self._predictive_samples_to_frame(
+            self.predictive_samples_["obs"], fh_as_index
+        )
+
+    def export_predict(self, fh, X=None):
+        """
+        Export the predict computation, for serving without this forecaster.
+
+        The exported function maps the timepoints of a horizon, as days since epoch, and the
+        exogenous arrays to predictions in the original scale. The fitted parameters, the scales
+        of the series and the time scaling are embedded in it, so that it can be serialized and
+        run with `jax` only, see `prophetverse.utils.export.ExportedPredict`. Its input shapes are
+        fixed: the horizon must have the length of `fh`, and the exogenous arrays the shapes they
+        have for `fh` and `X`.
+
+        Point estimates ("map", "lbfgs") give the mean of the observations at the fitted
+        parameters, other inference methods give one predictive sample for each posterior
+        sample. Only the bottom series are predicted.
+
+        Args:
+            fh (ForecastingHorizon): Forecasting horizon.
+            X (pd.DataFrame, optional): Exogenous variables. Defaults to None.
+
+        Returns:
+            ExportedPredict: The exported predict function.
+
+        Raises:
+            ImportError: If the installed jax is older than 0.4.30, which added `jax.export`.
+        """
+        self.check_is_fitted()
+        if not isinstance(fh, ForecastingHorizon):
+            fh = self._check_fh(fh)
+
+        fh_as_index = self.fh_to_index(fh)
+        predict_data = self._get_predict_data(X=X, fh=fh)
+        exogenous_data = predict_data.pop("data")
+        for key in ("t", "changepoint_matrix"):
+            predict_data.pop(key)
+
+        predict_fn = self.inference_engine_.get_predict_function(return_sites=("obs",))
+        y_scale = self._get_y_scale_array(fh_as_index)
+
+        def exported_predict(rng_key, t, data):
+            predictive_samples = predict_fn(
+                rng_key,
+                data=data if exogenous_data is not None else None,
+                **self._get_time_inputs(t),
+                **predict_data,
+            )
+            return predictive_samples["obs"] * y_scale
 
-        observation_site = self.predictive_samples_["obs"]
-        n_samples = self.predictive_samples_["obs"].shape[0]
+        t = jnp.asarray(
+            convert_index_to_days_since_epoch(pd.Index(list(fh_as_index.to_numpy())))
+        )
+        return ExportedPredict.from_function(
+            exported_predict,
+            self.inference_engine_.rng_key,
+            t,
+            exogenous_data if exogenous_data is not None else {},
+        )
+
+    def _get_y_scale_array(self, fh_as_index):
+        """
+        Get the scales of the bottom series, in the order of the last axis of the observations.
+
+        Args:
+            fh_as_index (pd.Index): Index of the forecasting horizon.
+
+        Returns:
+            jnp.ndarray: A scalar if there is a single series, else an array of shape (n_series,).
+        """
+        if self._y.index.nlevels == 1:
+            return jnp.asarray(self._scale)
+        series = self.periodindex_to_multiindex(fh_as_index).droplevel(-1).unique()
+        return jnp.asarray(self._scale.loc[series].values.flatten())
+
+    def _predictive_samples_to_frame(self, observation_site, fh_as_index):
+        """
+        Convert samples of the observation site to a DataFrame in the original scale.
+
+        Args:
+            observation_site (jnp.ndarray): Samples of the observation site, with the samples
+                in the first axis.
+            fh_as_index (pd.Index): Index of the forecasting horizon.
+
+        Returns:
+            pd.DataFrame: Samples with one column per sample.
+        """
+        observation_site = _as_float(observation_site)
+        n_samples = observation_site.shape[0]
         preds = pd.DataFrame(
             data=observation_site.T.reshape((-1, n_samples)),
             columns=list(range(n_samples)),
@@ -444,6 +1107,27 @@ class ExogenousEffectMixin:
 
         self._exogenous_effects_and_columns = effects_and_columns
 
+    def _get_reparam_scales(self, changepoint_matrix, exogenous_data):
+        """
+        Get the scales of the coefficients inferred in scaled units, see `standardize_design`.
+
+        Args:
+            changepoint_matrix (jnp.ndarray): The changepoint matrix of the fit.
+            exogenous_data (dict): The exogenous data arrays of the fit, by effect.
+
+        Returns:
+            Optional[dict]: The magnitude of the design column of each changepoint coefficient and
+            of each coefficient of the linear effects, by site name, or None if
+            `standardize_design` is not set.
+        """
+        if not self.standardize_design:
+            return None
+        scales = {"changepoint_coefficients": get_column_scales(changepoint_matrix)}
+        for effect_name, (_, effect) in self._exogenous_effects_and_columns.items():
+            if isinstance(effect, LinearEffect) and effect_name in exogenous_data:
+                scales[f"{effect.id}__coefs"] = get_column_scales(exogenous_data[effect_name])
+        return scales
+
     def _get_exogenous_data_array(self, X):
 
         out = {}
@@ -28,6 +28,7 @@ from prophetverse.utils.frame_to_array import (
 )
 from prophetverse.models.multivariate_model.multiindex import reindex_time_series
 from prophetverse.utils.logistic import suggest_logistic_rate_and_offset
+from prophetverse.utils.sharding import get_series_sharding, shard_series
 from prophetverse.sktime.base import (
     BaseBayesianForecaster,
     ExogenousEffectMixin,
@@ -76,10 +77,81 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
         mcmc_samples (int): Number of MCMC samples to draw. Defaults to 2000.
         mcmc_warmup (int): Number of warmup steps for MCMC. Defaults to 200.
         mcmc_chains (int): Number of MCMC chains. Defaults to 4.
-        inference_method (str): Inference method to use. Either "map" or "mcmc". Defaults to "map".
+        mcmc_chain_method (str): How MCMC chains are run. Either "sequential", "parallel" (one chain per
+            device) or "vectorized". Defaults to "sequential".
+        mcmc_init_steps (int): If set, a MAP pre-fit of at most this many L-BFGS iterations is run before
+            MCMC, and the chains start around its solution, which allows a much shorter `mcmc_warmup`.
+            Defaults to None.
+        mcmc_init_mass_matrix (bool): If True, the initial mass matrix of NUTS is derived from the curvature
+            of the posterior at the MAP pre-fit. Only used if `mcmc_init_steps` is set. Defaults to False.
+        mcmc_exclude_deterministic (bool): If True, the deterministic sites (trend and effects, one value per
+            timepoint and series) are not recorded for each MCMC draw, and are recomputed from the latent
+            samples when predicting them, for instance with `predict_all_sites`. Defaults to False.
+        mcmc_thinning (int): Only every `mcmc_thinning`-th MCMC sample of each chain is kept. Defaults to 1.
+        inference_method (str): Inference method to use. Either "map", "mcmc", "lbfgs" (MAP with L-BFGS,
+            where `optimizer_steps` is the maximum number of iterations and `optimizer_tol` the gradient
+            tolerance), "laplace" (MAP followed by a Gaussian approximation of the posterior around it) or
+            "vi" (variational inference with the `vi_guide` family) or "conjugate" (closed-form Gaussian posterior,
+            for a linear trend, additive linear effects and `correlation_matrix_concentration=None`, see
+            `ConjugateInferenceEngine`). Defaults to "map".
         optimizer_name (str): Name of the optimizer to use. Defaults to "Adam".
         optimizer_kwargs (dict): Additional keyword arguments for the optimizer. Defaults to {"step_size": 1e-4}.
         optimizer_steps (int): Number of optimization steps. Defaults to 100_000.
+        optimizer_tol (float): If set, MAP optimization stops once the relative loss improvement between
+            two convergence checks falls below this value. Defaults to None.
+        optimizer_patience (int): If set, MAP optimization stops once the loss has not improved for this
+            number of steps. Defaults to None.
+        optimizer_num_starts (int): Number of MAP optimizations run in parallel from different initial
+            values, the parameters with the lowest final loss being kept. Defaults to 1.
+        optimizer_checkpoint_path (str): If set, the state of MAP optimization is saved to this file every
+            1000 steps, so that an interrupted fit can be resumed. Defaults to None.
+        optimizer_resume (bool): If True and `optimizer_checkpoint_path` exists, MAP optimization resumes
+            from it instead of starting over. Defaults to False.
+        optimizer_batch_size (int): If set, each step of "map" or "vi" optimization evaluates the likelihood
+            on a random minibatch of this many timepoints, shared by all series and rescaled to the whole
+            series. The full loss is evaluated every 1000 steps and used by the stopping criteria.
+            Defaults to None.
+        warm_start (bool): If True, `update` refits starting from the parameters of the current fit. Changes
+            in the number of changepoints are handled by padding or trimming the changepoint
+            coefficients of each series. Defaults to False.
+        init_strategy (str): Initial values of the parameters of a fit that is not warm started. Either
+            "prior_mean", or "least_squares", which fits the offsets, changepoint coefficients and linear effect
+            coefficients to the scaled data by ridge-regularized least squares, so that optimization and MCMC
+            start near the optimum. Defaults to "prior_mean".
+        standardize_design (bool): If True, the changepoint coefficients and the coefficients of linear effects
+            are inferred in units scaled by the root mean square of their column of the changepoint matrix or of
+            the exogenous features, so that they all have a similar curvature, which lets optimization converge
+            in far fewer steps at larger step sizes. The priors, the posterior sites and the predictions are
+            unchanged, with the scaled coefficients added as `{name}_scaled` sites. Defaults to False.
+        time_budget (float): If set, wall-clock budget in seconds of "map", "vi", "laplace" and "mcmc" inference,
+            compilation included. Optimization runs in chunks of 1000 steps until the budget is spent, keeping
+            the parameters with the lowest loss, and MCMC draws samples in blocks after the warmup, keeping
+            the samples drawn so far. `optimizer_steps` and `mcmc_samples` remain upper bounds. Whether the
+            convergence criteria were met is reported by `inference_engine_.telemetry_`. Defaults to None.
+        posterior_draws (int): Number of samples drawn from the approximate posterior, with "laplace",
+            "vi" or "conjugate". Defaults to 1000.
+        vi_guide (str): Variational family used with "vi". Either "AutoNormal" (mean-field),
+            "AutoLowRankMultivariateNormal" or "AutoMultivariateNormal". Defaults to "AutoNormal".
+        vi_num_particles (int): Number of particles used to estimate the ELBO with "vi". Defaults to 1.
+        predict_batch_size (int): If set, predictive samples are generated in batches of this size. Defaults to None.
+        predict_memory_limit (int): If set, memory budget in bytes from which the predictive batch size is derived.
+            Defaults to None.
+        compilation_cache_dir (str): If set, JAX's persistent compilation cache is enabled in this directory, so
+            that new processes fitting the same model structure on data of the same shape skip compilation.
+            This changes JAX's configuration for the whole process, see `InferenceEngine`. Defaults to None.
+        max_predict_samples (int): If set, at most this number of posterior samples, evenly spaced, are used
+            at predict time (and at most this number of predictive samples are drawn for point estimates).
+            Defaults to None.
+        storage_dtype (str): If set, for instance "float32" or "bfloat16", the posterior and predictive samples
+            are stored in this dtype, to reduce the memory held by the fitted model. See `get_nbytes`.
+            Defaults to None.
+        num_devices (int): If set, the series axis of the time, target, changepoint and exogenous arrays
+            is split over this number of devices, and the other inputs are replicated, so that the model is
+            evaluated data-parallel over the series. On CPU, the devices must be exposed before importing
+            `prophetverse.sktime`, with `prophetverse.utils.sharding.set_host_device_count`. The number of series must be divisible by the
+            number of devices used, which is reduced to the largest divisor otherwise. This speeds up
+            optimization-based inference and prediction; the MCMC sampler embeds the data in its compiled
+            function, so it does not benefit from it. Defaults to None.
         noise_scale (float): Scale parameter for the noise. Defaults to 0.05.
         correlation_matrix_concentration (float): Concentration parameter for the correlation matrix. Defaults to 1.0.
         rng_key (jax.random.PRNGKey): Random number generator key. Defaults to random.PRNGKey(24).
@@ -122,10 +194,34 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
         mcmc_samples=2000,
         mcmc_warmup=200,
         mcmc_chains=4,
+        mcmc_chain_method="sequential",
+        mcmc_init_steps=None,
+        mcmc_init_mass_matrix=False,
+        mcmc_exclude_deterministic=False,
+        mcmc_thinning=1,
         inference_method="map",
         optimizer_name="Adam",
         optimizer_kwargs={"step_size": 1e-4},
         optimizer_steps=100_000,
+        optimizer_tol=None,
+        optimizer_patience=None,
+        optimizer_num_starts=1,
+        optimizer_checkpoint_path=None,
+        optimizer_resume=False,
+        optimizer_batch_size=None,
+        warm_start=False,
+        init_strategy="prior_mean",
+        standardize_design=False,
+        time_budget=None,
+        posterior_draws=1000,
+        vi_guide="AutoNormal",
+        vi_num_particles=1,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
+        num_devices=None,
         noise_scale=0.05,
         correlation_matrix_concentration=1.0,
         rng_key=random.PRNGKey(24),
@@ -141,6 +237,7 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
         self.shared_features = shared_features
         self.feature_transformer = feature_transformer
         self.correlation_matrix_concentration = correlation_matrix_concentration
+        self.num_devices = num_devices
 
         super().__init__(
             rng_key=rng_key,
@@ -148,9 +245,32 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
             optimizer_name=optimizer_name,
             optimizer_kwargs=optimizer_kwargs,
             optimizer_steps=optimizer_steps,
+            optimizer_tol=optimizer_tol,
+            optimizer_patience=optimizer_patience,
+            optimizer_num_starts=optimizer_num_starts,
+            optimizer_checkpoint_path=optimizer_checkpoint_path,
+            optimizer_resume=optimizer_resume,
+            optimizer_batch_size=optimizer_batch_size,
+            warm_start=warm_start,
+            init_strategy=init_strategy,
+            standardize_design=standardize_design,
+            time_budget=time_budget,
+            posterior_draws=posterior_draws,
+            vi_guide=vi_guide,
+            vi_num_particles=vi_num_particles,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
             mcmc_samples=mcmc_samples,
             mcmc_warmup=mcmc_warmup,
             mcmc_chains=mcmc_chains,
+            mcmc_chain_method=mcmc_chain_method,
+            mcmc_init_steps=mcmc_init_steps,
+            mcmc_init_mass_matrix=mcmc_init_mass_matrix,
+            mcmc_exclude_deterministic=mcmc_exclude_deterministic,
+            mcmc_thinning=mcmc_thinning,
             default_effect=default_effect,
             exogenous_effects=exogenous_effects,
         )
@@ -210,54 +330,167 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
 
         # Setup time scale
         self._set_time_scale(t_arrays)
-        t_scaled = self._time_scaler.scale(t_arrays)
+        t_arrays = self._time_scaler.scale(t_arrays)
         # We use a single time array for all series, with shape (n_timepoints, 1)
-        t_scaled = t_scaled[0].reshape((-1, 1))
+        t_scaled = t_arrays[0].reshape((-1, 1))
         # Changepoints
         self._setup_changepoints(t_scaled=t_scaled)
         changepoint_matrix = self._get_changepoint_matrix(t_scaled)
 
         # Exog variables
+        exogenous_data = self._fit_exogenous(X, y.index)
+
+        self._set_fit_and_predict_data(
+            self._get_trend_sample_func(t_arrays=t_scaled, y_arrays=y_bottom_arrays),
+            self._get_reparam_scales(changepoint_matrix, exogenous_data),
+        )
+
+        return dict(
+            **self._shard_series(
+                dict(
+                    t=t_arrays,
+                    y=y_bottom_arrays,
+                    data=exogenous_data,
+                    changepoint_matrix=changepoint_matrix,
+                ),
+                series_args=("t", "y", "data", "changepoint_matrix"),
+            ),
+            **self.fit_and_predict_data_,
+        )
+
+    def _shard_series(self, data, series_args):
+        """
+        Split the arrays of the model inputs along the series axis over `num_devices` devices.
+
+        Args:
+            data (dict): The time, target, exogenous and changepoint arrays, keyed by model argument.
+            series_args (Tuple[str, ...]): The model arguments whose leading axis is the series
+                axis. The other arguments are replicated.
+
+        Returns:
+            dict: The same arrays, placed on the devices, or unchanged if `num_devices` is None.
+        """
+        if self.num_devices is None:
+            return data
+        sharding = get_series_sharding(self.n_series, self.num_devices)
+        return shard_series(data, sharding, series_args)
+
+    def _fit_exogenous(self, X, index):
+        """
+        Fit the exogenous transformers and match the exogenous effects to the features.
+
+        The index and columns of `X` are kept, so that `load` can refit the transformers.
 
+        Args:
+            X (pd.DataFrame): Exogenous variables, or None.
+            index (pd.MultiIndex): Index of the series and timepoints of the fit.
+
+        Returns:
+            dict: The exogenous data arrays of the bottom series at `index`, by effect.
+        """
         # If no exogenous variables, create empty DataFrame
         # Else, aggregate exogenous variables and transform them
         if (X is None or X.columns.empty) and self.feature_transformer is not None:
-            X = pd.DataFrame(index=y.index)
+            X = pd.DataFrame(index=index)
+
+        self._exogenous_index = None if X is None else X.index
+        self._exogenous_columns = None if X is None else list(X.columns)
+
         if self.feature_transformer is not None:
             X = self.feature_transformer.fit_transform(X)
         self._has_exogenous_variables = X is not None and not X.columns.empty
 
-        if self._has_exogenous_variables:
+        if not self._has_exogenous_variables:
+            self._exogenous_effects_and_columns = {}
+            return {}
 
-            self.expand_columns_transformer_ = ExpandColumnPerLevel(
-                X.columns.difference(self.shared_features)
-            ).fit(X)
-            X = X.loc[y.index]
-            X = self.expand_columns_transformer_.transform(X)
+        self.expand_columns_transformer_ = ExpandColumnPerLevel(
+            X.columns.difference(self.shared_features)
+        ).fit(X)
+        X = X.loc[index]
+        X = self.expand_columns_transformer_.transform(X)
 
-            self._set_custom_effects(feature_names=X.columns)
-            exogenous_data = self._get_exogenous_data_array(loc_bottom_series(X))
+        self._set_custom_effects(feature_names=X.columns)
+        return self._get_exogenous_data_array(loc_bottom_series(X))
 
-        else:
-            self._exogenous_effects_and_columns = {}
-            exogenous_data = {}
+    def _set_fit_and_predict_data(self, trend_sample_func, reparam_scales=None):
+        """
+        Set the model inputs that are used both in fit and predict.
 
+        Args:
+            trend_sample_func (Callable): Function that samples the trend parameters.
+            reparam_scales (dict, optional): Scales of the sites inferred in scaled units, see
+                `_get_reparam_scales`. Defaults to None.
+        """
         self.fit_and_predict_data_ = {
             "trend_mode": self.trend,
             "exogenous_effects": self.exogenous_effect_dict,
-            "init_trend_params": self._get_trend_sample_func(
-                t_arrays=t_scaled, y_arrays=y_bottom_arrays
-            ),
+            "init_trend_params": trend_sample_func,
             "correlation_matrix_concentration": self.correlation_matrix_concentration,
             "noise_scale": self.noise_scale,
+            "reparam_scales": reparam_scales,
         }
 
-        return dict(
-            t=t_scaled,
-            y=y_bottom_arrays,
-            data=exogenous_data,
-            changepoint_matrix=changepoint_matrix,
-            **self.fit_and_predict_data_,
+    def _get_fitted_state(self):
+        """
+        Get the fitted state needed for prediction, see `BaseBayesianForecaster.save`.
+
+        Returns:
+            dict: The hierarchy, time scaling, changepoints, y scales, trend priors and exogenous
+            features.
+        """
+        return {
+            "original_y_index": self.original_y_indexes_,
+            "y_index": self.full_y_indexes_,
+            "hierarchy_matrix": self.hierarchy_matrix,
+            "t_scale": self._time_scaler.t_scale,
+            "t_min": self._time_scaler.t_min,
+            "max_t": self.max_t,
+            "min_t": self.min_t,
+            "changepoint_ts": self._changepoint_ts,
+            "y_scale": self._scale,
+            "trend_distributions": self.fit_and_predict_data_["init_trend_params"].keywords[
+                "distributions"
+            ],
+            "exogenous_index": self._exogenous_index,
+            "exogenous_columns": self._exogenous_columns,
+            "reparam_scales": self.fit_and_predict_data_["reparam_scales"],
+        }
+
+    def _set_fitted_state(self, state):
+        """
+        Set the fitted state returned by `_get_fitted_state`.
+
+        The aggregator and the exogenous transformers are refitted on zeros with the saved
+        indexes and columns.
+
+        Args:
+            state (dict): The state.
+        """
+        self.original_y_indexes_ = state["original_y_index"]
+        self.full_y_indexes_ = state["y_index"]
+        self.aggregator_ = Aggregator().fit(
+            pd.DataFrame(0.0, index=self.original_y_indexes_, columns=self._y.columns)
+        )
+        self.hierarchy_matrix = jnp.asarray(state["hierarchy_matrix"])
+
+        self._time_scaler = TimeScaler()
+        self._time_scaler.t_scale = state["t_scale"]
+        self._time_scaler.t_min = state["t_min"]
+        self.max_t = state["max_t"]
+        self.min_t = state["min_t"]
+        self._changepoint_ts = [jnp.asarray(t) for t in state["changepoint_ts"]]
+        self._scale = state["y_scale"]
+
+        X = None
+        if state["exogenous_columns"] is not None:
+            X = pd.DataFrame(
+                0.0, index=state["exogenous_index"], columns=state["exogenous_columns"]
+            )
+        self._fit_exogenous(X, self.full_y_indexes_)
+        self._set_fit_and_predict_data(
+            jax.tree_util.Partial(init_params, distributions=state["trend_distributions"]),
+            state.get("reparam_scales"),
         )
 
     def _get_exogenous_matrix_from_X(self, X: pd.DataFrame) -> jnp.ndarray:
@@ -380,14 +613,13 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
 
             start_idx = sum(self.n_changepoint_per_series[:i])
             end_idx = start_idx + n_changepoints
-            mask = np.zeros_like(A)
-            mask[:, start_idx:end_idx] = 1
+            mask = jnp.zeros_like(A).at[:, start_idx:end_idx].set(1)
 
             changepoint_design_tensor.append(A)
             changepoint_mask_tensor.append(mask)
 
-        changepoint_design_tensor = np.stack(changepoint_design_tensor, axis=0)
-        changepoint_mask_tensor = np.stack(changepoint_mask_tensor, axis=0)
+        changepoint_design_tensor = jnp.stack(changepoint_design_tensor, axis=0)
+        changepoint_mask_tensor = jnp.stack(changepoint_mask_tensor, axis=0)
         return changepoint_design_tensor * changepoint_mask_tensor
 
     def _get_changepoint_prior_vectors(
@@ -413,7 +645,7 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
 
         def zeros_with_first_value(size, first_value):
             x = jnp.zeros(size)
-            x.at[0].set(first_value)
+            x = x.at[0].set(first_value)
             return x
 
         changepoint_prior_scale_vector = np.concatenate(
@@ -460,11 +692,9 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
 
         distributions = self._get_trend_prior_distributions(t_arrays, y_arrays)
 
-        def trend_sample_func(distributions):
-
-            return init_params(distributions)
-
-        return functools.partial(trend_sample_func, distributions=distributions)
+        # A pytree, so that the priors estimated from the data are passed to the compiled
+        # functions as inputs rather than compiled as constants
+        return jax.tree_util.Partial(init_params, distributions=distributions)
 
     def _get_trend_prior_distributions(self, t_arrays, y_arrays):
 
@@ -521,17 +751,17 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
 
         return distributions
 
-    def predict_samples(self, X: pd.DataFrame, fh: ForecastingHorizon) -> np.ndarray:
-        """Generate samples for the given exogenous variables and forecasting horizon.
+    def _predictive_samples_to_frame(self, observation_site, fh_as_index):
+        """Convert samples of the bottom series to a DataFrame, including the aggregated series.
 
         Args:
-            X (pd.DataFrame): Exogenous variables.
-            fh (ForecastingHorizon): Forecasting horizon.
+            observation_site (jnp.ndarray): Samples of the observation site.
+            fh_as_index (pd.Index): Index of the forecasting horizon.
 
         Returns:
-            np.ndarray: Predicted samples.
+            pd.DataFrame: Samples for all series of the hierarchy.
         """
-        samples = super().predict_samples(X=X, fh=fh)
+        samples = super()._predictive_samples_to_frame(observation_site, fh_as_index)
 
         return self.aggregator_.transform(samples)
 
@@ -554,14 +784,9 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
         if not isinstance(fh, ForecastingHorizon):
             fh = self._check_fh(fh)
 
-        t_arrays = jnp.array(convert_index_to_days_since_epoch(fh_as_index)).reshape(
-            (1, -1, 1)
+        time_inputs = self._get_time_inputs(
+            jnp.array(convert_index_to_days_since_epoch(fh_as_index))
         )
-        t_arrays = jnp.tile(t_arrays, (self.n_series, 1, 1))
-        t_arrays = self._time_scaler.scale(t_arrays)
-        t_scaled = t_arrays[0]
-
-        changepoint_matrix = self._get_changepoint_matrix(t_scaled)
 
         if self._has_exogenous_variables:
             if X is None or X.shape[1] == 0:
@@ -578,13 +803,30 @@ class HierarchicalProphet(ExogenousEffectMixin, BaseBayesianForecaster):
             exogenous_data = {}
 
         return dict(
-            t=t_arrays,
             y=None,
-            data=exogenous_data,
-            changepoint_matrix=changepoint_matrix,
+            **self._shard_series(
+                dict(data=exogenous_data, **time_inputs), series_args=("t", "data", "changepoint_matrix")
+            ),
             **self.fit_and_predict_data_,
         )
 
+    def _get_time_inputs(self, t):
+        """Get the time-dependent inputs of the NumPyro model.
+
+        Args:
+            t (jnp.ndarray): Days since epoch of the timepoints, with shape (n_timepoints,).
+
+        Returns:
+            dict: The scaled time arrays of all series, with shape (n_series, n_timepoints, 1), and
+            the changepoint matrix.
+        """
+        t_arrays = jnp.tile(t.reshape((1, -1, 1)), (self.n_series, 1, 1))
+        t_arrays = self._time_scaler.scale(t_arrays)
+        return dict(
+            t=t_arrays,
+            changepoint_matrix=self._get_changepoint_matrix(t_arrays[0]),
+        )
+
     def periodindex_to_multiindex(self, periodindex: pd.PeriodIndex) -> pd.MultiIndex:
         """
         Convert a PeriodIndex to a MultiIndex.
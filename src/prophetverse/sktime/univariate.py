@@ -7,6 +7,7 @@ This module implements the Univariate Prophet model, similar to the one implemen
 from typing import Callable
 from functools import partial
 from sktime.transformations.series.detrend import Detrender
+import jax
 import jax.numpy as jnp
 import pandas as pd
 from numpyro import distributions as dist
@@ -67,11 +68,72 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
         trend (str): Type of trend to use. Can be "linear" or "logistic".
         mcmc_samples (int): Number of MCMC samples to draw.
         mcmc_warmup (int): Number of MCMC warmup steps.
-        mcmc_chains (int): Number of MCMC chains to run in parallel.
-        inference_method (str): Inference method to use. Can be "mcmc" or "map".
+        mcmc_chains (int): Number of MCMC chains to run.
+        mcmc_chain_method (str): How MCMC chains are run. Can be "sequential", "parallel" (one chain per
+            device) or "vectorized".
+        mcmc_init_steps (int): If set, a MAP pre-fit of at most this many L-BFGS iterations is run before MCMC, and
+            the chains start around its solution, which allows a much shorter `mcmc_warmup`.
+        mcmc_init_mass_matrix (bool): If True, the initial mass matrix of NUTS is derived from the curvature of the
+            posterior at the MAP pre-fit. Only used if `mcmc_init_steps` is set.
+        mcmc_exclude_deterministic (bool): If True, the deterministic sites (trend and effects) are not recorded
+            for each MCMC draw, which saves most of the memory of the posterior samples. They are recomputed
+            from the latent samples when predicting them, for instance with `predict_all_sites`.
+        mcmc_thinning (int): Only every `mcmc_thinning`-th MCMC sample of each chain is kept.
+        inference_method (str): Inference method to use. Can be "mcmc", "map", "lbfgs" (MAP with L-BFGS,
+            where `optimizer_steps` is the maximum number of iterations and `optimizer_tol` the gradient tolerance)
+            "laplace" (MAP followed by a Gaussian approximation of the posterior around it) or "vi" (variational
+            inference with the `vi_guide` family, costlier than MAP but much cheaper than MCMC) or "conjugate"
+            (closed-form Gaussian posterior, for a linear trend and additive linear effects, see
+            `ConjugateInferenceEngine`).
         optimizer_name (str): Name of the optimizer to use for variational inference.
         optimizer_kwargs (dict): Additional keyword arguments to pass to the optimizer.
         optimizer_steps (int): Number of optimization steps to perform for variational inference.
+        optimizer_tol (float): If set, MAP optimization stops once the relative loss improvement between
+            two convergence checks falls below this value.
+        optimizer_patience (int): If set, MAP optimization stops once the loss has not improved for this
+            number of steps.
+        optimizer_num_starts (int): Number of MAP optimizations run in parallel from different initial
+            values, the parameters with the lowest final loss being kept. Helps when the fit can get
+            stuck in a poor local optimum, as with the logistic trend.
+        optimizer_checkpoint_path (str): If set, the state of MAP optimization is saved to this file every
+            1000 steps, so that an interrupted fit can be resumed.
+        optimizer_resume (bool): If True and `optimizer_checkpoint_path` exists, MAP optimization resumes
+            from it instead of starting over.
+        optimizer_batch_size (int): If set, each step of "map" or "vi" optimization evaluates the likelihood on
+            a random minibatch of this many timepoints, rescaled to the whole series, which makes steps on
+            very long series much cheaper. The full loss is evaluated every 1000 steps and used by the
+            stopping criteria.
+        warm_start (bool): If True, `update` refits starting from the parameters of the current fit, which
+            makes periodic refits on extended data much cheaper. Changes in the number of changepoints
+            are handled by padding or trimming the changepoint coefficients.
+        init_strategy (str): Initial values of the parameters of a fit that is not warm started. Can be
+            "prior_mean" or "least_squares", which fits the offset, changepoint coefficients and linear effect
+            coefficients to the scaled data by ridge-regularized least squares, so that MAP optimization and
+            MCMC start near the optimum.
+        standardize_design (bool): If True, the changepoint coefficients and the coefficients of linear effects
+            are inferred in units scaled by the root mean square of their column of the changepoint matrix or of
+            the exogenous features, so that they all have a similar curvature. Optimization then converges in
+            far fewer steps, at larger step sizes. The priors, the posterior sites and the predictions are
+            unchanged, with the scaled coefficients added to the posterior samples as `{name}_scaled` sites.
+        time_budget (float): If set, wall-clock budget in seconds of "map", "vi", "laplace" and "mcmc" inference,
+            compilation included. Optimization runs in chunks of 1000 steps until the budget is spent, keeping
+            the parameters with the lowest loss, and MCMC draws samples in blocks after the warmup, keeping
+            the samples drawn so far. `optimizer_steps` and `mcmc_samples` remain upper bounds. Whether the
+            convergence criteria were met is reported by `inference_engine_.telemetry_`.
+        posterior_draws (int): Number of samples drawn from the approximate posterior, with "laplace", "vi" or
+            "conjugate".
+        vi_guide (str): Variational family used with "vi". Can be "AutoNormal" (mean-field),
+            "AutoLowRankMultivariateNormal" or "AutoMultivariateNormal".
+        vi_num_particles (int): Number of particles used to estimate the ELBO with "vi".
+        predict_batch_size (int): If set, predictive samples are generated in batches of this size.
+        predict_memory_limit (int): If set, memory budget in bytes from which the predictive batch size is derived.
+        compilation_cache_dir (str): If set, JAX's persistent compilation cache is enabled in this directory, so
+            that new processes fitting the same model structure on data of the same shape skip compilation.
+            This changes JAX's configuration for the whole process, see `InferenceEngine`.
+        max_predict_samples (int): If set, at most this number of posterior samples, evenly spaced, are used
+            at predict time (and at most this number of predictive samples are drawn for point estimates).
+        storage_dtype (str): If set, for instance "float32" or "bfloat16", the posterior and predictive samples
+            are stored in this dtype, to reduce the memory held by the fitted model. See `get_nbytes`.
         exogenous_effects (List[AbstractEffect]): A list defining the exogenous effects to be used in the model.
         default_effect (AbstractEffect): The default effect to be used when no effect is specified for a variable.
         default_exogenous_prior (tuple): Default prior distribution for exogenous effects.
@@ -98,10 +160,33 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
         mcmc_samples=2000,
         mcmc_warmup=200,
         mcmc_chains=4,
+        mcmc_chain_method="sequential",
+        mcmc_init_steps=None,
+        mcmc_init_mass_matrix=False,
+        mcmc_exclude_deterministic=False,
+        mcmc_thinning=1,
         inference_method="map",
         optimizer_name="Adam",
         optimizer_kwargs={"step_size" : 1e-4},
         optimizer_steps=100_000,
+        optimizer_tol=None,
+        optimizer_patience=None,
+        optimizer_num_starts=1,
+        optimizer_checkpoint_path=None,
+        optimizer_resume=False,
+        optimizer_batch_size=None,
+        warm_start=False,
+        init_strategy="prior_mean",
+        standardize_design=False,
+        time_budget=None,
+        posterior_draws=1000,
+        vi_guide="AutoNormal",
+        vi_num_particles=1,
+        predict_batch_size=None,
+        predict_memory_limit=None,
+        compilation_cache_dir=None,
+        max_predict_samples=None,
+        storage_dtype=None,
         exogenous_effects=None,
         default_effect=None,
         rng_key=random.PRNGKey(24),
@@ -129,9 +214,32 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
             mcmc_samples=mcmc_samples,
             mcmc_warmup=mcmc_warmup,
             mcmc_chains=mcmc_chains,
+            mcmc_chain_method=mcmc_chain_method,
+            mcmc_init_steps=mcmc_init_steps,
+            mcmc_init_mass_matrix=mcmc_init_mass_matrix,
+            mcmc_exclude_deterministic=mcmc_exclude_deterministic,
+            mcmc_thinning=mcmc_thinning,
             optimizer_name=optimizer_name,
             optimizer_kwargs=optimizer_kwargs,
             optimizer_steps=optimizer_steps,
+            optimizer_tol=optimizer_tol,
+            optimizer_patience=optimizer_patience,
+            optimizer_num_starts=optimizer_num_starts,
+            optimizer_checkpoint_path=optimizer_checkpoint_path,
+            optimizer_resume=optimizer_resume,
+            optimizer_batch_size=optimizer_batch_size,
+            warm_start=warm_start,
+            init_strategy=init_strategy,
+            standardize_design=standardize_design,
+            time_budget=time_budget,
+            posterior_draws=posterior_draws,
+            vi_guide=vi_guide,
+            vi_num_particles=vi_num_particles,
+            predict_batch_size=predict_batch_size,
+            predict_memory_limit=predict_memory_limit,
+            compilation_cache_dir=compilation_cache_dir,
+            max_predict_samples=max_predict_samples,
+            storage_dtype=storage_dtype,
         )
 
         self.model = model
@@ -177,38 +285,111 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
         trend_sample_func = self._get_trend_sample_func(y=y, X=X)
 
         ## Exogenous features
+        exogenous_data = self._fit_exogenous(X, y.index)
 
+        y_array = jnp.array(y.values.flatten()).reshape((-1, 1))
+
+        ## Inputs that also are used in predict
+        self._set_fit_and_predict_data(
+            trend_sample_func, self._get_reparam_scales(changepoint_matrix, exogenous_data)
+        )
+
+        inputs = {
+            "t": self._index_to_scaled_timearray(y.index),
+            "y": y_array,
+            "data": exogenous_data,
+            "changepoint_matrix": changepoint_matrix,
+            **self.fit_and_predict_data_,
+        }
+
+        return inputs
+
+    def _fit_exogenous(self, X, index):
+        """
+        Fit the feature transformer and match the exogenous effects to the features.
+
+        The index and columns of `X` are kept, so that `load` can refit the transformer.
+
+        Args:
+            X (pd.DataFrame): Exogenous variables, or None.
+            index (pd.Index): Index of the timepoints of the fit.
+
+        Returns:
+            dict: The exogenous data arrays at `index`, by effect.
+        """
         if X is None:
-            X = pd.DataFrame(index=y.index)
+            X = pd.DataFrame(index=index)
+
+        self._exogenous_index = X.index
+        self._exogenous_columns = list(X.columns)
 
         if self.feature_transformer is not None:
 
             X = self.feature_transformer.fit_transform(X)
 
         self._has_exogenous = ~X.columns.empty
-        X = X.loc[y.index]
+        X = X.loc[index]
 
         self._set_custom_effects(X.columns)
-        exogenous_data = self._get_exogenous_data_array(X)
+        return self._get_exogenous_data_array(X)
 
-        y_array = jnp.array(y.values.flatten()).reshape((-1, 1))
+    def _set_fit_and_predict_data(self, trend_sample_func, reparam_scales=None):
+        """
+        Set the model inputs that are used both in fit and predict.
 
-        ## Inputs that also are used in predict
+        Args:
+            trend_sample_func (Callable): Function that samples the trend parameters.
+            reparam_scales (dict, optional): Scales of the sites inferred in scaled units, see
+                `_get_reparam_scales`. Defaults to None.
+        """
         self.fit_and_predict_data_ = {
             "init_trend_params": trend_sample_func,
             "trend_mode": self.trend,
             "exogenous_effects": self.exogenous_effect_dict if self._has_exogenous else None,
+            "reparam_scales": reparam_scales,
             }
 
-        inputs = {
-            "t": self._index_to_scaled_timearray(y.index),
-            "y": y_array,
-            "data": exogenous_data,
-            "changepoint_matrix": changepoint_matrix,
-            **self.fit_and_predict_data_,
+    def _get_fitted_state(self):
+        """
+        Get the fitted state needed for prediction, see `BaseBayesianForecaster.save`.
+
+        Returns:
+            dict: The time scaling, changepoints, y scale, trend priors and exogenous features.
+        """
+        return {
+            "t_scale": self.t_scale,
+            "t_start": self.t_start,
+            "changepoint_t": self._changepoint_t,
+            "y_scale": self._scale,
+            "trend_distributions": self.fit_and_predict_data_["init_trend_params"].keywords[
+                "distributions"
+            ],
+            "exogenous_index": self._exogenous_index,
+            "exogenous_columns": self._exogenous_columns,
+            "reparam_scales": self.fit_and_predict_data_["reparam_scales"],
         }
 
-        return inputs
+    def _set_fitted_state(self, state):
+        """
+        Set the fitted state returned by `_get_fitted_state`.
+
+        The feature transformer is refitted on zeros with the saved index and columns.
+
+        Args:
+            state (dict): The state.
+        """
+        self.t_scale = state["t_scale"]
+        self.t_start = state["t_start"]
+        self._changepoint_t = jnp.asarray(state["changepoint_t"])
+        self._scale = state["y_scale"]
+        X = pd.DataFrame(
+            0.0, index=state["exogenous_index"], columns=state["exogenous_columns"]
+        )
+        self._fit_exogenous(X, X.index)
+        self._set_fit_and_predict_data(
+            jax.tree_util.Partial(init_params, distributions=state["trend_distributions"]),
+            state.get("reparam_scales"),
+        )
 
     def _get_trend_sample_func(self, y: pd.DataFrame, X: pd.DataFrame) -> Callable :
         """
@@ -238,7 +419,7 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
             linear_global_rate = (trend.values[-1, 0] - trend.values[0, 0]) / (
                 t_scaled[-1] - t_scaled[0]
             )
-            changepoints_loc.at[0].set(linear_global_rate)
+            changepoints_loc = changepoints_loc.at[0].set(linear_global_rate)
 
             distributions["changepoint_coefficients"] = dist.Laplace(
                 changepoints_loc,
@@ -246,7 +427,7 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
             )
 
             distributions["offset"] = dist.Normal(
-                (trend.values[0, 0] - linear_global_rate * t_scaled[0]),
+                jnp.asarray(trend.values[0, 0] - linear_global_rate * t_scaled[0]),
                 0.1,
             )
 
@@ -260,7 +441,7 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
 
             linear_global_rate = linear_global_rate[0]
             timeoffset = timeoffset[0]
-            changepoints_loc.at[0].set(linear_global_rate)
+            changepoints_loc = changepoints_loc.at[0].set(linear_global_rate)
 
             changepoint_coefficients_distribution = dist.Laplace(
                 changepoints_loc,
@@ -271,7 +452,7 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
                 changepoint_coefficients_distribution
             )
 
-            distributions["offset"] = dist.Normal(timeoffset, jnp.log(2))
+            distributions["offset"] = dist.Normal(jnp.asarray(timeoffset), jnp.log(2))
 
             distributions["capacity"] = dist.TransformedDistribution(
                 dist.HalfNormal(
@@ -282,11 +463,9 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
 
         distributions["std_observation"] = dist.HalfNormal(self.noise_scale)
 
-        def init_trend_params(distributions) -> dict:
-
-            return init_params(distributions)
-
-        return functools.partial(init_trend_params, distributions=distributions)
+        # A pytree, so that the priors estimated from the data are passed to the compiled
+        # functions as inputs rather than compiled as constants
+        return jax.tree_util.Partial(init_params, distributions=distributions)
 
     def _set_time_scale(self, y: pd.DataFrame):
         """
@@ -333,6 +512,15 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
             changepoint_range=self.changepoint_range,
         )
 
+    @property
+    def n_changepoint_per_series(self):
+        """Get the number of changepoints per series.
+
+        Returns:
+            List[int]: Number of changepoints, as a list with a single element.
+        """
+        return [len(self._changepoint_t)]
+
     def _get_changepoint_matrix(self, t: jnp.ndarray) -> jnp.ndarray:
         """
         Generates the changepoint coefficient matrix.
@@ -363,8 +551,9 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
         fh_dates = self.fh_to_index(fh)
         fh_as_index = pd.Index(list(fh_dates.to_numpy()))
 
-        t = self._index_to_scaled_timearray(fh_as_index)
-        changepoint_matrix = self._get_changepoint_matrix(t)
+        time_inputs = self._get_time_inputs(
+            convert_index_to_days_since_epoch(fh_as_index)
+        )
 
         if X is None:
             X = pd.DataFrame(index=fh_as_index)
@@ -377,11 +566,26 @@ class Prophet(ExogenousEffectMixin, BaseBayesianForecaster):
         )
 
         return dict(
-            t=t.reshape((-1, 1)),
             y=None,
             data=exogenous_data,
-            changepoint_matrix=changepoint_matrix,
+            **time_inputs,
             **self.fit_and_predict_data_,
         )
 
+    def _get_time_inputs(self, t):
+        """
+        Get the time-dependent inputs of the Numpyro model.
+
+        Args:
+            t (jnp.ndarray): Days since epoch of the timepoints, with shape (n_timepoints,).
+
+        Returns:
+            dict: The scaled time array, with shape (n_timepoints, 1), and the changepoint matrix.
+        """
+        t = t / self.t_scale - self.t_start
+        return dict(
+            t=t.reshape((-1, 1)),
+            changepoint_matrix=self._get_changepoint_matrix(t),
+        )
+
    
\ No newline at end of file
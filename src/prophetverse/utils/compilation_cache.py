@@ -0,0 +1,33 @@
+import os
+
+import jax
+from jax.experimental.compilation_cache import compilation_cache
+
+
+def enable_compilation_cache(cache_dir, min_compile_time_secs=0.0):
+    """Enable JAX's persistent compilation cache in a local directory.
+
+    Compiled executables are written to `cache_dir` and read back by later processes compiling
+    the same computation (same function, shapes, dtypes and devices), which then skip
+    compilation. The cache is global to the process: enabling it with another directory
+    replaces the previous one.
+
+    Args:
+        cache_dir (str): Directory of the cache, created if needed.
+        min_compile_time_secs (float): Only executables whose compilation took at least this many
+            seconds are written. Defaults to 0, since fitting and predicting with a model takes
+            many compilations that are individually fast, but add up.
+    """
+    cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+    jax.config.update("jax_persistent_cache_min_compile_time_secs", min_compile_time_secs)
+    if jax.config.jax_compilation_cache_dir != cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        jax.config.update("jax_compilation_cache_dir", cache_dir)
+        # The cache is initialized at the first compilation of the process, and must be reset
+        # for a new directory to be taken into account
+        compilation_cache.reset_cache()
+
+
+def is_compilation_cache_enabled():
+    """Return whether a persistent compilation cache directory is set."""
+    return bool(jax.config.jax_compilation_cache_dir)
@@ -0,0 +1,141 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+
+def _import_export():
+    """
+    Import `jax.export`, which is public from jax 0.4.30 on.
+
+    It is imported when a function is exported or loaded, so that older versions of jax can
+    still import prophetverse.
+
+    Returns:
+        module: The `jax.export` module.
+
+    Raises:
+        ImportError: If the installed jax is older than 0.4.30.
+    """
+    try:
+        from jax import export
+    except ImportError as e:
+        raise ImportError(
+            f"Exporting predict functions requires jax>=0.4.30, but jax {jax.__version__} "
+            "is installed."
+        ) from e
+    return export
+
+
+class ExportedPredict:
+    """A predict function exported with `jax.export`, see `BaseBayesianForecaster.export_predict`.
+
+    The fitted parameters, the scales of the series and the time scaling are embedded in the
+    exported function, so it runs without the model code, and without tracing: loading and
+    calling it only requires `jax`.
+
+    Args:
+        exported (jax.export.Exported): The exported function, with signature
+            `(rng_key, t, data) -> predictions`.
+    """
+
+    def __init__(self, exported):
+        self.exported = exported
+
+    @classmethod
+    def from_function(cls, fn, rng_key, t, data):
+        """
+        Export a predict function for inputs with the shapes and dtypes of the given ones.
+
+        Args:
+            fn (Callable): A pure function `(rng_key, t, data) -> predictions`.
+            rng_key (jax.random.PRNGKey): A random number generator key.
+            t (jnp.ndarray): Days since epoch of the timepoints of the horizon.
+            data (Dict[str, jnp.ndarray]): Exogenous arrays, by effect name.
+
+        Returns:
+            ExportedPredict: The exported function.
+
+        Raises:
+            ImportError: If the installed jax is older than 0.4.30.
+        """
+        args_specs = jax.tree_util.tree_map(
+            lambda x: jax.ShapeDtypeStruct(jnp.shape(x), jnp.result_type(x)),
+            (rng_key, t, data),
+        )
+        return cls(_import_export().export(jax.jit(fn))(*args_specs))
+
+    def __call__(self, t, data=None, rng_key=None):
+        """
+        Generate predictions for a horizon.
+
+        Args:
+            t (array-like): Days since epoch (1970-01-01) of the timepoints of the horizon, with
+                the length of the horizon used at export.
+            data (Dict[str, array-like], optional): Exogenous arrays, by effect name, with the
+                shapes they had at export. Defaults to None (no exogenous variables).
+            rng_key (jax.random.PRNGKey, optional): Key used to sample the observation noise.
+                Defaults to `jax.random.PRNGKey(0)`.
+
+        Returns:
+            np.ndarray: Predictions in the original scale, with shape (num_samples, horizon, n_series).
+        """
+        if rng_key is None:
+            rng_key = jax.random.PRNGKey(0)
+        if data is None:
+            data = {}
+        leaves, treedef = jax.tree_util.tree_flatten((rng_key, t, data))
+        leaves = [
+            np.asarray(leaf, dtype=aval.dtype)
+            for leaf, aval in zip(leaves, self.exported.in_avals)
+        ]
+        rng_key, t, data = jax.tree_util.tree_unflatten(treedef, leaves)
+        return np.asarray(self.exported.call(rng_key, t, data))
+
+    def serialize(self):
+        """
+        Serialize the exported function.
+
+        Returns:
+            bytes: The serialized function, which `deserialize` loads back.
+        """
+        return bytes(self.exported.serialize())
+
+    @classmethod
+    def deserialize(cls, serialized):
+        """
+        Load an exported function from the output of `serialize`.
+
+        Args:
+            serialized (bytes): The serialized function.
+
+        Returns:
+            ExportedPredict: The exported function.
+
+        Raises:
+            ImportError: If the installed jax is older than 0.4.30.
+        """
+        return cls(_import_export().deserialize(bytearray(serialized)))
+
+    def save(self, path):
+        """
+        Save the serialized function to a file.
+
+        Args:
+            path (str): Path of the file.
+        """
+        with open(path, "wb") as f:
+            f.write(self.serialize())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an exported function saved with `save`.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            ExportedPredict: The exported function.
+        """
+        with open(path, "rb") as f:
+            return cls.deserialize(f.read())
@@ -0,0 +1,66 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+import pandas as pd
+
+
+def cast_floats(tree, dtype):
+    """
+    Cast the floating point arrays of a pytree to another dtype.
+
+    Args:
+        tree (Any): A pytree of arrays, such as a dict of samples.
+        dtype (str or dtype): The target dtype, for instance "float32" or "bfloat16". If None,
+            the tree is returned unchanged.
+
+    Returns:
+        Any: The tree, with floating point arrays cast to `dtype` and other leaves unchanged.
+    """
+    if dtype is None:
+        return tree
+    dtype = jnp.dtype(dtype)
+
+    def cast(x):
+        if hasattr(x, "dtype") and jnp.issubdtype(x.dtype, jnp.floating):
+            return x.astype(dtype)
+        return x
+
+    return jax.tree_util.tree_map(cast, tree)
+
+
+def nbytes(value, seen=None):
+    """
+    Count the bytes held by the arrays of a value.
+
+    Arrays are searched in nested dicts, lists and tuples (named tuples included). NumPy and
+    JAX arrays and pandas objects are counted, other objects are ignored. Each array is
+    counted once, even if it is referenced several times.
+
+    Args:
+        value (Any): The value.
+        seen (set, optional): Ids of the arrays already counted, updated in place, so that
+            arrays shared between several values are counted once. Defaults to None.
+
+    Returns:
+        int: The number of bytes.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    if isinstance(value, (np.ndarray, jax.Array)):
+        seen.add(id(value))
+        return int(value.nbytes)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        seen.add(id(value))
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, pd.Index):
+        seen.add(id(value))
+        return int(value.memory_usage(deep=True))
+    # Containers are often temporary, and a new one can reuse the id of a freed one, so only
+    # the ids of the arrays, which the counted objects hold, are recorded
+    if isinstance(value, dict):
+        return sum(nbytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item, seen) for item in value)
+    return 0
@@ -0,0 +1,206 @@
+from typing import Callable, NamedTuple
+
+import jax
+import jax.numpy as jnp
+from jax import lax
+
+
+class LBFGSResult(NamedTuple):
+    """Result of `minimize_lbfgs`.
+
+    Attributes:
+        x (jnp.ndarray): The best point found.
+        fun (jnp.ndarray): The value of the objective at `x`.
+        grad (jnp.ndarray): The gradient of the objective at `x`.
+        num_iter (jnp.ndarray): The number of iterations performed.
+        converged (jnp.ndarray): Whether the gradient or the objective tolerance was reached.
+        losses (jnp.ndarray): The value of the objective after each iteration, with shape (maxiter,).
+            Entries after `num_iter` are NaN.
+    """
+
+    x: jnp.ndarray
+    fun: jnp.ndarray
+    grad: jnp.ndarray
+    num_iter: jnp.ndarray
+    converged: jnp.ndarray
+    losses: jnp.ndarray
+
+
+def minimize_lbfgs(
+    fun: Callable,
+    x0: jnp.ndarray,
+    maxiter: int = 1000,
+    tol: float = 1e-5,
+    ftol: float = 0.0,
+    history_size: int = 10,
+    max_linesearch_steps: int = 30,
+    c1: float = 1e-4,
+) -> LBFGSResult:
+    """Minimize a scalar function of a flat array with L-BFGS.
+
+    The search direction is obtained with the two-loop recursion (Nocedal & Wright, Algorithm 7.4),
+    and the step size with a backtracking line search satisfying the Armijo condition. Steps
+    leading to non-finite values are rejected, and the first step is normalized to unit length,
+    which makes the method robust to badly scaled initial gradients. The whole loop is written
+    with `lax.while_loop`, so the function can be jitted.
+
+    Args:
+        fun (Callable): Function `fun(x) -> scalar` to minimize.
+        x0 (jnp.ndarray): Initial point, a flat array.
+        maxiter (int): Maximum number of iterations.
+        tol (float): The optimization stops when the infinity norm of the gradient is below `tol`.
+        ftol (float): When the relative decrease of the objective in one iteration is not above
+            `ftol`, the inverse Hessian approximation is reset, and the optimization stops if this
+            happens twice in a row. Defaults to 0, i.e. the objective did not decrease.
+        history_size (int): Number of past updates used to approximate the inverse Hessian.
+        max_linesearch_steps (int): Maximum number of step halvings in the line search.
+        c1 (float): Sufficient decrease parameter of the Armijo condition.
+
+    Returns:
+        LBFGSResult: The optimization result.
+    """
+    value_and_grad = jax.value_and_grad(fun)
+    f0, g0 = value_and_grad(x0)
+    dim = x0.shape[0]
+
+    def two_loop_recursion(g, s_history, y_history, rho_history, num_updates):
+        # History is stored in a circular buffer, the most recent update at
+        # index (num_updates - 1) % history_size
+        indexes = (num_updates - 1 - jnp.arange(history_size)) % history_size
+        valid = jnp.arange(history_size) < num_updates
+
+        def first_loop(q, i):
+            idx, is_valid = indexes[i], valid[i]
+            alpha = rho_history[idx] * jnp.dot(s_history[idx], q)
+            alpha = jnp.where(is_valid, alpha, 0.0)
+            return q - alpha * y_history[idx], alpha
+
+        q, alphas = lax.scan(first_loop, g, jnp.arange(history_size))
+
+        last = indexes[0]
+        gamma = jnp.where(
+            num_updates > 0,
+            jnp.dot(s_history[last], y_history[last])
+            / jnp.dot(y_history[last], y_history[last]),
+            1.0 / jnp.maximum(jnp.linalg.norm(g), 1.0),
+        )
+        r = gamma * q
+
+        def second_loop(r, i):
+            idx, is_valid = indexes[i], valid[i]
+            beta = rho_history[idx] * jnp.dot(y_history[idx], r)
+            correction = jnp.where(is_valid, alphas[i] - beta, 0.0)
+            return r + correction * s_history[idx], None
+
+        r, _ = lax.scan(second_loop, r, jnp.arange(history_size)[::-1])
+        return -r
+
+    def line_search(x, f, g, direction):
+        slope = jnp.dot(g, direction)
+
+        def cond_fn(state):
+            step, f_new, _, i = state
+            armijo = f_new <= f + c1 * step * slope
+            return (i < max_linesearch_steps) & ~(jnp.isfinite(f_new) & armijo)
+
+        def body_fn(state):
+            step, _, _, i = state
+            step = step * 0.5
+            f_new, g_new = value_and_grad(x + step * direction)
+            return step, f_new, g_new, i + 1
+
+        f_new, g_new = value_and_grad(x + direction)
+        step, f_new, g_new, _ = lax.while_loop(
+            cond_fn, body_fn, (jnp.array(1.0, x.dtype), f_new, g_new, 0)
+        )
+        success = jnp.isfinite(f_new) & (f_new <= f + c1 * step * slope)
+        return step, f_new, g_new, success
+
+    # Status: 0 while running, 1 if the objective stopped decreasing, 2 if the line search failed
+    def cond_fn(state):
+        k, _, _, g, _, _, _, _, status, _ = state
+        converged = jnp.max(jnp.abs(g)) < tol
+        return (k < maxiter) & ~converged & (status == 0)
+
+    def body_fn(state):
+        (
+            k,
+            x,
+            f,
+            g,
+            s_history,
+            y_history,
+            rho_history,
+            num_updates,
+            _,
+            losses,
+        ) = state
+        direction = two_loop_recursion(g, s_history, y_history, rho_history, num_updates)
+        # Fall back to steepest descent if the direction is not a descent direction
+        direction = jnp.where(
+            jnp.dot(direction, g) < 0,
+            direction,
+            -g / jnp.maximum(jnp.linalg.norm(g), 1.0),
+        )
+        step, f_new, g_new, success = line_search(x, f, g, direction)
+
+        small_decrease = (f - f_new) <= ftol * jnp.maximum(
+            jnp.maximum(jnp.abs(f), jnp.abs(f_new)), 1.0
+        )
+        x_new = jnp.where(success, x + step * direction, x)
+        f_new = jnp.where(success, f_new, f)
+        g_new = jnp.where(success, g_new, g)
+
+        s = x_new - x
+        y = g_new - g
+        sy = jnp.dot(s, y)
+        update = success & (sy > 1e-10)
+        idx = num_updates % history_size
+        s_history = jnp.where(update, s_history.at[idx].set(s), s_history)
+        y_history = jnp.where(update, y_history.at[idx].set(y), y_history)
+        rho_history = jnp.where(
+            update, rho_history.at[idx].set(1.0 / jnp.where(update, sy, 1.0)), rho_history
+        )
+        num_updates = num_updates + update.astype(num_updates.dtype)
+        # If the objective stopped decreasing, the curvature pairs are discarded and the
+        # next iteration restarts from steepest descent. A restart that does not decrease
+        # the objective either ends the optimization.
+        restart = success & small_decrease & (num_updates > 0)
+        num_updates = jnp.where(restart, 0, num_updates)
+        status = jnp.where(success, jnp.where(small_decrease & ~restart, 1, 0), 2)
+
+        return (
+            k + 1,
+            x_new,
+            f_new,
+            g_new,
+            s_history,
+            y_history,
+            rho_history,
+            num_updates,
+            status,
+            losses.at[k].set(f_new),
+        )
+
+    init_state = (
+        0,
+        x0,
+        f0,
+        g0,
+        jnp.zeros((history_size, dim), x0.dtype),
+        jnp.zeros((history_size, dim), x0.dtype),
+        jnp.zeros((history_size,), x0.dtype),
+        0,
+        0,
+        jnp.full((maxiter,), jnp.nan, dtype=f0.dtype),
+    )
+    k, x, f, g, *_, status, losses = lax.while_loop(cond_fn, body_fn, init_state)
+
+    return LBFGSResult(
+        x=x,
+        fun=f,
+        grad=g,
+        num_iter=k,
+        converged=(jnp.max(jnp.abs(g)) < tol) | (status == 1),
+        losses=losses,
+    )
@@ -0,0 +1,136 @@
+import jax.numpy as jnp
+import numpyro
+from numpyro import distributions as dist
+from numpyro import handlers
+from numpyro.infer.reparam import Reparam
+
+
+class ScaledDistribution(dist.TransformedDistribution):
+    """
+    A distribution multiplied by a constant scale.
+
+    Unlike a plain `TransformedDistribution`, it has a mean and a variance, so that it can be
+    initialized to its mean and moment-matched like the distribution it scales.
+
+    Args:
+        base_distribution (dist.Distribution): The distribution to scale.
+        scale (jnp.ndarray): The scale, broadcast with the shape of `base_distribution`.
+    """
+
+    def __init__(self, base_distribution, scale, validate_args=None):
+        super().__init__(
+            base_distribution,
+            dist.transforms.AffineTransform(0.0, scale),
+            validate_args=validate_args,
+        )
+
+    @property
+    def mean(self):
+        return self.base_dist.mean * self.transforms[0].scale
+
+    @property
+    def variance(self):
+        return self.base_dist.variance * self.transforms[0].scale**2
+
+
+class ScaleReparam(Reparam):
+    """
+    Reparameterize a site as a scaled latent site.
+
+    The latent site `{name}_scaled` is the site multiplied by `scale`, with the same prior up to
+    this change of variables, and the site becomes a deterministic site of the same value. With
+    `scale` the magnitude of the design column of each coefficient, the latent coefficients all
+    have a similar effect on the likelihood, which makes the posterior much better conditioned.
+
+    Args:
+        scale (jnp.ndarray): The scale, broadcast with the shape of the site.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __call__(self, name, fn, obs):
+        if obs is not None:
+            raise ValueError(f"ScaleReparam cannot reparameterize the observed site {name}.")
+        scaled_value = numpyro.sample(f"{name}_scaled", ScaledDistribution(fn, self.scale))
+        return None, scaled_value / self.scale
+
+
+def scale_reparam(fn, scales):
+    """
+    Sample the sites of a function in scaled units, see `ScaleReparam`.
+
+    Args:
+        fn (Callable): A function that samples sites, such as a model or an effect.
+        scales (Optional[Dict[str, jnp.ndarray]]): The scale of each reparameterized site, by
+            site name. If None, `fn` is returned unchanged.
+
+    Returns:
+        Callable: The reparameterized function.
+    """
+    if not scales:
+        return fn
+    return handlers.reparam(
+        fn, config={name: ScaleReparam(scale) for name, scale in scales.items()}
+    )
+
+
+def get_column_scales(design):
+    """
+    Get the magnitude of each column of a design matrix.
+
+    Args:
+        design (jnp.ndarray): The design, with shape (..., n_timepoints, n_columns), where the
+            leading axes are, for instance, the series.
+
+    Returns:
+        jnp.ndarray: The root mean square of each column over the timepoints, maximum over the
+        leading axes, with shape (n_columns,). Columns that are zero have a scale of 1.
+    """
+    design = jnp.asarray(design)
+    rms = jnp.sqrt(jnp.mean(design**2, axis=-2)).reshape((-1, design.shape[-1]))
+    rms = rms.max(axis=0)
+    return jnp.where(rms > 0, rms, 1.0)
+
+
+def scale_sites(values, scales):
+    """
+    Convert values of sites to the scaled sites of `ScaleReparam`.
+
+    Args:
+        values (Dict[str, jnp.ndarray]): Values, such as initial values, by site name.
+        scales (Optional[Dict[str, jnp.ndarray]]): The scale of each reparameterized site.
+
+    Returns:
+        Dict[str, jnp.ndarray]: The values, where each site of `scales` is replaced by its scaled
+        site `{name}_scaled`.
+    """
+    values = dict(values)
+    for name, scale in (scales or {}).items():
+        if name in values:
+            values[f"{name}_scaled"] = values.pop(name) * scale
+    return values
+
+
+def unscale_sites(values, scales, keep_scaled=False):
+    """
+    Convert values of the scaled sites of `ScaleReparam` to the sites they reparameterize.
+
+    Args:
+        values (Dict[str, jnp.ndarray]): Values, such as posterior samples, by site name. The last
+            axis of the values of scaled sites is the axis of their scale.
+        scales (Optional[Dict[str, jnp.ndarray]]): The scale of each reparameterized site.
+        keep_scaled (bool, optional): Whether the values of the scaled sites are kept. Defaults to
+            False.
+
+    Returns:
+        Dict[str, jnp.ndarray]: The values, with the values of each site of `scales` in its own
+        units.
+    """
+    values = dict(values)
+    for name, scale in (scales or {}).items():
+        scaled_name = f"{name}_scaled"
+        if scaled_name in values:
+            scaled_value = values[scaled_name] if keep_scaled else values.pop(scaled_name)
+            values[name] = scaled_value / scale
+    return values
@@ -0,0 +1,286 @@
+import functools
+import inspect
+from collections import OrderedDict
+
+import jax
+import numpy as np
+import pandas as pd
+from numpyro import distributions as dist
+
+# Classes registered with `register_class`, by path. Decoding instantiates only these classes
+# and the default ones, so that loading a file cannot call other functions, such as ones
+# writing or unpickling files
+_REGISTRY = {}
+
+
+def register_class(cls):
+    """
+    Allow a class, such as a custom effect or transformer, to be encoded and decoded.
+
+    The numpyro distributions and transforms, the effects of prophetverse and the sktime
+    transformers used by prophetverse are registered by default. A class used in the
+    hyperparameters of a saved forecaster must also be registered in the process that loads it.
+
+    Args:
+        cls (type): The class.
+
+    Returns:
+        type: The class, so that this can be used as a class decorator.
+
+    Raises:
+        TypeError: If `cls` is not a class.
+    """
+    if not inspect.isclass(cls):
+        raise TypeError(f"{cls!r} is not a class")
+    _REGISTRY[_path(cls)] = cls
+    return cls
+
+
+@functools.lru_cache(maxsize=None)
+def _default_classes():
+    from sktime.transformations.compose import TransformerPipeline
+    from sktime.transformations.series.fourier import FourierFeatures
+
+    from prophetverse import effects
+
+    candidates = [
+        *(getattr(dist, name) for name in dist.__all__),
+        *(getattr(dist.transforms, name) for name in dist.transforms.__all__),
+        *vars(effects).values(),
+    ]
+    classes = [
+        cls
+        for cls in candidates
+        if inspect.isclass(cls)
+        and issubclass(
+            cls, (dist.Distribution, dist.transforms.Transform, effects.AbstractEffect)
+        )
+        and not inspect.isabstract(cls)
+    ]
+    classes += [FourierFeatures, TransformerPipeline]
+    return {_path(cls): cls for cls in classes}
+
+
+def _get_registered_class(path):
+    return _REGISTRY.get(path) or _default_classes().get(path)
+
+
+def encode(value, arrays):
+    """
+    Encode a value as a JSON-compatible object, storing its arrays separately.
+
+    Supported values are None, booleans, numbers, strings, lists, tuples, sets, dicts, arrays,
+    pandas indexes and frames, and registered classes (see `register_class`) and their
+    instances: numpyro distributions and transforms, and objects whose constructor arguments
+    are stored as attributes of the same name, such as effects and sktime transformers.
+    Transformers are encoded by their parameters, without their fitted state.
+
+    Args:
+        value (Any): The value to encode.
+        arrays (Dict[str, np.ndarray]): Arrays of the encoded value, updated in place. Each
+            array is referenced by its key in the encoded value.
+
+    Returns:
+        Any: The encoded value.
+
+    Raises:
+        TypeError: If the value, or a value it contains, is not supported.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (np.ndarray, jax.Array)):
+        key = f"array/{len(arrays)}"
+        array = np.asarray(value)
+        if array.dtype == jax.numpy.bfloat16:
+            # npz files only hold the standard NumPy dtypes
+            array = array.astype(np.float32)
+        arrays[key] = array
+        return {"__array__": key}
+    if isinstance(value, list):
+        return [encode(item, arrays) for item in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [encode(item, arrays) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [encode(item, arrays) for item in value]}
+    if isinstance(value, dict):
+        return {
+            "__dict__": [
+                [encode(key, arrays), encode(item, arrays)] for key, item in value.items()
+            ],
+            "ordered": isinstance(value, OrderedDict),
+        }
+    if isinstance(value, pd.Index):
+        return _encode_index(value, arrays)
+    if isinstance(value, pd.DataFrame):
+        return {
+            "__frame__": encode(value.values, arrays),
+            "index": _encode_index(value.index, arrays),
+            "columns": _encode_index(value.columns, arrays),
+        }
+    if isinstance(value, type):
+        return {"__class__": _class_path(value)}
+    if isinstance(value, dist.TransformedDistribution):
+        return {
+            "__object__": _class_path(type(value)),
+            "args": {
+                "base_distribution": encode(value.base_dist, arrays),
+                "transforms": encode(list(value.transforms), arrays),
+            },
+        }
+    if isinstance(value, dist.Distribution):
+        args = {
+            name: encode(getattr(value, name), arrays)
+            for name in value.arg_constraints
+            if name in vars(value)
+        }
+        return {"__object__": _class_path(type(value)), "args": args}
+    return {
+        "__object__": _class_path(type(value)),
+        "args": {name: encode(arg, arrays) for name, arg in _init_args(value).items()},
+    }
+
+
+def decode(value, arrays):
+    """
+    Decode a value encoded by `encode`.
+
+    Args:
+        value (Any): The encoded value.
+        arrays (Mapping[str, np.ndarray]): The arrays of the encoded value. Arrays are only read
+            when they are referenced, so this can be a lazily loaded `np.load` archive.
+
+    Returns:
+        Any: The decoded value.
+
+    Raises:
+        ValueError: If the value references a class that is not registered, see `register_class`.
+    """
+    if isinstance(value, list):
+        return [decode(item, arrays) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__array__" in value:
+        return arrays[value["__array__"]]
+    if "__tuple__" in value:
+        return tuple(decode(item, arrays) for item in value["__tuple__"])
+    if "__set__" in value:
+        return set(decode(item, arrays) for item in value["__set__"])
+    if "__dict__" in value:
+        items = [(decode(key, arrays), decode(item, arrays)) for key, item in value["__dict__"]]
+        return OrderedDict(items) if value["ordered"] else dict(items)
+    if "__index__" in value or "__multi_index__" in value:
+        return _decode_index(value, arrays)
+    if "__frame__" in value:
+        return pd.DataFrame(
+            decode(value["__frame__"], arrays),
+            index=_decode_index(value["index"], arrays),
+            columns=_decode_index(value["columns"], arrays),
+        )
+    if "__class__" in value:
+        return _import_class(value["__class__"])
+    if "__object__" in value:
+        cls = _import_class(value["__object__"])
+        return cls(**{name: decode(arg, arrays) for name, arg in value["args"].items()})
+    raise ValueError(f"Unknown encoded value {value}")
+
+
+def _encode_index(index, arrays):
+    if isinstance(index, pd.MultiIndex):
+        return {
+            "__multi_index__": [_encode_index(level, arrays) for level in index.levels],
+            "codes": [encode(np.asarray(codes), arrays) for codes in index.codes],
+            "names": list(index.names),
+        }
+    if isinstance(index, pd.PeriodIndex):
+        return {
+            "__index__": encode(index.asi8, arrays),
+            "period_freq": index.freqstr,
+            "name": index.name,
+        }
+    if isinstance(index, pd.DatetimeIndex):
+        return {
+            "__index__": encode(index.asi8, arrays),
+            "datetime_freq": index.freqstr,
+            "tz": None if index.tz is None else str(index.tz),
+            "name": index.name,
+        }
+    values = index.values
+    if values.dtype == object:
+        values = encode(values.tolist(), arrays)
+    else:
+        values = encode(values, arrays)
+    return {"__index__": values, "name": index.name}
+
+
+def _decode_index(value, arrays):
+    if "__multi_index__" in value:
+        return pd.MultiIndex(
+            levels=[_decode_index(level, arrays) for level in value["__multi_index__"]],
+            codes=[decode(codes, arrays) for codes in value["codes"]],
+            names=value["names"],
+        )
+    values = decode(value["__index__"], arrays)
+    if "period_freq" in value:
+        if hasattr(pd.PeriodIndex, "from_ordinals"):
+            return pd.PeriodIndex.from_ordinals(
+                values, freq=value["period_freq"], name=value["name"]
+            )
+        return pd.PeriodIndex(ordinal=values, freq=value["period_freq"], name=value["name"])
+    if "datetime_freq" in value:
+        index = pd.DatetimeIndex(values, name=value["name"])
+        if value["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(value["tz"])
+        if value["datetime_freq"] is not None:
+            index = pd.DatetimeIndex(index, freq=value["datetime_freq"])
+        return index
+    return pd.Index(values, name=value["name"])
+
+
+def _init_args(value):
+    """
+    Get the constructor arguments of an object, which must be stored as attributes of the same name.
+    """
+    if hasattr(value, "get_params"):
+        return value.get_params(deep=False)
+
+    args = {}
+    for cls in type(value).__mro__:
+        if "__init__" not in vars(cls):
+            continue
+        signature = inspect.signature(cls.__init__)
+        for name, parameter in list(signature.parameters.items())[1:]:
+            if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+            if name in args:
+                continue
+            if not hasattr(value, name):
+                raise TypeError(
+                    f"Cannot encode {type(value).__name__}: argument {name} is not an attribute"
+                )
+            attribute = getattr(value, name)
+            # Constraints and other defaults that cannot be encoded are left out
+            if attribute is not parameter.default:
+                args[name] = attribute
+    return args
+
+
+def _path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _class_path(cls):
+    path = _path(cls)
+    if _get_registered_class(path) is not cls:
+        raise TypeError(
+            f"Cannot encode {path}, which is not registered, see `register_class`"
+        )
+    return path
+
+
+def _import_class(path):
+    cls = _get_registered_class(path)
+    if cls is None:
+        raise ValueError(f"Cannot decode {path}, which is not registered, see `register_class`")
+    return cls
@@ -0,0 +1,94 @@
+import functools
+import logging
+
+import jax
+import numpy as np
+import numpyro
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+
+logger = logging.getLogger("sktime-numpyro")
+
+
+def set_host_device_count(num_devices):
+    """Expose several CPU devices to JAX, to run data-parallel computations on a multi-core host.
+
+    This only takes effect if it is called before JAX initializes its backends, that is, at the
+    start of the program, before any array is created. Importing `prophetverse.sktime` creates
+    the default `rng_key` of the forecasters, so call this before that import.
+
+    Args:
+        num_devices (int): Number of CPU devices, usually the number of cores.
+    """
+    numpyro.set_host_device_count(num_devices)
+
+
+def get_series_sharding(n_series, num_devices):
+    """Get the sharding of arrays whose leading axis is the series axis.
+
+    The series are split evenly over the largest number of devices, at most `num_devices`,
+    that divides `n_series`, since JAX only places arrays whose sharded axis is divisible by
+    the number of devices.
+
+    Args:
+        n_series (int): Number of series.
+        num_devices (int): Maximum number of devices.
+
+    Returns:
+        Optional[NamedSharding]: The sharding over a one-dimensional "series" mesh, or None if
+        fewer than two devices would be used.
+    """
+    devices = jax.devices()
+    if len(devices) < num_devices:
+        logger.warning(
+            "%d devices were requested, but only %d are available. On CPU, expose them with "
+            "prophetverse.utils.sharding.set_host_device_count at the start of the program.",
+            num_devices,
+            len(devices),
+        )
+    num_devices = min(num_devices, len(devices))
+    while n_series % num_devices:
+        num_devices -= 1
+    if num_devices < 2:
+        return None
+    mesh = Mesh(np.array(devices[:num_devices]), ("series",))
+    return NamedSharding(mesh, PartitionSpec("series"))
+
+
+def shard_series(kwargs, sharding, series_args):
+    """Place the arrays of model arguments on several devices, splitting those with a series axis.
+
+    The arrays of the arguments named in `series_args`, whose leading axis is declared to be the
+    series axis, are split along it, and the arrays of the other arguments are replicated.
+    Jitted functions of these arrays then run data-parallel over the series, XLA partitioning
+    the computation from the sharding of its inputs.
+
+    Args:
+        kwargs (Dict[str, Any]): The keyword arguments of a model. Values can be pytrees, whose
+            leaves that are not arrays are left unchanged.
+        sharding (Optional[NamedSharding]): The sharding, see `get_series_sharding`. If None,
+            the arguments are returned unchanged.
+        series_args (Iterable[str]): Names of the arguments whose arrays have the series axis as
+            their leading axis.
+
+    Returns:
+        Dict[str, Any]: The arguments, with arrays placed on the devices of `sharding`.
+    """
+    if sharding is None:
+        return kwargs
+    replicated = NamedSharding(sharding.mesh, PartitionSpec())
+    series_args = set(series_args)
+
+    def place(value, sharding):
+        if not isinstance(value, (np.ndarray, jax.Array)):
+            return value
+        return jax.device_put(value, sharding)
+
+    return {
+        name: jax.tree_util.tree_map(
+            functools.partial(
+                place, sharding=sharding if name in series_args else replicated
+            ),
+            value,
+        )
+        for name, value in kwargs.items()
+    }
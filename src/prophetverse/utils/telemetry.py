@@ -0,0 +1,177 @@
+import time
+from typing import NamedTuple, Optional
+
+import jax
+import numpy as np
+
+from prophetverse.utils.compilation_cache import is_compilation_cache_enabled
+
+# Events recorded by JAX while tracing, lowering and compiling a function
+_COMPILATION_EVENTS = (
+    "/jax/core/compile/jaxpr_trace_duration",
+    "/jax/core/compile/jaxpr_to_mlir_module_duration",
+    "/jax/core/compile/backend_compile_duration",
+)
+
+# Events recorded by JAX when a compiled executable is looked up in, and found in, the
+# persistent compilation cache
+_CACHE_REQUEST_EVENT = "/jax/compilation_cache/compile_requests_use_cache"
+_CACHE_HIT_EVENT = "/jax/compilation_cache/cache_hits"
+
+_active_timers = []
+_listener_registered = False
+
+
+class InferenceTelemetry(NamedTuple):
+    """Telemetry of an inference run, see `InferenceEngine.telemetry_`.
+
+    Attributes:
+        compile_time (float): Seconds spent tracing and compiling JAX functions.
+        run_time (float): Seconds spent running, i.e. the wall time minus `compile_time`.
+        num_steps (int): Number of optimization steps, or of MCMC iterations (warmup included)
+            summed over chains.
+        steps_per_second (float): `num_steps / run_time`.
+        num_samples (int): Number of posterior samples drawn, summed over chains. 0 for MAP engines.
+        samples_per_second (float): `num_samples / run_time`, None for MAP engines.
+        losses (np.ndarray): The loss trace downsampled by averaging over consecutive windows,
+            None for MCMC.
+        grad_norm (dict): Summary ("initial", "final", "min", "max") of the norm of the gradient of the
+            loss with respect to the unconstrained parameters, evaluated at the start, at the end and,
+            for chunked runs, after every chunk. None for MCMC.
+        tree_depth (dict): Summary ("mean", "max") of the NUTS tree depth of the samples. None for MAP.
+        num_divergences (int): Number of divergent transitions among the samples. None for MAP.
+        accept_prob (float): Mean acceptance probability of the samples. None for MAP.
+        cache_hits (int): Number of compilations skipped thanks to the persistent compilation cache,
+            None if the cache is not enabled.
+        cache_misses (int): Number of compilations not found in the persistent compilation cache,
+            None if the cache is not enabled.
+        converged (bool): Whether the convergence criteria were met: the stopping criteria for
+            optimization, a split R-hat below 1.1 for every latent site for MCMC. None if they
+            could not be evaluated.
+        budget_exhausted (bool): Whether inference was stopped by its time budget. None for engines
+            without a time budget.
+    """
+
+    compile_time: float
+    run_time: float
+    num_steps: int
+    steps_per_second: float
+    num_samples: int = 0
+    samples_per_second: Optional[float] = None
+    losses: Optional[np.ndarray] = None
+    grad_norm: Optional[dict] = None
+    tree_depth: Optional[dict] = None
+    num_divergences: Optional[int] = None
+    accept_prob: Optional[float] = None
+    cache_hits: Optional[int] = None
+    cache_misses: Optional[int] = None
+    converged: Optional[bool] = None
+    budget_exhausted: Optional[bool] = None
+
+
+class CompilationTimer:
+    """Context manager measuring the wall time of a block and the part of it spent compiling.
+
+    The compilation time is collected from the durations that JAX reports through
+    `jax.monitoring`, so it covers every function traced and compiled inside the block.
+    Since the tracing of a function includes the tracing of the functions it calls, each
+    duration is converted to a time interval and overlapping intervals are counted once.
+    Nested timers all see the compilations of the inner block.
+
+    Attributes:
+        compile_time (float): Seconds spent tracing and compiling.
+        wall_time (float): Total seconds spent in the block.
+        cache_hits (int): Executables loaded from the persistent compilation cache, None if the
+            cache is not enabled.
+        cache_misses (int): Executables compiled because they were not in the persistent
+            compilation cache, None if the cache is not enabled.
+    """
+
+    def __enter__(self):
+        global _listener_registered
+        if not _listener_registered:
+            jax.monitoring.register_event_duration_secs_listener(
+                _record_compilation_duration
+            )
+            jax.monitoring.register_event_listener(_record_cache_event)
+            _listener_registered = True
+
+        self.compile_time = 0.0
+        self.wall_time = 0.0
+        self.cache_hits = None
+        self.cache_misses = None
+        self._intervals = []
+        self._cache_requests = 0
+        self._cache_hits = 0
+        self._start = time.perf_counter()
+        _active_timers.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time = time.perf_counter() - self._start
+        _active_timers.remove(self)
+        self.compile_time = _union_length(self._intervals)
+        if is_compilation_cache_enabled():
+            self.cache_hits = self._cache_hits
+            self.cache_misses = self._cache_requests - self._cache_hits
+        return False
+
+    @property
+    def run_time(self):
+        """Seconds spent in the block outside of compilation."""
+        return max(self.wall_time - self.compile_time, 0.0)
+
+
+def _record_compilation_duration(event, duration, **kwargs):
+    if event in _COMPILATION_EVENTS:
+        end = time.perf_counter()
+        for timer in _active_timers:
+            timer._intervals.append((end - duration, end))
+
+
+def _record_cache_event(event, **kwargs):
+    if event == _CACHE_REQUEST_EVENT:
+        for timer in _active_timers:
+            timer._cache_requests += 1
+    elif event == _CACHE_HIT_EVENT:
+        for timer in _active_timers:
+            timer._cache_hits += 1
+
+
+def _union_length(intervals):
+    """Return the total length covered by a list of (start, end) intervals."""
+    length = 0.0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                length += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        length += current_end - current_start
+    return length
+
+
+def downsample(values, max_length=1000):
+    """Downsample a trace by averaging it over at most `max_length` consecutive windows.
+
+    Args:
+        values (array-like): A one-dimensional trace.
+        max_length (int): The maximum length of the result.
+
+    Returns:
+        np.ndarray: The downsampled trace, or the trace itself if it is short enough.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) <= max_length:
+        return values
+    return np.array([window.mean() for window in np.array_split(values, max_length)])
+
+
+def per_second(count, seconds):
+    """Return `count / seconds`, or None if no time was measured."""
+    if seconds <= 0:
+        return None
+    return count / seconds
@@ -1,3 +1,7 @@
+import importlib.util
+import subprocess
+import sys
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -10,6 +14,8 @@ from sktime.utils._testing.hierarchical import _bottom_hier_datagen, _make_hiera
 from prophetverse.sktime.multivariate import HierarchicalProphet
 from prophetverse.sktime.seasonality import seasonal_transformer
 from prophetverse.effects import LinearEffect
+from prophetverse.utils.export import ExportedPredict
+from prophetverse.utils.frame_to_array import convert_index_to_days_since_epoch
 
 NUM_LEVELS = 2
 NUM_BOTTOM_NODES = 3
@@ -57,6 +63,16 @@ HYPERPARAMS = [
     ),
     dict(trend="logistic"),
     dict(inference_method="mcmc"),
+    dict(inference_method="mcmc", mcmc_init_steps=50, mcmc_init_mass_matrix=True),
+    dict(inference_method="mcmc", mcmc_exclude_deterministic=True),
+    dict(inference_method="lbfgs"),
+    dict(inference_method="laplace"),
+    dict(inference_method="vi", vi_guide="AutoLowRankMultivariateNormal"),
+    dict(standardize_design=True, optimizer_kwargs={"step_size": 1e-2}),
+    dict(init_strategy="least_squares"),
+    dict(inference_method="conjugate", correlation_matrix_concentration=None),
+    dict(optimizer_batch_size=20),
+    dict(optimizer_batch_size=20, correlation_matrix_concentration=None),
     dict(
         feature_transformer=seasonal_transformer(
             yearly_seasonality=True, weekly_seasonality=True
@@ -112,3 +128,113 @@ def test_prophet2_fit_with_different_nlevels(hierarchy_levels, make_X, hyperpara
     assert isinstance(y_pred, pd.DataFrame)
     assert y_pred.shape[0] == len(fh) * n_series
     assert y_pred.shape[1] == 1
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("jax.export") is None, reason="jax.export requires jax>=0.4.30"
+)
+def test_hierarchical_prophet_exported_predict_matches_predict():
+    y = _make_hierarchical(hierarchy_levels=(2,))
+    y.index = y.index.set_levels(y.index.levels[-1].to_period("D"), level=-1)
+    fh = list(range(1, 6))
+
+    forecaster = HierarchicalProphet(optimizer_steps=100, changepoint_interval=2)
+    forecaster.fit(y)
+    y_pred = forecaster.predict(fh=fh)
+    exported = ExportedPredict.deserialize(forecaster.export_predict(fh=fh).serialize())
+
+    fh_as_index = forecaster.fh_to_index(ForecastingHorizon(fh))
+    out = exported(convert_index_to_days_since_epoch(fh_as_index))
+
+    series = forecaster.periodindex_to_multiindex(fh_as_index).droplevel(-1).unique()
+    assert out.shape == (1, len(fh), len(series))
+    for i, series_id in enumerate(series):
+        assert np.allclose(out[0, :, i], y_pred.loc[series_id].values.flatten(), rtol=1e-4)
+
+
+def test_hierarchical_prophet_save_and_load(tmp_path):
+    y = _make_hierarchical(hierarchy_levels=(2, 1))
+    y = Aggregator().fit_transform(y)
+    y.index = y.index.set_levels(y.index.levels[-1].to_period("D"), level=-1)
+    fh = list(range(1, 6))
+
+    forecaster = HierarchicalProphet(
+        optimizer_steps=100,
+        changepoint_interval=2,
+        feature_transformer=seasonal_transformer(weekly_seasonality=True),
+    )
+    forecaster.fit(y)
+    y_pred = forecaster.predict(fh=fh)
+
+    path = tmp_path / "forecaster.npz"
+    forecaster.save(path)
+    loaded = HierarchicalProphet.load(path)
+
+    assert loaded.cutoff.equals(forecaster.cutoff)
+    assert np.allclose(loaded.predict(fh=fh).values, y_pred.values, rtol=1e-4)
+
+
+_SHARDING_SCRIPT = """
+import numpy as np
+import pandas as pd
+from jax.sharding import NamedSharding, PartitionSpec
+from sktime.transformations.hierarchical.aggregate import Aggregator
+from sktime.utils._testing.hierarchical import _make_hierarchical
+
+from prophetverse.utils.sharding import set_host_device_count
+
+# Before importing the forecasters, whose default rng_key initializes JAX
+set_host_device_count(2)
+
+from prophetverse.engine import MAPInferenceEngine
+from prophetverse.sktime.multivariate import HierarchicalProphet
+
+y = Aggregator().fit_transform(_make_hierarchical(hierarchy_levels=(2, 1)))
+y.index = y.index.set_levels(y.index.levels[-1].to_period("D"), level=-1)
+X = pd.DataFrame(np.random.rand(len(y), 3), columns=["x1", "x2", "x3"], index=y.index)
+timepoints = y.index.get_level_values(-1).unique()
+y_train = y.loc[y.index.get_level_values(-1).isin(timepoints[:-5])]
+fh = list(range(1, 6))
+
+fit_inputs = []
+infer = MAPInferenceEngine.infer
+
+
+def record_infer(self, **kwargs):
+    fit_inputs.append(kwargs)
+    return infer(self, **kwargs)
+
+
+MAPInferenceEngine.infer = record_infer
+
+y_preds = []
+for num_devices in (None, 2):
+    forecaster = HierarchicalProphet(
+        optimizer_steps=100, changepoint_interval=2, num_devices=num_devices
+    )
+    forecaster.fit(y_train, X.loc[y_train.index])
+    y_preds.append(forecaster.predict(fh=fh, X=X))
+
+series = NamedSharding(fit_inputs[-1]["y"].sharding.mesh, PartitionSpec("series"))
+predict_inputs = forecaster._get_predict_data(X=X, fh=forecaster._check_fh(fh))
+for inputs, names in ((fit_inputs[-1], ("t", "y")), (predict_inputs, ("t",))):
+    series_inputs = [inputs[name] for name in names]
+    series_inputs += [inputs["changepoint_matrix"], *inputs["data"].values()]
+    for value in series_inputs:
+        assert isinstance(value.sharding, NamedSharding), value.sharding
+        assert value.sharding.is_equivalent_to(series, value.ndim), value.sharding
+        assert len(value.sharding.device_set) == 2
+assert not isinstance(fit_inputs[0]["y"].sharding, NamedSharding)
+
+assert np.allclose(y_preds[0].values, y_preds[1].values, rtol=1e-4)
+"""
+
+
+def test_hierarchical_prophet_sharded_series_match_unsharded():
+    # The host device count must be set before JAX initializes, hence a new process
+    result = subprocess.run(
+        [sys.executable, "-c", _SHARDING_SCRIPT],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
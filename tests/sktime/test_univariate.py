@@ -1,7 +1,14 @@
+import importlib.util
+import sys
+
+import jax
+import jax.numpy as jnp
 import numpy as np
 import pandas as pd
 import pytest
 from numpyro import distributions as dist
+from numpyro import handlers
+from numpyro.infer.util import log_density
 from sktime.forecasting.base import ForecastingHorizon
 from sktime.transformations.hierarchical.aggregate import Aggregator
 from sktime.utils._testing.hierarchical import (_bottom_hier_datagen,
@@ -10,6 +17,8 @@ from sktime.utils._testing.hierarchical import (_bottom_hier_datagen,
 from prophetverse.sktime.univariate import Prophet
 from prophetverse.sktime.seasonality import seasonal_transformer
 from prophetverse.effects import LinearEffect
+from prophetverse.utils.export import ExportedPredict
+from prophetverse.utils.frame_to_array import convert_index_to_days_since_epoch
 NUM_LEVELS = 2
 NUM_BOTTOM_NODES = 3
 
@@ -52,6 +61,25 @@ HYPERPARAMS = [
     ),
     dict(trend="logistic"),
     dict(inference_method="mcmc"),
+    dict(inference_method="mcmc", mcmc_init_steps=50, mcmc_init_mass_matrix=True),
+    dict(inference_method="lbfgs"),
+    dict(inference_method="laplace"),
+    dict(inference_method="vi", vi_guide="AutoLowRankMultivariateNormal"),
+    dict(time_budget=0.0),
+    dict(inference_method="mcmc", time_budget=0.0),
+    dict(standardize_design=True, optimizer_kwargs={"step_size": 1e-2}),
+    dict(inference_method="mcmc", standardize_design=True),
+    dict(init_strategy="least_squares"),
+    dict(inference_method="mcmc", init_strategy="least_squares"),
+    dict(
+        feature_transformer=seasonal_transformer(
+            yearly_seasonality=True, weekly_seasonality=True
+        ),
+        inference_method="conjugate",
+    ),
+    dict(optimizer_batch_size=20),
+    dict(optimizer_tol=1e-3, optimizer_patience=50),
+    dict(trend="logistic", optimizer_num_starts=3),
 ]
 
 
@@ -76,3 +104,171 @@ def test_prophet2_fit_with_different_nlevels(hierarchy_levels, make_X, hyperpara
     assert isinstance(y_pred, pd.DataFrame)
     assert y_pred.shape[0] == len(fh) * n_series
     assert y_pred.shape[1] == 1
+
+
+@pytest.mark.parametrize("inference_method", ["map", "mcmc"])
+def test_prophet_warm_start_initializes_update_from_current_fit(inference_method):
+    index = pd.period_range("2000-01-01", periods=80, freq="D")
+    y = pd.DataFrame(np.arange(80) * 0.1 + np.random.rand(80), index=index)
+    forecaster = Prophet(
+        inference_method=inference_method,
+        changepoint_interval=10,
+        optimizer_steps=500,
+        mcmc_samples=10,
+        mcmc_warmup=10,
+        warm_start=True,
+    )
+    forecaster.fit(y.iloc[:40])
+    previous_values = forecaster.inference_engine_.get_warm_start_kwargs()["init_values"]
+    n_changepoints = len(forecaster._changepoint_t)
+
+    forecaster.update(y.iloc[40:])
+    init_values = forecaster.inference_engine_.init_values
+
+    assert forecaster.cutoff[0] == index[-1]
+    assert len(forecaster._changepoint_t) > n_changepoints
+    assert init_values["changepoint_coefficients"].shape == (
+        len(forecaster._changepoint_t),
+    )
+    assert np.allclose(
+        init_values["changepoint_coefficients"][:n_changepoints],
+        previous_values["changepoint_coefficients"],
+    )
+    assert np.allclose(init_values["offset"], previous_values["offset"])
+
+    warm_engine = forecaster.inference_engine_
+
+    forecaster.fit(y)
+    assert forecaster.inference_engine_.init_values is None
+    if inference_method == "map":
+        initial_loss = forecaster.inference_engine_.run_results_.losses[0]
+        assert warm_engine.run_results_.losses[0] < initial_loss
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("jax.export") is None, reason="jax.export requires jax>=0.4.30"
+)
+def test_prophet_exported_predict_matches_predict(tmp_path):
+    index = pd.period_range("2000-01-01", periods=90, freq="D")
+    y = pd.DataFrame(np.arange(80) * 0.1 + np.random.rand(80), index=index[:80])
+    X = pd.DataFrame(np.random.rand(90, 1), columns=["x1"], index=index)
+    forecaster = Prophet(changepoint_interval=10, optimizer_steps=100)
+    forecaster.fit(y, X.loc[y.index])
+    fh = list(range(1, 11))
+    y_pred = forecaster.predict(fh=fh, X=X)
+
+    path = tmp_path / "predict.bin"
+    forecaster.export_predict(fh=fh, X=X).save(path)
+    exported = ExportedPredict.load(path)
+    t = convert_index_to_days_since_epoch(y_pred.index)
+    predict_data = forecaster._get_predict_data(X=X, fh=ForecastingHorizon(fh))
+    out = exported(t, data=predict_data["data"])
+
+    assert out.shape == (1, len(fh), 1)
+    assert np.allclose(out[0, :, 0], y_pred.values.flatten(), rtol=1e-4)
+
+
+def test_exported_predict_requires_jax_export(monkeypatch):
+    # As with jax<0.4.30, where jax.export is not a public module
+    monkeypatch.delattr(jax, "export", raising=False)
+    monkeypatch.setitem(sys.modules, "jax.export", None)
+
+    with pytest.raises(ImportError, match="jax>=0.4.30"):
+        ExportedPredict.deserialize(b"")
+
+
+@pytest.mark.parametrize("inference_method", ["map", "mcmc"])
+def test_prophet_save_and_load(tmp_path, monkeypatch, inference_method):
+    index = pd.period_range("2000-01-01", periods=90, freq="D")
+    y = pd.DataFrame(np.arange(80) * 0.1 + np.random.rand(80), index=index[:80])
+    X = pd.DataFrame(np.random.rand(90, 1), columns=["x1"], index=index)
+    forecaster = Prophet(
+        inference_method=inference_method,
+        changepoint_interval=10,
+        optimizer_steps=100,
+        mcmc_samples=10,
+        mcmc_warmup=10,
+        mcmc_chains=1,
+        feature_transformer=seasonal_transformer(weekly_seasonality=True),
+        exogenous_effects=[LinearEffect(id="lin", regex="x1", prior=(dist.Laplace, 0, 1))],
+    )
+    forecaster.fit(y, X.loc[y.index])
+    fh = list(range(1, 11))
+    y_pred = forecaster.predict(fh=fh, X=X)
+
+    path = tmp_path / "forecaster.npz"
+    forecaster.save(path)
+    with np.load(path) as arrays:
+        assert not any(np.isin(y.values, arrays[name]).any() for name in arrays.files)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("load should not fit")
+
+    monkeypatch.setattr(Prophet, "_fit", fail)
+    loaded = Prophet.load(path)
+
+    assert loaded.is_fitted
+    assert loaded.cutoff.equals(forecaster.cutoff)
+    assert loaded.get_params()["exogenous_effects"][0].prior[0] is dist.Laplace
+    assert np.allclose(loaded.predict(fh=fh, X=X).values, y_pred.values, rtol=1e-4)
+
+
+def test_prophet_reduced_storage_holds_fewer_bytes():
+    index = pd.period_range("2000-01-01", periods=60, freq="D")
+    y = pd.DataFrame(np.arange(60) * 0.1 + np.random.rand(60), index=index)
+    params = dict(
+        inference_method="mcmc",
+        changepoint_interval=10,
+        mcmc_samples=40,
+        mcmc_warmup=10,
+        mcmc_chains=1,
+    )
+    fh = list(range(1, 11))
+
+    full = Prophet(**params).fit(y)
+    full_quantiles = full.predict_quantiles(fh=fh, alpha=[0.1, 0.9])
+
+    reduced = Prophet(
+        **params, mcmc_thinning=2, max_predict_samples=10, storage_dtype="bfloat16"
+    ).fit(y)
+    quantiles = reduced.predict_quantiles(fh=fh, alpha=[0.1, 0.9])
+
+    assert reduced.posterior_samples_["offset"].shape == (20,)
+    assert reduced.predictive_samples_["obs"].shape[0] == 10
+    assert reduced.predictive_samples_["obs"].dtype == jnp.bfloat16
+    assert quantiles.shape == full_quantiles.shape
+    assert reduced.get_nbytes() < full.get_nbytes() / 4
+
+
+def test_prophet_standardized_design_keeps_sites_and_optimum():
+    index = pd.period_range("2000-01-01", periods=100, freq="D")
+    rng = np.random.default_rng(0)
+    y = pd.DataFrame(np.arange(80) * 0.1 + rng.random(80), index=index[:80])
+    X = pd.DataFrame(rng.random((100, 1)) * 100, columns=["x1"], index=index)
+    params = dict(inference_method="lbfgs", changepoint_interval=10, optimizer_steps=2000)
+
+    forecaster = Prophet(**params).fit(y, X.loc[y.index])
+    standardized = Prophet(**params, standardize_design=True).fit(y, X.loc[y.index])
+
+    assert "changepoint_coefficients_scaled" in standardized.posterior_samples_
+    assert set(forecaster.posterior_samples_) <= set(standardized.posterior_samples_)
+    assert np.allclose(
+        standardized.posterior_samples_["changepoint_coefficients"],
+        forecaster.posterior_samples_["changepoint_coefficients"],
+        atol=1e-2,
+    )
+
+    # The badly scaled design slows down the optimizer in the original units, so the
+    # standardized fit reaches an optimum at least as good in those units
+    data = forecaster._get_fit_data(forecaster._scale_y(y), X.loc[y.index], None)
+    trace = handlers.trace(handlers.seed(forecaster.model, 0)).get_trace(**data)
+
+    def log_joint(fitted):
+        values = {
+            name: jnp.reshape(fitted.posterior_samples_[name], jnp.shape(site["value"]))
+            for name, site in trace.items()
+            if site["type"] == "sample" and not site["is_observed"]
+        }
+        return log_density(forecaster.model, (), data, values)[0]
+
+    assert log_joint(standardized) >= log_joint(forecaster) - 1e-3
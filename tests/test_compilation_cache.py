@@ -0,0 +1,87 @@
+import jax
+import jax.numpy as jnp
+import numpy as np
+import numpyro
+import pandas as pd
+import pytest
+from jax.experimental.compilation_cache import compilation_cache
+from numpyro import distributions as dist
+
+from prophetverse.engine import MAPInferenceEngine
+from prophetverse.sktime.univariate import Prophet
+from prophetverse.utils.compilation_cache import (
+    enable_compilation_cache,
+    is_compilation_cache_enabled,
+)
+
+
+def _model(x, y=None):
+    slope = numpyro.sample("slope", dist.Normal(0, 1))
+    with numpyro.plate("data", x.shape[0], dim=-2):
+        numpyro.sample("obs", dist.Normal(slope * x, 0.1), obs=y)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    min_compile_time_secs = jax.config.jax_persistent_cache_min_compile_time_secs
+    yield str(tmp_path / "cache")
+    jax.config.update("jax_compilation_cache_dir", None)
+    jax.config.update(
+        "jax_persistent_cache_min_compile_time_secs", min_compile_time_secs
+    )
+    compilation_cache.reset_cache()
+
+
+def test_enable_compilation_cache_sets_directory(cache_dir):
+    enable_compilation_cache(cache_dir)
+
+    assert is_compilation_cache_enabled()
+    assert jax.config.jax_compilation_cache_dir == cache_dir
+
+
+def test_engine_reports_cache_hits_of_previous_fit(cache_dir):
+    # Start as a new process, so that the first fit writes all its executables to the cache
+    enable_compilation_cache(cache_dir)
+    jax.clear_caches()
+    x = jnp.linspace(0, 1, 20).reshape((-1, 1))
+
+    first = MAPInferenceEngine(_model, num_steps=10, compilation_cache_dir=cache_dir)
+    first.infer(x=x, y=2 * x)
+    assert first.telemetry_.cache_misses > 0
+
+    # Drop the in-memory caches, as in a new process
+    jax.clear_caches()
+    second = MAPInferenceEngine(_model, num_steps=10, compilation_cache_dir=cache_dir)
+    second.infer(x=x, y=3 * x)
+
+    assert second.telemetry_.cache_hits > 0
+    assert second.telemetry_.cache_misses == 0
+
+
+def test_engine_does_not_report_cache_when_disabled():
+    x = jnp.linspace(0, 1, 20).reshape((-1, 1))
+    engine = MAPInferenceEngine(_model, num_steps=10)
+    engine.infer(x=x, y=2 * x)
+
+    assert engine.telemetry_.cache_hits is None
+    assert engine.telemetry_.cache_misses is None
+
+
+def test_prophet_fit_on_new_data_hits_cache(cache_dir):
+    index = pd.period_range("2000-01-01", periods=50, freq="D")
+    noise = np.random.default_rng(0).normal(size=50)
+    # Start as a new process, so that the first fit writes all its executables to the cache
+    enable_compilation_cache(cache_dir)
+    jax.clear_caches()
+
+    first = Prophet(optimizer_steps=10, compilation_cache_dir=cache_dir)
+    first.fit(pd.DataFrame(np.arange(50) * 0.1 + noise, index=index))
+    assert first.inference_engine_.telemetry_.cache_misses > 0
+
+    # Drop the in-memory caches, as in a new process, and fit data with other trend priors
+    jax.clear_caches()
+    second = Prophet(optimizer_steps=10, compilation_cache_dir=cache_dir)
+    second.fit(pd.DataFrame(5 - np.arange(50) * 0.3 + noise, index=index))
+
+    assert second.inference_engine_.telemetry_.cache_hits > 0
+    assert second.inference_engine_.telemetry_.cache_misses == 0
@@ -0,0 +1,537 @@
+import jax.numpy as jnp
+import numpyro
+import pytest
+from jax import random
+from numpyro import distributions as dist
+
+from prophetverse.engine import (
+    ConjugateInferenceEngine,
+    InferenceEngine,
+    LaplaceInferenceEngine,
+    LBFGSInferenceEngine,
+    MAPInferenceEngine,
+    MCMCInferenceEngine,
+    VIInferenceEngine,
+    least_squares_init_values,
+)
+from prophetverse.utils import memory
+
+
+def _model(x, y=None):
+    slope = numpyro.sample("slope", dist.Normal(0, 1))
+    std = numpyro.sample("std", dist.HalfNormal(1))
+    mean = slope * x
+    numpyro.deterministic("mean_", mean)
+    with numpyro.plate("data", x.shape[0], dim=-2):
+        numpyro.sample("obs", dist.Normal(mean, std), obs=y)
+
+
+def _subsampled_model(x, y=None, subsample_size=None):
+    slope = numpyro.sample("slope", dist.Normal(0, 1))
+    std = numpyro.sample("std", dist.HalfNormal(1))
+    with numpyro.plate("data", x.shape[0], dim=-2, subsample_size=subsample_size) as idx:
+        numpyro.sample("obs", dist.Normal(slope * x[idx], std), obs=None if y is None else y[idx])
+
+
+def _bimodal_model():
+    # Two local minima, near z=2 (reached from the prior mean) and z=-2 (the global one)
+    z = numpyro.sample("z", dist.Normal(1, 3))
+    numpyro.factor("potential", -((z**2 - 4) ** 2) - z)
+
+
+@pytest.fixture
+def data():
+    x = jnp.linspace(0, 1, 50).reshape((-1, 1))
+    y = 2 * x + 0.1 * random.normal(random.PRNGKey(0), x.shape)
+    return dict(x=x, y=y)
+
+
+def test_map_engine_stops_early_on_convergence(data):
+    engine = MAPInferenceEngine(
+        _model,
+        optimizer=numpyro.optim.Adam(step_size=0.05),
+        num_steps=20_000,
+        convergence_tol=1e-4,
+        check_every=500,
+    )
+    engine.infer(**data)
+
+    assert engine.converged_
+    assert engine.stopped_at_step_ < 20_000
+    assert engine.stopped_at_step_ % 500 == 0
+    assert engine.run_results_.losses.shape == (engine.stopped_at_step_,)
+    assert jnp.allclose(engine.posterior_samples_["slope"], 2, atol=0.1)
+
+
+def test_map_engine_stops_early_on_patience(data):
+    engine = MAPInferenceEngine(
+        _model,
+        optimizer=numpyro.optim.Adam(step_size=0.05),
+        num_steps=20_000,
+        patience=1000,
+        check_every=500,
+    )
+    engine.infer(**data)
+
+    assert engine.converged_
+    assert engine.stopped_at_step_ < 20_000
+
+
+def test_map_engine_runs_all_steps_without_stopping_criteria(data):
+    engine = MAPInferenceEngine(_model, num_steps=100)
+    engine.infer(**data)
+
+    assert not engine.converged_
+    assert engine.stopped_at_step_ == 100
+    assert engine.run_results_.losses.shape == (100,)
+
+
+def test_map_engine_multi_start_keeps_best_start():
+    single_start = MAPInferenceEngine(
+        _bimodal_model, optimizer=numpyro.optim.Adam(step_size=0.01), num_steps=2000
+    )
+    single_start.infer()
+    assert jnp.allclose(single_start.posterior_samples_["z"], 2, atol=0.1)
+
+    engine = MAPInferenceEngine(
+        _bimodal_model,
+        optimizer=numpyro.optim.Adam(step_size=0.01),
+        num_steps=2000,
+        num_starts=8,
+    )
+    engine.infer()
+
+    assert engine.start_losses_.shape == (8,)
+    assert engine.run_results_.losses.shape == (2000,)
+    assert engine.run_results_.losses[-1] == engine.start_losses_.min()
+    assert jnp.allclose(engine.posterior_samples_["z"], -2, atol=0.1)
+
+
+@pytest.mark.parametrize("chain_method", ["sequential", "vectorized"])
+def test_mcmc_engine_runs_all_chains(data, chain_method):
+    engine = MCMCInferenceEngine(
+        _model, num_samples=10, num_warmup=10, num_chains=2, chain_method=chain_method
+    )
+    engine.infer(**data)
+
+    assert engine.mcmc_.num_chains == 2
+    assert engine.posterior_samples_["slope"].shape == (20,)
+
+
+@pytest.mark.parametrize("dense_mass", [False, True])
+def test_mcmc_engine_starts_from_map_pre_fit(data, dense_mass):
+    engine = MCMCInferenceEngine(
+        _model,
+        num_samples=100,
+        num_warmup=50,
+        num_chains=2,
+        dense_mass=dense_mass,
+        init_steps=200,
+        init_mass_matrix=True,
+    )
+    engine.infer(**data)
+    map_slope = engine.init_engine_.posterior_samples_["slope"]
+
+    assert jnp.allclose(map_slope, 2, atol=0.1)
+    assert engine.posterior_samples_["slope"].shape == (200,)
+    assert jnp.allclose(engine.posterior_samples_["slope"].mean(), map_slope, atol=0.1)
+    assert engine.telemetry_.num_divergences == 0
+
+
+def test_mcmc_engine_rejects_unknown_chain_method():
+    with pytest.raises(ValueError):
+        MCMCInferenceEngine(_model, chain_method="unknown")
+
+
+def test_map_engine_predict_point_returns_mean_at_map(data):
+    engine = MAPInferenceEngine(_model, num_steps=100)
+    engine.infer(**data)
+
+    point = engine.predict_point(x=data["x"])
+    slope = engine.posterior_samples_["slope"]
+
+    assert point["obs"].shape == (1, *data["x"].shape)
+    assert jnp.allclose(point["obs"][0], slope * data["x"])
+    assert jnp.allclose(point["mean_"][0], slope * data["x"])
+
+
+@pytest.mark.parametrize(
+    "batch_kwargs", [dict(predict_batch_size=300), dict(predict_memory_limit=100_000)]
+)
+def test_map_engine_predicts_in_batches(data, batch_kwargs):
+    engine = MAPInferenceEngine(_model, num_steps=10, **batch_kwargs)
+    engine.infer(**data)
+
+    samples = engine.predict(x=data["x"])
+
+    assert samples["obs"].shape == (1000, *data["x"].shape)
+    assert samples["mean_"].shape == (1000, *data["x"].shape)
+
+
+def test_mcmc_engine_predicts_in_batches(data):
+    engine = MCMCInferenceEngine(
+        _model, num_samples=50, num_warmup=10, predict_batch_size=20
+    )
+    engine.infer(**data)
+    samples = engine.predict(x=data["x"])
+
+    assert samples["obs"].shape == (50, *data["x"].shape)
+    assert jnp.allclose(samples["slope"], engine.posterior_samples_["slope"])
+
+
+def test_mcmc_engine_reduces_mean_in_batches(data):
+    engine = MCMCInferenceEngine(
+        _model, num_samples=50, num_warmup=10, predict_memory_limit=5_000
+    )
+    engine.infer(**data)
+
+    mean = engine.predict(return_sites=("mean_",), mean=True, x=data["x"])
+    samples = engine.predict(return_sites=("mean_",), x=data["x"])
+
+    assert mean["mean_"].shape == (1, *data["x"].shape)
+    assert jnp.allclose(mean["mean_"][0], samples["mean_"].mean(axis=0), atol=1e-5)
+    # Both batches share one compiled function, and deriving the batch size compiles nothing
+    assert len(engine._compiled_cache) == 1
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        MAPInferenceEngine(_model, num_steps=10),
+        MCMCInferenceEngine(_model, num_samples=20, num_warmup=10),
+    ],
+)
+def test_engine_predicts_selected_sites(data, engine):
+    engine.infer(**data)
+
+    samples = engine.predict(return_sites=["obs"], x=data["x"])
+    assert set(samples) == {"obs"}
+    assert "mean_" in engine.predict(x=data["x"])
+
+    if engine.point_estimate:
+        point = engine.predict_point(return_sites=("mean_",), x=data["x"])
+        assert set(point) == {"mean_"}
+
+
+def test_mcmc_engine_excludes_deterministic_sites(data):
+    engine = MCMCInferenceEngine(
+        _model, num_samples=20, num_warmup=10, exclude_deterministic=True
+    )
+    engine.infer(**data)
+
+    assert set(engine.posterior_samples_) == {"slope", "std"}
+    assert engine.deterministic_sites_ == ("mean_",)
+
+    samples = engine.predict(x=data["x"])
+    expected = engine.posterior_samples_["slope"][:, None, None] * data["x"]
+    assert jnp.allclose(samples["mean_"], expected)
+
+
+def test_mcmc_engine_stores_thinned_samples_in_reduced_precision(data):
+    engine = MCMCInferenceEngine(
+        _model,
+        num_samples=40,
+        num_warmup=10,
+        thinning=2,
+        max_predict_samples=5,
+        storage_dtype="bfloat16",
+    )
+    engine.infer(**data)
+
+    assert engine.posterior_samples_["slope"].shape == (20,)
+    assert engine.posterior_samples_["slope"].dtype == jnp.bfloat16
+
+    nbytes = engine.get_nbytes()
+    # Only the chain-grouped arrays are held by the sampler
+    held = [
+        engine.mcmc_.get_samples(group_by_chain=True),
+        engine.mcmc_.get_extra_fields(group_by_chain=True),
+    ]
+    seen = set()
+    assert nbytes == InferenceEngine.get_nbytes(engine, seen) + memory.nbytes(held, seen)
+
+    samples = engine.predict(x=data["x"])
+    assert samples["obs"].shape == (5, *data["x"].shape)
+    assert samples["obs"].dtype == jnp.bfloat16
+    assert engine.get_nbytes() > nbytes
+
+
+def test_map_engine_reuses_compiled_predictive(data):
+    engine = MAPInferenceEngine(_model, num_steps=10)
+    engine.infer(**data)
+
+    first = engine.predict(x=data["x"])
+    second = engine.predict(x=data["x"] + 1)
+    assert len(engine._compiled_cache) == 1
+    assert not jnp.allclose(first["mean_"], second["mean_"])
+
+    # Inputs of another shape are compiled again
+    engine.predict(x=data["x"][:10])
+    assert len(engine._compiled_cache) == 2
+
+
+def test_lbfgs_engine_converges_in_few_iterations(data):
+    engine = LBFGSInferenceEngine(_model, num_steps=500)
+    engine.infer(**data)
+
+    assert engine.stopped_at_step_ < 500
+    assert jnp.allclose(engine.posterior_samples_["slope"], 2, atol=0.1)
+
+    map_engine = MAPInferenceEngine(
+        _model, optimizer=numpyro.optim.Adam(step_size=0.01), num_steps=5000
+    )
+    map_engine.infer(**data)
+    assert jnp.allclose(
+        engine.posterior_samples_["slope"], map_engine.posterior_samples_["slope"], atol=1e-2
+    )
+
+    point = engine.predict_point(x=data["x"])
+    samples = engine.predict(x=data["x"])
+    assert point["obs"].shape == (1, *data["x"].shape)
+    assert samples["obs"].shape == (1000, *data["x"].shape)
+
+
+def test_laplace_engine_samples_around_map(data):
+    engine = LaplaceInferenceEngine(
+        _model, optimizer=numpyro.optim.Adam(step_size=0.01), num_steps=5000, num_samples=500
+    )
+    engine.infer(**data)
+    slope = engine.posterior_samples_["slope"]
+    map_slope = engine.guide_.median(engine.run_results_.params)["slope"]
+
+    assert slope.shape == (500,)
+    assert 0 < slope.std() < 0.5
+    assert jnp.allclose(slope.mean(), map_slope, atol=3 * slope.std() / jnp.sqrt(500))
+    assert (engine.posterior_samples_["std"] > 0).all()
+    assert engine.telemetry_.num_samples == 500
+
+    samples = engine.predict(x=data["x"])
+    assert samples["obs"].shape == (500, *data["x"].shape)
+    assert jnp.allclose(samples["slope"], slope)
+
+
+@pytest.mark.parametrize(
+    "guide_name",
+    ["AutoNormal", "AutoLowRankMultivariateNormal", "AutoMultivariateNormal"],
+)
+def test_vi_engine_approximates_posterior(data, guide_name):
+    engine = VIInferenceEngine(
+        _model,
+        guide_name=guide_name,
+        num_particles=4,
+        optimizer=numpyro.optim.Adam(step_size=0.01),
+        num_steps=3000,
+        num_samples=200,
+    )
+    engine.infer(**data)
+    slope = engine.posterior_samples_["slope"]
+
+    assert slope.shape == (200,)
+    assert jnp.allclose(slope.mean(), 2, atol=0.1)
+    assert 0 < slope.std() < 0.5
+    assert engine.predict(x=data["x"])["obs"].shape == (200, *data["x"].shape)
+    assert "slope" in engine.get_warm_start_kwargs()["init_values"]
+
+
+def test_vi_engine_rejects_unknown_guide():
+    with pytest.raises(ValueError):
+        VIInferenceEngine(_model, guide_name="AutoDelta")
+
+
+def test_conjugate_engine_solves_linear_model(data):
+    engine = ConjugateInferenceEngine(_model, num_samples=500, noise_site="std")
+    engine.infer(**data)
+    slope = engine.posterior_samples_["slope"]
+
+    assert slope.shape == (500,)
+    assert jnp.allclose(slope.mean(), 2, atol=0.1)
+    assert 0 < slope.std() < 0.5
+    assert jnp.allclose(engine.noise_scale_, 0.1, atol=0.05)
+    assert engine.posterior_samples_["std"].shape == (500,)
+    assert engine.predict(x=data["x"])["obs"].shape == (500, *data["x"].shape)
+
+
+def test_conjugate_engine_rejects_nonlinear_model(data):
+    def nonlinear_model(x, y=None):
+        slope = numpyro.sample("slope", dist.Normal(0, 1))
+        std = numpyro.sample("std", dist.HalfNormal(1))
+        with numpyro.plate("data", x.shape[0], dim=-2):
+            numpyro.sample("obs", dist.Normal(jnp.exp(slope) * x, std), obs=y)
+
+    with pytest.raises(ValueError):
+        ConjugateInferenceEngine(nonlinear_model, noise_site="std").infer(**data)
+
+
+def test_least_squares_init_values_fit_real_sites(data):
+    init_values = least_squares_init_values(_model, ridge=1e-3, **data)
+
+    assert set(init_values) == {"slope"}
+    assert jnp.allclose(init_values["slope"], 2, atol=0.1)
+
+    engine = MAPInferenceEngine(
+        _model,
+        optimizer=numpyro.optim.Adam(step_size=0.01),
+        num_steps=1000,
+        init_values=init_values,
+    )
+    engine.infer(**data)
+    assert jnp.allclose(engine.posterior_samples_["slope"], 2, atol=0.1)
+
+
+def test_map_engine_evaluates_full_loss_when_subsampling(data):
+    full_batch = MAPInferenceEngine(_model, num_steps=2000, check_every=500)
+    full_batch.infer(**data)
+
+    engine = MAPInferenceEngine(
+        _subsampled_model,
+        num_steps=2000,
+        check_every=500,
+        full_loss_kwargs={"subsample_size": None},
+    )
+    engine.infer(subsample_size=10, **data)
+
+    assert engine.full_losses_.shape == (4,)
+    assert engine.full_losses_[-1] < engine.full_losses_[0]
+    assert jnp.allclose(
+        engine.posterior_samples_["slope"], full_batch.posterior_samples_["slope"], atol=0.2
+    )
+
+
+def test_map_engine_resumes_from_checkpoint(data, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.pkl")
+    engine_kwargs = dict(optimizer=numpyro.optim.Adam(step_size=0.01), check_every=200)
+
+    reference = MAPInferenceEngine(
+        _model,
+        num_steps=1000,
+        checkpoint_path=str(tmp_path / "reference.pkl"),
+        **engine_kwargs,
+    )
+    reference.infer(**data)
+
+    interrupted = MAPInferenceEngine(
+        _model, num_steps=600, checkpoint_path=checkpoint_path, **engine_kwargs
+    )
+    interrupted.infer(**data)
+
+    resumed = MAPInferenceEngine(
+        _model,
+        num_steps=1000,
+        checkpoint_path=checkpoint_path,
+        resume=True,
+        **engine_kwargs,
+    )
+    resumed.infer(**data)
+
+    assert resumed.stopped_at_step_ == 1000
+    assert resumed.run_results_.losses.shape == (1000,)
+    assert jnp.allclose(resumed.run_results_.losses, reference.run_results_.losses)
+    for name, value in reference.run_results_.params.items():
+        assert jnp.allclose(resumed.run_results_.params[name], value)
+
+
+def test_map_engine_rejects_checkpoint_of_other_model(data, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.pkl")
+    MAPInferenceEngine(
+        _bimodal_model, num_steps=10, checkpoint_path=checkpoint_path
+    ).infer()
+
+    engine = MAPInferenceEngine(
+        _model, num_steps=10, checkpoint_path=checkpoint_path, resume=True
+    )
+    with pytest.raises(ValueError):
+        engine.infer(**data)
+
+
+@pytest.mark.parametrize(
+    "engine_kwargs",
+    [dict(), dict(patience=1000, check_every=500), dict(num_starts=2)],
+)
+def test_map_engine_reports_telemetry(data, engine_kwargs):
+    engine = MAPInferenceEngine(_model, num_steps=3000, **engine_kwargs)
+    engine.infer(**data)
+    telemetry = engine.telemetry_
+
+    assert telemetry.compile_time > 0
+    assert telemetry.run_time > 0
+    assert telemetry.num_steps == engine.stopped_at_step_
+    assert telemetry.steps_per_second > 0
+    assert telemetry.losses.shape == (1000,)
+    assert telemetry.grad_norm["final"] < telemetry.grad_norm["initial"]
+    assert telemetry.tree_depth is None
+
+
+def test_lbfgs_engine_reports_telemetry(data):
+    engine = LBFGSInferenceEngine(_model, num_steps=500)
+    engine.infer(**data)
+    telemetry = engine.telemetry_
+
+    assert telemetry.num_steps == engine.stopped_at_step_
+    assert telemetry.losses.shape == (engine.stopped_at_step_,)
+    assert telemetry.grad_norm["final"] < 1e-3 * telemetry.grad_norm["initial"]
+
+
+def test_mcmc_engine_reports_telemetry(data):
+    engine = MCMCInferenceEngine(_model, num_samples=50, num_warmup=50, num_chains=2)
+    engine.infer(**data)
+    telemetry = engine.telemetry_
+
+    assert telemetry.compile_time > 0
+    assert telemetry.num_steps == 200
+    assert telemetry.num_samples == 100
+    assert telemetry.samples_per_second > 0
+    assert 1 <= telemetry.tree_depth["mean"] <= telemetry.tree_depth["max"] <= 10
+    assert telemetry.num_divergences >= 0
+    assert 0 <= telemetry.accept_prob <= 1
+    assert telemetry.losses is None
+
+
+def test_map_engine_stops_when_time_budget_is_spent(data):
+    engine = MAPInferenceEngine(
+        _model,
+        optimizer=numpyro.optim.Adam(step_size=0.05),
+        num_steps=100_000,
+        check_every=500,
+        time_budget=0.0,
+    )
+    engine.infer(**data)
+
+    assert engine.budget_exhausted_
+    assert engine.stopped_at_step_ == 500
+    assert engine.telemetry_.budget_exhausted
+    assert not engine.telemetry_.converged
+
+    unlimited = MAPInferenceEngine(
+        _model,
+        optimizer=numpyro.optim.Adam(step_size=0.05),
+        num_steps=2000,
+        check_every=500,
+        time_budget=3600.0,
+    )
+    unlimited.infer(**data)
+    assert not unlimited.budget_exhausted_
+    assert unlimited.stopped_at_step_ == 2000
+    assert jnp.allclose(unlimited.posterior_samples_["slope"], 2, atol=0.1)
+
+
+@pytest.mark.parametrize("num_chains", [1, 2])
+def test_mcmc_engine_samples_in_blocks_within_time_budget(data, num_chains):
+    engine_kwargs = dict(
+        num_samples=100, num_warmup=50, num_chains=num_chains, block_size=40, thinning=2
+    )
+    engine = MCMCInferenceEngine(_model, time_budget=0.0, **engine_kwargs)
+    engine.infer(**data)
+
+    assert engine.budget_exhausted_
+    assert engine.num_draws_ == 40
+    assert engine.posterior_samples_["slope"].shape == (20 * num_chains,)
+    assert engine.telemetry_.budget_exhausted
+
+    unlimited = MCMCInferenceEngine(_model, time_budget=3600.0, **engine_kwargs)
+    unlimited.infer(**data)
+
+    assert not unlimited.budget_exhausted_
+    assert unlimited.num_draws_ == 100
+    assert unlimited.posterior_samples_["slope"].shape == (50 * num_chains,)
+    assert jnp.allclose(unlimited.posterior_samples_["slope"].mean(), 2, atol=0.1)
+    assert unlimited.telemetry_.converged
@@ -0,0 +1,39 @@
+import jax.numpy as jnp
+import numpy as np
+import pytest
+
+from prophetverse.utils.optimize import minimize_lbfgs
+
+
+def _rosenbrock(x):
+    return jnp.sum(100.0 * (x[1:] - x[:-1] ** 2) ** 2 + (1 - x[:-1]) ** 2)
+
+
+@pytest.mark.parametrize("dim", [2, 10])
+def test_minimize_lbfgs_rosenbrock(dim):
+    result = minimize_lbfgs(_rosenbrock, jnp.zeros(dim), maxiter=500, tol=1e-4)
+
+    assert result.converged
+    assert result.num_iter < 500
+    np.testing.assert_allclose(result.x, jnp.ones(dim), atol=1e-2)
+    assert jnp.all(jnp.isnan(result.losses[result.num_iter :]))
+
+
+def test_minimize_lbfgs_badly_scaled_gradient():
+    scales = jnp.array([1e4, 1.0, 1e-2])
+
+    def fun(x):
+        return jnp.sum(scales * (x - 3.0) ** 2)
+
+    result = minimize_lbfgs(fun, jnp.zeros(3), maxiter=200, tol=1e-4)
+
+    assert jnp.isfinite(result.fun)
+    np.testing.assert_allclose(result.x, 3.0, atol=1e-2)
+
+
+def test_minimize_lbfgs_respects_maxiter():
+    result = minimize_lbfgs(_rosenbrock, jnp.zeros(10), maxiter=3, tol=0.0)
+
+    assert result.num_iter == 3
+    assert not result.converged
+    assert result.losses.shape == (3,)
@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpyro import distributions as dist
+
+from prophetverse.effects import HillEffect, LinearEffect
+from prophetverse.utils.serialization import decode, encode, register_class
+
+
+def _roundtrip(value):
+    arrays = {}
+    encoded = json.loads(json.dumps(encode(value, arrays)))
+    return decode(encoded, arrays)
+
+
+def test_roundtrip_containers_and_indexes():
+    index = pd.MultiIndex.from_product(
+        [["a", "b"], pd.period_range("2000-01-01", periods=3, freq="D")],
+        names=["series", "time"],
+    )
+    value = {
+        "tuple": (1, 2.5, "x"),
+        "set": {"x1"},
+        "array": np.arange(3),
+        "index": index,
+        "frame": pd.DataFrame(np.ones((6, 1)), index=index, columns=["y"]),
+    }
+    decoded = _roundtrip(value)
+
+    assert decoded["tuple"] == (1, 2.5, "x")
+    assert decoded["set"] == {"x1"}
+    np.testing.assert_array_equal(decoded["array"], np.arange(3))
+    assert decoded["index"].equals(index)
+    pd.testing.assert_frame_equal(decoded["frame"], value["frame"])
+
+
+def test_roundtrip_distributions_and_effects():
+    capacity = dist.TransformedDistribution(
+        dist.HalfNormal(0.2), dist.transforms.AffineTransform(loc=1.1, scale=1)
+    )
+    effects = [
+        LinearEffect(id="lin", regex="x1", prior=(dist.Laplace, 0, 1)),
+        HillEffect(id="hill", slope_prior=dist.Gamma(2, 1), effect_mode="additive"),
+    ]
+    decoded_capacity, (linear, hill) = _roundtrip((capacity, effects))
+
+    assert isinstance(decoded_capacity.base_dist, dist.HalfNormal)
+    assert float(decoded_capacity.transforms[0].loc) == pytest.approx(1.1)
+    assert linear.id == "lin" and linear.regex == "x1"
+    assert linear.prior == (dist.Laplace, 0, 1)
+    assert hill.effect_mode == "additive"
+    assert float(hill.slope_prior.concentration) == 2
+
+
+def test_encode_rejects_foreign_objects():
+    class Foreign:
+        pass
+
+    with pytest.raises(TypeError):
+        encode(Foreign(), {})
+
+
+def test_decode_rejects_functions(tmp_path):
+    path = tmp_path / "written"
+    encoded = {
+        "__object__": "prophetverse.engine._save_checkpoint",
+        "args": {"path": str(path), "checkpoint": {}},
+    }
+
+    with pytest.raises(ValueError):
+        decode(encoded, {})
+    with pytest.raises(ValueError):
+        decode({"__class__": "prophetverse.engine._load_checkpoint"}, {})
+    assert not path.exists()
+
+
+def test_decode_requires_registered_classes():
+    class CustomEffect(LinearEffect):
+        pass
+
+    with pytest.raises(TypeError):
+        encode(CustomEffect(), {})
+
+    register_class(CustomEffect)
+    assert isinstance(_roundtrip(CustomEffect(id="custom")), CustomEffect)